@@ -1,7 +1,8 @@
 import streamlit as st
 import requests
 import logging
-import time
+import json
+import html
 
 
 # Configure logging
@@ -10,6 +11,7 @@ logging.basicConfig(level=logging.INFO)
 # Define the API URL of your agent service
 AGENT_API_URL = 'https://react-agent-service-390991481152.us-central1.run.app/api/agent'
 # AGENT_API_URL = 'http://localhost:8080/api/agent'
+AGENT_STREAM_API_URL = AGENT_API_URL + '/stream'
 
 # Streamlit UI setup
 st.set_page_config(page_title="Agent Chat Interface", page_icon="💬", layout="wide")
@@ -109,38 +111,83 @@ if 'conversation_history' not in st.session_state:
     st.session_state.conversation_history = []
     st.session_state.latest_user_message = None
     st.session_state.latest_agent_response = None
-    st.session_state.latest_trace = None
-
-
-# Function to send query to the agent API and retrieve the response
-def get_agent_response(user_message):
-    payload = {'query': user_message, 'conversation': st.session_state.conversation_history}
+    # The server keeps the conversation's earlier observations under the id it issues on the first answer
+    st.session_state.session_id = None
+
+
+# Function to turn a server error payload into a message for the user
+def describe_error(body):
+    message = body.get('error', 'The agent run failed.')
+    if body.get('retry_after'):
+        message += f" Please try again in {body['retry_after']}s."
+    return message
+
+
+# Function to stream the agent's events and render them as they arrive; returns the final response and any error
+def stream_agent_response(user_message):
+    payload = {
+        'query': user_message,
+        'conversation': st.session_state.conversation_history,
+        'session': True,
+        'session_id': st.session_state.session_id
+    }
+    live_output = st.empty()
+    steps = st.container()
+    tokens = ''
+    step_count = 0
+    data = None
+    error = None
 
     try:
-        response = requests.post(AGENT_API_URL, json=payload, timeout=60)
-        response.raise_for_status()
-        data = response.json()
-        logging.info("Received response from agent service.")
+        # Connect timeout of 10s; the read timeout applies between events, not to the whole run
+        with requests.post(AGENT_STREAM_API_URL, json=payload, stream=True, timeout=(10, 60)) as response:
+            response.raise_for_status()
+            event = None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith('event: '):
+                    event = line[len('event: '):]
+                elif line.startswith('data: '):
+                    body = json.loads(line[len('data: '):])
+                    if event == 'token':
+                        tokens += body['text']
+                        live_output.markdown(f"<div class='trace-step'><em>Thinking...</em> {html.escape(tokens)}</div>", unsafe_allow_html=True)
+                    elif event == 'thought':
+                        tokens = ''
+                        live_output.empty()
+                        step_count += 1
+                        content = body['content']
+                        if isinstance(content, dict):
+                            content = content.get('thought') or str(content)
+                        steps.markdown(f"<div class='trace-step'><strong>Step {step_count}:</strong> {html.escape(str(content))}</div>", unsafe_allow_html=True)
+                    elif event in ('action', 'observation'):
+                        steps.markdown(f"<div class='trace-step'>{html.escape(body['content'][:500])}</div>", unsafe_allow_html=True)
+                    elif event == 'done':
+                        data = body
+                    elif event == 'error':
+                        logging.error("Agent run failed: %s", body['error'])
+                        error = describe_error(body)
+                        st.error(error)
+        logging.info("Received streamed response from agent service.")
+    except requests.exceptions.HTTPError as e:
+        # Rejected requests (rate limits, a full queue) carry their reason and retry hint as JSON
+        try:
+            error = describe_error(e.response.json())
+        except ValueError:
+            error = "The agent service rejected the request. Please try again later."
+        logging.error("Agent service returned an error: %s", e)
+        st.error(error)
     except requests.exceptions.RequestException as e:
-        logging.error(f"Failed to connect to the agent service: {e}")
-        st.error("Failed to connect to the agent service. Please try again later.")
-        return None
+        logging.error("Failed to connect to the agent service: %s", e)
+        error = "Failed to connect to the agent service. Please try again later."
+        st.error(error)
 
-    return data
+    return data, error
 
 # Function to remove "Final Answer:" prefix from response
 def clean_final_answer(answer):
     return answer.replace("Final Answer: ", "")
 
 
-# Function to display the agent's thought process
-def display_trace(trace):
-    if trace:
-        st.markdown("<h3 style='margin-top: 40px;'>Agent's Thought Process</h3>", unsafe_allow_html=True)
-        for idx, msg in enumerate(trace, start=1):
-            content = msg.get('thought') or msg.get('content') or msg.get('text') or str(msg)
-            st.markdown(f"<div class='trace-step'><strong>Step {idx}:</strong> {content}</div>", unsafe_allow_html=True)
-
 # Sidebar for conversation history and clear option
 with st.sidebar:
     st.header("Conversation History")
@@ -164,8 +211,8 @@ with st.sidebar:
             st.markdown(f"""
             <div class='history-entry'>
                 <h4>Exchange {idx + 1}</h4>
-                <p><strong>You:</strong> {ex.get('user', '')}</p>
-                <p><strong>Agent:</strong> {ex.get('assistant', '')}</p>
+                <p><strong>You:</strong> {html.escape(ex.get('user', ''))}</p>
+                <p><strong>Agent:</strong> {html.escape(ex.get('assistant', ''))}</p>
             </div>
             """, unsafe_allow_html=True)
     else:
@@ -175,7 +222,7 @@ with st.sidebar:
         st.session_state.conversation_history = []
         st.session_state.latest_user_message = None
         st.session_state.latest_agent_response = None
-        st.session_state.latest_trace = None
+        st.session_state.session_id = None
         st.rerun()
 
 
@@ -192,22 +239,19 @@ with st.form(key='user_input_form', clear_on_submit=True):
 if submit_button and user_message:
     st.session_state.conversation_history.append({'role': 'user', 'content': user_message})
     
-    st.markdown(f"<div class='user-message'>{user_message}</div>", unsafe_allow_html=True)
+    st.markdown(f"<div class='user-message'>{html.escape(user_message)}</div>", unsafe_allow_html=True)
 
-    # Show loading animation
-    with st.spinner("Processing your query..."):
-        data = get_agent_response(user_message)
-        time.sleep(1)  # Optional delay to emphasize the animation
+    # Steps are rendered as the agent produces them
+    data, error = stream_agent_response(user_message)
 
     if data:
         final_answer = clean_final_answer(data.get('final_answer', 'No answer available.'))
-        trace = data.get('trace', [])
+        st.session_state.session_id = data.get('session_id', st.session_state.session_id)
 
         st.session_state.conversation_history.append({'role': 'assistant', 'content': final_answer})
 
-        st.markdown(f"<div class='agent-message'>{final_answer}</div>", unsafe_allow_html=True)
-        display_trace(trace)
+        st.markdown(f"<div class='agent-message'>{html.escape(final_answer)}</div>", unsafe_allow_html=True)
     else:
-        error_message = 'Failed to get response from agent.'
+        error_message = error or 'Failed to get response from agent.'
         st.session_state.conversation_history.append({'role': 'assistant', 'content': error_message})
-        st.markdown(f"<div class='agent-message'>{error_message}</div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='agent-message'>{html.escape(error_message)}</div>", unsafe_allow_html=True)
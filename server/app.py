@@ -1,72 +1,222 @@
 from vertexai.generative_models import GenerativeModel
 from src.tools.serp import search as google_search
+from src.tools.serp import client_stats as serp_stats
 from src.tools.wiki import search as wiki_search
+from src.react.trace import message_event
+from src.react.trace import build_response
+from src.utils.admission import get_admission_controller
+from src.react.session import get_session_store
+from src.react.session import valid_session_id
+from src.react.router import get_router
+from src.utils.ratelimit import limiter_stats
+from src.utils.ratelimit import RateLimited
+from src.utils.admission import Rejected
+from src.tools.cache import get_tool_cache
+from src.utils import metrics
+from src.config.logging import stats as logging_stats
 from src.config.logging import logger
 from src.config.setup import config
-from src.react.agent import Agent
+from src.react.factory import get_agent_class
+from src.react.factory import AgentFactory
 from src.react.agent import Name 
+from typing import Any
+from typing import Dict
+from flask import Response
 from flask import jsonify
 from flask import request
 from flask import Flask
+from flask import g
+import threading
+import queue
 import json
+import math
+import time
 
 
 app = Flask(__name__)
 
-# Initialize the gemini model globally to avoid reloading it for every request
+# Initialize the gemini model globally to avoid reloading it for every request. Constructing the
+# model does not open a connection, so it is safe to create before gunicorn forks its workers;
+# each worker opens its own channel on first use.
 gemini = GenerativeModel(config.MODEL_NAME)
 
-def parse_thought_content(content):
+# Load the prompt template and build the tool registry once at startup; a missing template fails
+# the boot rather than the first request, and each request only creates a lightweight agent
+agents = AgentFactory(gemini, {Name.WIKIPEDIA: wiki_search, Name.GOOGLE: google_search}, agent_class=get_agent_class())
+
+# Bounds the number of agent runs in flight in this worker; excess requests wait briefly in a
+# bounded queue and are rejected with Retry-After once it is full
+admission = get_admission_controller()
+
+# Counters kept by the caches, the admission controller and the SERP client are read when /metrics is scraped
+if agents.client.cache is not None:
+    metrics.collector.add_cache('llm', agents.client.cache.stats)
+tool_cache = get_tool_cache()
+if tool_cache is not None:
+    metrics.collector.add_cache('tools', lambda: {'backend': tool_cache.stats()})
+metrics.collector.add_gauges('agent_admission', admission.stats, per_process=('average_run_seconds',))
+metrics.collector.add_gauges('agent_logging', logging_stats)
+metrics.collector.add_gauges('agent_serp', serp_stats)
+
+# A request sent with `session: true` starts a conversation and gets its server-issued session_id back;
+# follow-up questions that send that id continue from the earlier exchanges of the conversation
+sessions = get_session_store()
+if sessions is not None:
+    metrics.collector.add_cache('sessions', lambda: {'backend': sessions.stats()})
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
     """
-    Extract JSON-like part from content surrounded by ```json``` and convert it to a dictionary.
+    Formats a single Server-Sent Event.
     """
-    try:
-        # Check if content includes ```json``` markers
-        if "```json" in content:
-            # Strip out 'Thought: ' prefix and extract the JSON string
-            json_str = content.split("```json", 1)[1].split("```")[0].strip()
-            thought_dict = json.loads(json_str)  # Convert JSON string to dictionary
-            return thought_dict
-        else:
-            # If no ```json``` markers are present, try to parse the content after "Thought: "
-            json_str = content.split("Thought: ", 1)[1].strip()
-            thought_dict = json.loads(json_str)
-            return thought_dict
-    except (IndexError, json.JSONDecodeError) as e:
-        logger.error(f"Error parsing thought content: {e}")
-        return content  # Return the original content if parsing fails
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
+
+
+@app.after_request
+def observe_latency(response: Response) -> Response:
+    # Observed when the response is closed, so streamed responses are timed until their last event
+    endpoint = request.endpoint or 'unknown'
+    status = str(response.status_code)
+    started = g.started
+    response.call_on_close(
+        lambda: metrics.REQUEST_SECONDS.labels(endpoint, status).observe(time.perf_counter() - started)
+    )
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_api():
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+
+@app.errorhandler(Rejected)
+def rejected(e: Rejected):
+    logger.warning('Rejecting request (%s): %s', e.status, e.message)
+    response = jsonify({'error': e.message, 'retry_after': e.retry_after})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, e.status
+
+
+@app.errorhandler(RateLimited)
+def rate_limited(e: RateLimited):
+    # Gemini's rate limit ends the run instead of spending its iterations on refused calls
+    retry_after = max(1, math.ceil(e.retry_after))
+    logger.warning('Rejecting request (503): %s', e)
+    response = jsonify({'error': str(e), 'retry_after': retry_after})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 503
+
+
+@app.route('/api/status', methods=['GET'])
+def status_api():
+    status = {'admission': admission.stats(), 'limits': limiter_stats(), 'serp': serp_stats()}
+    router = get_router()
+    if router is not None:
+        status['router'] = router.stats()
+    return jsonify(status), 200
 
 
 @app.route('/api/agent', methods=['POST'])
 def agent_api():
     data = request.get_json()
     query = data.get('query', '')
-    logger.info(f'Incoming User Query: {query}')
+    logger.info('Incoming User Query: %s', query)
     if not query:
         return jsonify({'error': 'Query is required'}), 400
+    session_id = data.get('session_id')
+    if session_id is not None and not valid_session_id(session_id):
+        return jsonify({'error': 'Invalid session_id'}), 400
+
+    # Wait for a free run slot; raises Rejected when the service is saturated
+    admitted = admission.acquire()
+    try:
+        # Create a fresh agent for each request to reset its state
+        agent = agents.create()
+        agent.record_timeline = bool(data.get('include_timeline', False))
+        if sessions is not None and (session_id or data.get('session')):
+            agent.session = sessions.open(session_id, data.get('conversation'))
 
-    # Initialize the agent for each request to reset its state
-    agent = Agent(model=gemini)
-    agent.register(Name.WIKIPEDIA, wiki_search)
-    agent.register(Name.GOOGLE, google_search)
-
-    # Execute the agent
-    final_answer = agent.execute(query)
-
-    # Process the trace
-    trace = []
-    for message in agent.messages:
-        if message.content.startswith('Thought:'):
-            thought_content = parse_thought_content(message.content)
-            trace.append(thought_content)
-
-    # Prepare the response
-    response = {
-        'final_answer': final_answer,
-        'trace': trace
-    }
+        # Execute the agent
+        final_answer = agent.execute(query)
+        if agent.session is not None:
+            sessions.save(agent.session)
+    finally:
+        admission.release(admitted)
+
+    response = build_response(agent, final_answer, data.get('include_observations', False))
     return jsonify(response), 200
 
 
+@app.route('/api/agent/stream', methods=['POST'])
+def agent_stream_api():
+    data = request.get_json()
+    query = data.get('query', '')
+    logger.info('Incoming User Query (stream): %s', query)
+    if not query:
+        return jsonify({'error': 'Query is required'}), 400
+    session_id = data.get('session_id')
+    if session_id is not None and not valid_session_id(session_id):
+        return jsonify({'error': 'Invalid session_id'}), 400
+
+    # The slot is held by the run thread below and released when the run ends, or here if the
+    # run cannot be set up
+    admitted = admission.acquire()
+    try:
+        agent = agents.create()
+        agent.record_timeline = bool(data.get('include_timeline', False))
+        if sessions is not None and (session_id or data.get('session')):
+            agent.session = sessions.open(session_id, data.get('conversation'))
+    except Exception:
+        admission.release(admitted)
+        raise
+    agent.stream_tokens = True
+    events = queue.Queue()
+
+    def forward(event: str, payload: Dict[str, Any]) -> None:
+        if event == "message":
+            name, body = message_event(payload["message"])
+            body["iteration"] = payload["iteration"]
+            events.put((name, body))
+        else:
+            events.put((event, payload))
+
+    def run() -> None:
+        try:
+            final_answer = agent.execute(query)
+            if agent.session is not None:
+                sessions.save(agent.session)
+            events.put(("done", build_response(agent, final_answer, data.get('include_observations', False))))
+        except RateLimited as e:
+            logger.warning('Agent run stopped: %s', e)
+            events.put(("error", {"error": str(e), "retry_after": max(1, math.ceil(e.retry_after))}))
+        except Exception as e:
+            logger.exception("Agent run failed: %s", e)
+            events.put(("error", {"error": str(e)}))
+        finally:
+            admission.release(admitted)
+            events.put(None)
+
+    # The agent runs in its own thread and pushes events into the queue as they happen,
+    # so the response starts flowing after the first model chunk instead of after the whole run
+    agent.subscribe(forward)
+    threading.Thread(target=run, daemon=True).start()
+
+    def stream():
+        while True:
+            item = events.get()
+            if item is None:
+                break
+            yield format_sse(*item)
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(stream(), mimetype='text/event-stream', headers=headers)
+
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8080)
+    app.run(host='0.0.0.0', port=8080, threaded=True)
@@ -0,0 +1,97 @@
+from vertexai.generative_models import GenerativeModel
+from src.tools.serp import search_async as google_search
+from src.tools.wiki import search_async as wiki_search
+from starlette.responses import JSONResponse
+from starlette.responses import Response
+from src.react.trace import build_response
+from starlette.applications import Starlette
+from starlette.requests import Request
+from src.config.logging import logger
+from starlette.routing import Route
+from src.config.setup import config
+from src.tools.serp import close_async_client
+from src.tools.cache import get_tool_cache
+from src.react.factory import get_agent_class
+from src.react.factory import AgentFactory
+from src.react.session import get_session_store
+from src.react.session import valid_session_id
+from src.utils.ratelimit import RateLimited
+from src.react.agent import Name
+from src.utils import metrics
+import uvicorn
+import math
+import time
+
+
+# Initialize the gemini model globally to avoid reloading it for every request
+gemini = GenerativeModel(config.MODEL_NAME)
+
+# Load the prompt template and build the tool registry once at startup
+agents = AgentFactory(gemini, {Name.WIKIPEDIA: wiki_search, Name.GOOGLE: google_search}, agent_class=get_agent_class(asynchronous=True))
+
+# Counters kept by the caches are read when /metrics is scraped
+if agents.client.cache is not None:
+    metrics.collector.add_cache('llm', agents.client.cache.stats)
+tool_cache = get_tool_cache()
+if tool_cache is not None:
+    metrics.collector.add_cache('tools', lambda: {'backend': tool_cache.stats()})
+
+# A request sent with `session: true` starts a conversation and gets its server-issued session_id back;
+# follow-up questions that send that id continue from the earlier exchanges of the conversation
+sessions = get_session_store()
+if sessions is not None:
+    metrics.collector.add_cache('sessions', lambda: {'backend': sessions.stats()})
+
+
+async def agent_api(request: Request) -> JSONResponse:
+    started = time.perf_counter()
+    data = await request.json()
+    query = data.get('query', '')
+    logger.info('Incoming User Query: %s', query)
+    if not query:
+        return JSONResponse({'error': 'Query is required'}, status_code=400)
+    session_id = data.get('session_id')
+    if session_id is not None and not valid_session_id(session_id):
+        return JSONResponse({'error': 'Invalid session_id'}, status_code=400)
+
+    # Create a fresh agent for each request to reset its state
+    agent = agents.create()
+    agent.record_timeline = bool(data.get('include_timeline', False))
+    if sessions is not None and (session_id or data.get('session')):
+        agent.session = sessions.open(session_id, data.get('conversation'))
+
+    # Execute the agent; the event loop keeps serving other requests while it waits on the network
+    final_answer = await agent.execute(query)
+    if agent.session is not None:
+        sessions.save(agent.session)
+
+    response = build_response(agent, final_answer, data.get('include_observations', False))
+    metrics.REQUEST_SECONDS.labels('agent_api', '200').observe(time.perf_counter() - started)
+    return JSONResponse(response, status_code=200)
+
+
+async def rate_limited(request: Request, e: RateLimited) -> JSONResponse:
+    # Gemini's rate limit ends the run instead of spending its iterations on refused calls
+    retry_after = max(1, math.ceil(e.retry_after))
+    logger.warning('Rejecting request (503): %s', e)
+    return JSONResponse({'error': str(e), 'retry_after': retry_after}, status_code=503,
+                        headers={'Retry-After': str(retry_after)})
+
+
+async def metrics_api(request: Request) -> Response:
+    body, content_type = metrics.render()
+    return Response(body, headers={'Content-Type': content_type})
+
+
+app = Starlette(
+    routes=[
+        Route('/api/agent', agent_api, methods=['POST']),
+        Route('/metrics', metrics_api, methods=['GET'])
+    ],
+    exception_handlers={RateLimited: rate_limited},
+    on_shutdown=[close_async_client]
+)
+
+
+if __name__ == '__main__':
+    uvicorn.run(app, host='0.0.0.0', port=8080)
@@ -0,0 +1,272 @@
+from typing import Iterator
+from typing import Optional
+from typing import List
+from typing import Any
+import threading
+import asyncio
+import random
+import json
+import time
+import re
+
+
+QUERY_PATTERN = re.compile(r"Query: (.*)")
+
+# Successful model turns are recorded as "Thought: ..."; failed calls as "Thought: No response ..."
+COMPLETED_TURN_PATTERN = re.compile(r"^assistant: Thought: (?!No response from Gemini)", re.MULTILINE)
+
+
+class BackendError(Exception):
+    """
+    Raised by a fake backend to simulate an upstream failure.
+    """
+
+
+class LatencyProfile:
+    """
+    Latency and failure behaviour of a fake upstream.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0) -> None:
+        """
+        Args:
+            latency (float): Mean latency per call, in seconds.
+            jitter (float): Standard deviation of the latency, in seconds.
+            error_rate (float): Probability that a call fails.
+            seed (int): Seed for the random number generator, so runs are reproducible.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        """
+        Draws the latency of one call and decides whether it fails.
+
+        Returns:
+            float: The latency in seconds.
+
+        Raises:
+            BackendError: If the call should fail.
+        """
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+            latency = max(0.0, self._random.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+        if failed:
+            time.sleep(latency)
+            raise BackendError("Simulated upstream failure")
+        return latency
+
+
+class FakeUsage:
+    """
+    Mimics the `usage_metadata` of a Gemini response.
+    """
+
+    def __init__(self, prompt: str, text: str) -> None:
+        self.prompt_token_count = len(prompt) // 4
+        self.candidates_token_count = len(text) // 4
+
+
+class FakeFunctionCall:
+    """
+    Mimics a function call in a Gemini response.
+    """
+
+    def __init__(self, name: str, args: dict) -> None:
+        self.name = name
+        self.args = args
+
+
+class FakePart:
+    """
+    Mimics a part of a Gemini response: text or a function call.
+    """
+
+    def __init__(self, text: Optional[str] = None, function_call: Optional[FakeFunctionCall] = None) -> None:
+        self.text = text
+        self.function_call = function_call
+
+
+class FakeCandidate:
+    """
+    Mimics a Gemini response candidate.
+    """
+
+    def __init__(self, parts: List[FakePart]) -> None:
+        self.content = self
+        self.parts = parts
+
+
+class FakeResponse:
+    """
+    Mimics a Gemini response (or a chunk of a streamed one).
+    """
+
+    def __init__(self, text: str, usage: Optional[FakeUsage] = None, parts: Optional[List[FakePart]] = None) -> None:
+        self.text = text
+        self.usage_metadata = usage
+        self.candidates = [FakeCandidate(parts if parts is not None else [FakePart(text)])]
+
+
+def action(name: str, query: str) -> dict:
+    """
+    Builds a scripted tool call.
+    """
+    return {"name": name, "reason": "Benchmark step", "input": query}
+
+
+# Each scenario is the sequence of model turns for one query; the query text picks the scenario
+SCENARIOS = [
+    [
+        {"thought": "Look the subject up on Wikipedia.", "action": action("wikipedia", "{subject}")},
+        {"thought": "The article answers the question.", "answer": "Answer for {subject}."}
+    ],
+    [
+        {"thought": "Search the web first.", "action": action("google", "{subject} facts")},
+        {"thought": "Confirm on Wikipedia.", "action": action("wikipedia", "{subject}")},
+        {"thought": "Both sources agree.", "answer": "Answer for {subject}."}
+    ],
+    [
+        {"thought": "Two independent lookups.", "actions": [action("google", "{subject} history"), action("wikipedia", "{subject}")]},
+        {"thought": "Enough information.", "answer": "Answer for {subject}."}
+    ],
+    [
+        {"thought": "No lookup needed.", "answer": "Answer for {subject}."}
+    ]
+]
+
+
+class FakeGemini:
+    """
+    A stand-in for `GenerativeModel` that answers from scripted scenarios. It is stateless: the
+    next turn is derived from the prompt (the query picks the scenario, the number of completed
+    turns in the history picks the step), so any number of concurrent runs can share one instance.
+    """
+
+    _model_name = "publishers/google/models/fake-gemini"
+
+    def __init__(self, profile: Optional[LatencyProfile] = None, chunks: int = 5) -> None:
+        """
+        Args:
+            profile (Optional[LatencyProfile]): Latency and failure behaviour of each call.
+            chunks (int): Number of chunks a streamed response is split into.
+        """
+        self.profile = profile or LatencyProfile()
+        self.chunks = chunks
+
+    def respond(self, prompt: str) -> str:
+        """
+        Returns the scripted turn for a prompt.
+
+        Args:
+            prompt (str): The full prompt text.
+
+        Returns:
+            str: The model turn as JSON.
+        """
+        match = QUERY_PATTERN.search(prompt)
+        subject = match.group(1).strip() if match else "the query"
+        scenario = SCENARIOS[sum(map(ord, subject)) % len(SCENARIOS)]
+        step = min(len(COMPLETED_TURN_PATTERN.findall(prompt)), len(scenario) - 1)
+        return json.dumps(scenario[step]).replace("{subject}", json.dumps(subject)[1:-1])
+
+    def respond_with_calls(self, prompt: str) -> FakeResponse:
+        """
+        Returns the scripted turn for a prompt sent with declared functions: tool choices become
+        function calls, and an answer is plain text.
+
+        Args:
+            prompt (str): The full prompt text.
+
+        Returns:
+            FakeResponse: The model turn.
+        """
+        turn = json.loads(self.respond(prompt))
+        if "answer" in turn:
+            return FakeResponse(turn["answer"], FakeUsage(prompt, turn["answer"]))
+        actions = turn.get("actions") or [turn["action"]]
+        parts = [FakePart(turn["thought"])] + [
+            FakePart(function_call=FakeFunctionCall(action["name"], {"query": action["input"]}))
+            for action in actions
+        ]
+        return FakeResponse(turn["thought"], FakeUsage(prompt, json.dumps(actions)), parts)
+
+    def generate_content(self, contents: Any, generation_config: Any = None, safety_settings: Any = None,
+                         tools: Any = None, stream: bool = False) -> Any:
+        prompt = contents if isinstance(contents, str) else str(contents)
+        latency = self.profile.sample()
+        if tools:
+            time.sleep(latency)
+            return self.respond_with_calls(prompt)
+        text = self.respond(prompt)
+        if stream:
+            return self._stream(prompt, text, latency)
+        time.sleep(latency)
+        return FakeResponse(text, FakeUsage(prompt, text))
+
+    def _stream(self, prompt: str, text: str, latency: float) -> Iterator[FakeResponse]:
+        # Time to first chunk is a share of the latency; the rest is spread over the chunks
+        time.sleep(latency * 0.4)
+        size = max(1, len(text) // self.chunks + 1)
+        pieces: List[str] = [text[i:i + size] for i in range(0, len(text), size)]
+        for index, piece in enumerate(pieces):
+            time.sleep(latency * 0.6 / len(pieces))
+            usage = FakeUsage(prompt, text) if index == len(pieces) - 1 else None
+            yield FakeResponse(piece, usage)
+
+    async def generate_content_async(self, contents: Any, generation_config: Any = None,
+                                     safety_settings: Any = None, tools: Any = None) -> FakeResponse:
+        prompt = contents if isinstance(contents, str) else str(contents)
+        latency = self.profile.sample()
+        await asyncio.sleep(latency)
+        if tools:
+            return self.respond_with_calls(prompt)
+        text = self.respond(prompt)
+        return FakeResponse(text, FakeUsage(prompt, text))
+
+
+class FakeSerp:
+    """
+    Returns canned SERP results in the same JSON shape as `src.tools.serp.search`.
+    """
+
+    def __init__(self, profile: Optional[LatencyProfile] = None, results: int = 10) -> None:
+        self.profile = profile or LatencyProfile()
+        self.results = results
+
+    def __call__(self, query: str) -> str:
+        try:
+            time.sleep(self.profile.sample())
+        except BackendError as e:
+            return json.dumps({"error": f"Search failed with status code 503: {e}"})
+        top_results = [
+            {
+                "position": position,
+                "title": f"{query} - result {position}",
+                "link": f"https://example.com/{position}",
+                "snippet": f"Snippet {position} about {query}. " * 3
+            }
+            for position in range(1, self.results + 1)
+        ]
+        return json.dumps({"top_results": top_results}, indent=2)
+
+
+class FakeWikipedia:
+    """
+    Returns canned pages in the same JSON shape as `src.tools.wiki.search`.
+    """
+
+    def __init__(self, profile: Optional[LatencyProfile] = None, summary_sentences: int = 20) -> None:
+        self.profile = profile or LatencyProfile()
+        self.summary_sentences = summary_sentences
+
+    def __call__(self, query: str) -> Optional[str]:
+        try:
+            time.sleep(self.profile.sample())
+        except BackendError:
+            return None
+        summary = " ".join(f"Sentence {i} of the article about {query}." for i in range(self.summary_sentences))
+        return json.dumps({"query": query, "title": query, "summary": summary}, ensure_ascii=False, indent=2)
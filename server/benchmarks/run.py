@@ -0,0 +1,305 @@
+"""
+Offline throughput benchmark for the agent service.
+
+Runs `Agent.execute` directly, or the `/api/agent` route through Flask's test client, against the
+fake Gemini, SERP and Wikipedia backends in `benchmarks.fakes`, and reports requests/sec, latency
+percentiles, iterations per query and memory per run. Run from the `server/` directory:
+
+    python -m benchmarks.run --mode agent --requests 200 --concurrency 16 --gemini-latency 0.05
+    python -m benchmarks.run --mode route --requests 200 --concurrency 8 --json
+    python -m benchmarks.run --mode agent --requests 200 --functions
+
+With `--replay`, the queries, Gemini responses and tool results of a log recorded from real runs
+(see `replay` in `config/config.yml`) are served back instead, and queries arrive at their
+recorded offsets:
+
+    python -m benchmarks.run --mode route --replay logs/replay.jsonl --time-scale 0
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from typing import Optional
+from typing import Tuple
+from typing import Dict
+from typing import List
+from typing import Any
+import tracemalloc
+import threading
+import argparse
+import resource
+import json
+import math
+import time
+import uuid
+
+from benchmarks.fakes import LatencyProfile
+from benchmarks.fakes import FakeWikipedia
+from benchmarks.fakes import FakeGemini
+from benchmarks.fakes import FakeSerp
+from src.react.function_agent import FunctionCallingAgent
+from src.react.factory import AgentFactory
+from src.utils.replay import ReplayLog
+from src.llm.gemini import GeminiClient
+from src.config.setup import config
+from src.utils.replay import REPLAY
+from src.utils.replay import RECORD
+from src.react.agent import Agent
+from src.react.agent import Name
+
+
+# (latency in seconds, iterations, succeeded)
+Sample = Tuple[float, int, bool]
+
+
+# (seconds after the start of the benchmark, query)
+Schedule = List[Tuple[float, str]]
+
+
+def build_factory(args: argparse.Namespace, latency: bool = True, replay: Optional[ReplayLog] = None) -> AgentFactory:
+    """
+    Builds an agent factory wired to the fake backends.
+
+    Args:
+        args (argparse.Namespace): The command line options.
+        latency (bool): Whether the fakes simulate latency and errors; disabled for the memory pass.
+        replay (Optional[ReplayLog]): A log the model client and tools record to or replay from.
+
+    Returns:
+        AgentFactory: The factory used by every benchmark run.
+    """
+    def profile(mean: float, offset: int) -> LatencyProfile:
+        if not latency:
+            return LatencyProfile()
+        return LatencyProfile(mean, mean * args.jitter, args.error_rate, seed=args.seed + offset)
+
+    client = GeminiClient(FakeGemini(profile(args.gemini_latency, 0)))
+    # The benchmark measures the service itself, so upstream rate limits do not apply
+    client.limiter = None
+    tools = {
+        Name.GOOGLE: FakeSerp(profile(args.tool_latency, 1)),
+        Name.WIKIPEDIA: FakeWikipedia(profile(args.tool_latency, 2))
+    }
+    factory = AgentFactory(client, tools, agent_class=FunctionCallingAgent if args.functions else Agent)
+    if replay is not None:
+        client.replay = replay
+        for tool in factory.tools.values():
+            tool.replay = replay
+    return factory
+
+
+def agent_runner(factory: AgentFactory) -> Callable[[str], Sample]:
+    """
+    Returns a function that runs one query on a fresh agent.
+    """
+    def run(query: str) -> Sample:
+        agent = factory.create()
+        started = time.perf_counter()
+        answer = agent.execute(query)
+        return time.perf_counter() - started, agent.current_iteration, answer.startswith("Final Answer:")
+    return run
+
+
+def route_runner(factory: AgentFactory) -> Callable[[str], Sample]:
+    """
+    Returns a function that posts one query to the `/api/agent` route of the Flask app.
+    """
+    import vertexai
+
+    # The app builds a GenerativeModel at import; a project is all it needs offline
+    vertexai.init(project=config.PROJECT_ID or "benchmark", location=config.REGION or "us-central1")
+    import app as service
+    service.agents = factory
+
+    # The test client handles a request on the calling thread, so the agent it created is kept per
+    # thread to read its iteration count once the response is back
+    created = threading.local()
+    create = factory.create
+
+    def tracked() -> Agent:
+        created.agent = create()
+        return created.agent
+    factory.create = tracked
+
+    def run(query: str) -> Sample:
+        created.agent = None
+        client = service.app.test_client()
+        started = time.perf_counter()
+        response = client.post('/api/agent', json={'query': query})
+        latency = time.perf_counter() - started
+        if response.status_code != 200:
+            return latency, 0, False
+        body = response.get_json()
+        iterations = created.agent.current_iteration if created.agent is not None else 0
+        return latency, iterations, body['final_answer'].startswith("Final Answer:")
+    return run
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Returns the q-th percentile of a list of values (nearest-rank method).
+    """
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def dispatch(run: Callable[[str], Sample], schedule: Schedule, concurrency: int) -> List[Sample]:
+    """
+    Runs queries on a pool of workers, submitting each one at its offset.
+
+    Args:
+        run (Callable[[str], Sample]): Executes one query.
+        schedule (Schedule): The queries and when to submit them; all offsets zero means as fast as possible.
+        concurrency (int): Number of queries in flight at most.
+
+    Returns:
+        List[Sample]: One sample per query, in schedule order.
+    """
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = []
+        for offset, query in schedule:
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(executor.submit(run, query))
+        return [future.result() for future in futures]
+
+
+def measure_memory(run: Callable[[str], Sample], queries: List[str]) -> Dict[str, float]:
+    """
+    Measures the peak Python memory allocated by single runs, one at a time.
+
+    Args:
+        run (Callable[[str], Sample]): Executes one query.
+        queries (List[str]): The queries to measure.
+
+    Returns:
+        Dict[str, float]: Mean and maximum peak allocation per run, in KiB.
+    """
+    peaks = []
+    tracemalloc.start()
+    try:
+        for query in queries:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            run(query)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append((peak - baseline) / 1024)
+    finally:
+        tracemalloc.stop()
+    return {"mean_kib": sum(peaks) / len(peaks), "max_kib": max(peaks)}
+
+
+def benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Runs the benchmark described by the command line options.
+
+    Returns:
+        Dict[str, Any]: The report.
+    """
+    run_id = uuid.uuid4().hex[:8]
+    make_runner = agent_runner if args.mode == "agent" else route_runner
+    if args.replay:
+        replay = ReplayLog(args.replay, REPLAY, args.time_scale)
+        schedule = list(replay.queries())
+        memory_queries = [query for _, query in schedule[:args.memory_runs]]
+    else:
+        replay = ReplayLog(args.record, RECORD) if args.record else None
+        schedule = [(0.0, f"Subject {i} ({run_id})") for i in range(args.requests)]
+        memory_queries = [f"Memory subject {i} ({run_id})" for i in range(args.memory_runs)]
+    factory = build_factory(args, replay=replay)
+    run = make_runner(factory)
+
+    # Warm up imports, templates and pools outside of the measured window; replayed runs have no
+    # spare recorded queries to warm up with
+    if not args.replay:
+        for i in range(min(args.warmup, args.requests)):
+            run(f"Warmup subject {i} ({run_id})")
+
+    started = time.perf_counter()
+    samples = dispatch(run, schedule, args.concurrency)
+    elapsed = time.perf_counter() - started
+
+    calls = factory.client.stats()
+    latencies = [latency for latency, _, _ in samples]
+    iterations = [count for _, count, ok in samples if ok]
+    report = {
+        "mode": args.mode,
+        "functions": args.functions,
+        "requests": len(samples),
+        "concurrency": args.concurrency,
+        "seconds": elapsed,
+        "requests_per_second": len(samples) / elapsed,
+        "latency_seconds": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies)
+        },
+        "succeeded": sum(1 for _, _, ok in samples if ok),
+        "iterations_per_query": {
+            "mean": sum(iterations) / len(iterations) if iterations else 0.0,
+            "max": max(iterations, default=0)
+        },
+        "prompt_tokens_per_call": calls["prompt_tokens"] / calls["calls"] if calls["calls"] else 0.0,
+        "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+    if replay is not None:
+        report["replay"] = replay.stats()
+        replay.close()
+    if memory_queries:
+        # Replayed memory runs are served instantly from a fresh copy of the log
+        memory_replay = ReplayLog(args.replay, REPLAY, 0) if args.replay else None
+        run = make_runner(build_factory(args, latency=False, replay=memory_replay))
+        report["memory_per_run"] = measure_memory(run, memory_queries)
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """
+    Prints a human readable summary of a report.
+    """
+    latency = report["latency_seconds"]
+    print(f"mode={report['mode']} functions={report['functions']} requests={report['requests']} concurrency={report['concurrency']}")
+    print(f"throughput: {report['requests_per_second']:.1f} req/s over {report['seconds']:.2f}s")
+    print(f"latency: p50={latency['p50'] * 1000:.1f}ms p95={latency['p95'] * 1000:.1f}ms "
+          f"p99={latency['p99'] * 1000:.1f}ms max={latency['max'] * 1000:.1f}ms")
+    print(f"succeeded: {report['succeeded']}/{report['requests']}, "
+          f"iterations per query: mean={report['iterations_per_query']['mean']:.2f} max={report['iterations_per_query']['max']}")
+    print(f"prompt tokens per model call: {report['prompt_tokens_per_call']:.0f}")
+    if "replay" in report:
+        replay = report["replay"]
+        print(f"replay log: {replay['recorded']} recorded, {replay['served']} served, {replay['misses']} misses")
+    if "memory_per_run" in report:
+        memory = report["memory_per_run"]
+        print(f"memory per run: mean={memory['mean_kib']:.0f}KiB max={memory['max_kib']:.0f}KiB")
+    print(f"max RSS: {report['max_rss_kib'] / 1024:.1f}MiB")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the agent service against local fake backends.")
+    parser.add_argument("--mode", choices=["agent", "route"], default="agent", help="Run Agent.execute directly or the /api/agent route")
+    parser.add_argument("--functions", action="store_true", help="Pick tools with native function calling instead of JSON output")
+    parser.add_argument("--requests", type=int, default=100, help="Number of queries to run")
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of queries in flight")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured queries run first")
+    parser.add_argument("--gemini-latency", type=float, default=0.05, help="Mean Gemini latency in seconds")
+    parser.add_argument("--tool-latency", type=float, default=0.02, help="Mean SERP/Wikipedia latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency standard deviation as a fraction of the mean")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability that an upstream call fails")
+    parser.add_argument("--memory-runs", type=int, default=20, help="Sequential runs measured with tracemalloc (0 to skip)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency and error sampling")
+    parser.add_argument("--record", help="Append the run's queries and upstream calls to this replay log")
+    parser.add_argument("--replay", help="Serve queries and upstream calls from this replay log instead of the fakes")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Multiplier for recorded durations and arrival offsets when replaying")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = benchmark(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
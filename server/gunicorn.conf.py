@@ -0,0 +1,87 @@
+"""
+Gunicorn configuration for serving the agent in production.
+
+    gunicorn --config gunicorn.conf.py app:app
+
+Every setting can be overridden through the environment, so the same image can be tuned per
+deployment without a rebuild.
+
+Concurrency model
+-----------------
+An agent run spends almost all of its time waiting on Gemini, SERP and Wikipedia, so the default
+is a few processes with many threads each (`gthread`). Each in-flight request, including an open
+`/api/agent/stream` connection, occupies one thread for the length of the run.
+
+The module-level `gemini` model in `app.py` is shared by all threads of a worker. That is safe:
+the model holds no per-request state, its gRPC channel is thread-safe and is opened lazily on the
+first call, and the shared `GeminiClient`, tool pools and caches guard their own state with locks.
+Nothing opens a socket at import time, and the SQLite caches and session store open their database
+on first use in each process (a connection found to belong to another pid is never reused), so
+`preload_app` can import the app (model and prompt template) once in the master before forking.
+
+Metrics
+-------
+A scrape of `/metrics` reaches a single worker, so prometheus_client runs in multiprocess mode:
+every worker writes its samples to files under `PROMETHEUS_MULTIPROC_DIR` and the scraped worker
+aggregates all of them. Files left by an earlier run are removed when the master starts, and the gauges of a worker
+that exits are dropped by `child_exit`.
+
+To serve the asyncio variant instead, run `asgi:app` with the uvicorn worker:
+
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn --config gunicorn.conf.py asgi:app
+"""
+import multiprocessing
+import os
+
+
+# Must be set before prometheus_client is imported by the app (including with preload_app)
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus-multiproc")
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+# Workers log to stderr only: several processes rotating the same logs/app.log would lose and
+# interleave records. Gunicorn and the container runtime collect stderr.
+os.environ.setdefault("LOG_TO_FILE", "false")
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+
+# Processes: one per core is enough for an I/O-bound service; threads provide the concurrency.
+workers = int(os.environ.get("GUNICORN_WORKERS", os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count())))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", "16"))
+
+# Agent runs are bounded by Agent.max_duration (120s); leave headroom before a worker is killed.
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "180"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "150"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "75"))
+
+# Recycle workers periodically to bound memory growth from long-lived caches.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    # Samples left by an earlier run would be summed into this one; the master's own files (created
+    # when preload_app imported the app) are kept
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    for name in os.listdir(path):
+        if name.endswith(".db") and not name.endswith(f"_{os.getpid()}.db"):
+            os.remove(os.path.join(path, name))
+
+
+def post_fork(server, worker):
+    from src.utils import metrics
+
+    metrics.collector.start()
+    server.log.info("Worker %s ready (%s, %s threads)", worker.pid, worker_class, threads)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
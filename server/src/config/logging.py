@@ -1,11 +1,37 @@
+from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueListener
+from logging.handlers import QueueHandler
+from typing import Dict
 import logging
+import atexit
+import queue
+import json
 import os
 
 
+# Every setting can be overridden with an environment variable, e.g. LOG_FORMAT=text for local development
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")
+# Several processes must not rotate the same file, so gunicorn.conf.py turns this off and workers log to stderr only
+LOG_TO_FILE = os.environ.get("LOG_TO_FILE", "true").lower() == "true"
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get("LOG_BACKUP_COUNT", 5))
+LOG_ROTATE_WHEN = os.environ.get("LOG_ROTATE_WHEN", "")  # e.g. "midnight" rotates by time instead of size
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+LOG_MAX_MESSAGE_CHARS = int(os.environ.get("LOG_MAX_MESSAGE_CHARS", 2000))
+LOG_LARGE_SAMPLE_EVERY = int(os.environ.get("LOG_LARGE_SAMPLE_EVERY", 10))
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] [%(module)s] [%(pathname)s]: %(message)s"
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and is emitted as a field
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
 def custom_path_filter(path):
     # Define the project root name
     project_root = "react-from-scratch"
-    
+
     # Find the index of the project root in the path
     idx = path.find(project_root)
     if idx != -1:
@@ -13,32 +39,163 @@ def custom_path_filter(path):
         path = path[idx+len(project_root):]
     return path
 
-class CustomLogRecord(logging.LogRecord):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.pathname = custom_path_filter(self.pathname)
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats a record as a single JSON object per line.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "path": record.pathname,
+            "line": record.lineno,
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                payload[key] = value
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class PayloadSampler:
+    """
+    Keeps large log messages from flooding the output. Messages longer than `max_chars` are
+    truncated, and only one in every `sample_every` of them is kept. Warnings and errors are
+    always kept in full.
+    """
+
+    def __init__(self, max_chars: int, sample_every: int) -> None:
+        self.max_chars = max_chars
+        self.sample_every = max(1, sample_every)
+        self.large = 0
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        message = record.getMessage()
+        if len(message) <= self.max_chars:
+            return True
+        self.large += 1
+        if (self.large - 1) % self.sample_every:
+            self.dropped += 1
+            return False
+        omitted = len(message) - self.max_chars
+        record.msg = f"{message[:self.max_chars]}... [truncated {omitted} chars; {self.dropped} large records sampled out so far]"
+        record.args = None
+        return True
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without formatting them and without ever blocking:
+    message arguments are only interpolated on the listener thread, and records are dropped
+    (and counted) when the queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingQueueListener(QueueListener):
+    """
+    Formats and writes records on a background thread, applying the payload sampler first.
+    """
+
+    def __init__(self, log_queue: queue.Queue, *handlers: logging.Handler, sampler: PayloadSampler) -> None:
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.sampler = sampler
+
+    def handle(self, record: logging.LogRecord) -> None:
+        if not self.sampler.filter(record):
+            return
+        record.pathname = custom_path_filter(record.pathname)
+        super().handle(record)
+
+
+def build_handlers(log_filepath=None):
+    handlers = [logging.StreamHandler()]
+    # Rotate by time when LOG_ROTATE_WHEN is set, otherwise by size
+    if log_filepath is not None and LOG_ROTATE_WHEN:
+        handlers.append(TimedRotatingFileHandler(log_filepath, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT))
+    elif log_filepath is not None:
+        handlers.append(RotatingFileHandler(log_filepath, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT))
+
+    formatter = JSONFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def start_listener():
+    # Runs at import and again in every forked child (e.g. gunicorn workers), whose copy of the
+    # parent's listener thread does not exist
+    global _listener
+    queue_handler.queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _listener = SamplingQueueListener(queue_handler.queue, *_handlers, sampler=_sampler)
+    _listener.start()
+
+
+def stop_listener():
+    # Drains the queue so records logged just before exit are written
+    if _listener is not None:
+        _listener.stop()
+
+
+def stats() -> Dict[str, int]:
+    # Records lost to a full queue or sampled out for size
+    return {
+        "dropped_queue_full": queue_handler.dropped,
+        "sampled_out": _sampler.dropped,
+        "queued": queue_handler.queue.qsize()
+    }
 
 
 def setup_logger(log_filename="app.log", log_dir="logs"):
-    # Ensure the logging directory exists
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-
-    # Define the log file path
-    log_filepath = os.path.join(log_dir, log_filename)
-
-    # Define the logging configuration
-    logging.setLogRecordFactory(CustomLogRecord)
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] [%(module)s] [%(pathname)s]: %(message)s",
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler(log_filepath)
-        ]
-    )
+    global queue_handler, _handlers, _sampler
+
+    log_filepath = None
+    if LOG_TO_FILE:
+        # Ensure the logging directory exists
+        if not os.path.exists(log_dir):
+            os.makedirs(log_dir)
+
+        # Define the log file path
+        log_filepath = os.path.join(log_dir, log_filename)
+
+    # Request threads only enqueue records; formatting, sampling and I/O happen on the listener thread
+    _handlers = build_handlers(log_filepath)
+    _sampler = PayloadSampler(LOG_MAX_MESSAGE_CHARS, LOG_LARGE_SAMPLE_EVERY)
+    queue_handler = LazyQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    start_listener()
+    atexit.register(stop_listener)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=start_listener)
+
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(queue_handler)
 
     # Return the configured logger
-    return logging.getLogger()
+    return root
+
 
-logger = setup_logger()
\ No newline at end of file
+_listener = None
+logger = setup_logger()
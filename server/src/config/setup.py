@@ -1,4 +1,5 @@
 from src.config.logging import logger
+from typing import Optional
 from typing import Dict
 from typing import Any 
 import yaml
@@ -26,7 +27,7 @@ class Config:
         self.__initialized = True
 
         config_path = config_path or self._find_config_path()
-        logger.info(f"Initializing Config with config path: {config_path}")
+        logger.info("Initializing Config with config path: %s", config_path)
         
         self.__config = self._load_config(config_path)
         if self.__config:
@@ -42,6 +43,21 @@ class Config:
         else:
             logger.error("Configuration could not be loaded. Please check the file path and format.")
 
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Returns a raw value from the configuration file.
+
+        Args:
+        - key (str): Top-level key in the YAML configuration.
+        - default (Any, optional): Value returned when the key is missing.
+
+        Returns:
+        - Any: The configured value, or the default.
+        """
+        if not self.__config:
+            return default
+        return self.__config.get(key, default)
+
     @staticmethod
     def _find_config_path() -> str:
         """
@@ -56,13 +72,13 @@ class Config:
         ]
         for path in possible_paths:
             if os.path.exists(path):
-                logger.info(f"Configuration file found at: {path}")
+                logger.info("Configuration file found at: %s", path)
                 return path
         logger.error("Configuration file not found in any default locations.")
         raise FileNotFoundError("Configuration file not found in expected locations.")
 
     @staticmethod
-    def _find_credentials_path() -> str:
+    def _find_credentials_path() -> Optional[str]:
         """
         Attempts to find the credentials file in multiple locations.
 
@@ -75,10 +91,9 @@ class Config:
         ]
         for path in possible_paths:
             if os.path.exists(path):
-                logger.info(f"Credentials file found at: {path}")
+                logger.info("Credentials file found at: %s", path)
                 return path
-        logger.error("Credentials file not found in any default locations.")
-        raise FileNotFoundError("Credentials file not found in expected locations.")
+        return None
 
     @staticmethod
     def _load_config(config_path: str) -> Dict[str, Any]:
@@ -96,9 +111,9 @@ class Config:
                 logger.info("Loading configuration file.")
                 return yaml.safe_load(file)
         except yaml.YAMLError as e:
-            logger.error(f"YAML parsing error in configuration file: {e}")
+            logger.error("YAML parsing error in configuration file: %s", e)
         except Exception as e:
-            logger.error(f"Unexpected error loading configuration file: {e}")
+            logger.error("Unexpected error loading configuration file: %s", e)
         return None
 
     @staticmethod
@@ -111,9 +126,9 @@ class Config:
         """
         if os.path.exists(credentials_path):
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = credentials_path
-            logger.info(f"Google application credentials set from {credentials_path}")
+            logger.info("Google application credentials set from %s", credentials_path)
         else:
-            logger.error(f"Credentials file not found at {credentials_path}. Google credentials not set.")
+            logger.error("Credentials file not found at %s. Google credentials not set.", credentials_path)
 
 
 config = Config()
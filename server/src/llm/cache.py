@@ -0,0 +1,176 @@
+from vertexai.generative_models import GenerationConfig
+from src.utils.cache import SQLiteCache
+from src.utils.cache import MemoryCache
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Optional
+from typing import Dict
+from typing import List
+from typing import Any
+import threading
+import hashlib
+import asyncio
+import json
+
+
+DEFAULT_TTL = 7 * 24 * 3600.0
+
+
+class ResponseCache:
+    """
+    A content-addressed cache of model completions with a memory tier in front of an optional disk tier.
+    """
+
+    def __init__(self, memory: MemoryCache, disk: Optional[SQLiteCache] = None, ttl: float = DEFAULT_TTL) -> None:
+        """
+        Initializes the response cache.
+
+        Args:
+            memory (MemoryCache): The in-process tier, consulted first.
+            disk (Optional[SQLiteCache]): The on-disk tier, consulted on a memory miss.
+            ttl (float): Time to live of cached completions in seconds.
+        """
+        self.memory = memory
+        self.disk = disk
+        self.ttl = ttl
+
+    @staticmethod
+    def key(model_name: str, prompt: str, generation_config: GenerationConfig, safety_settings: Dict[Any, Any]) -> str:
+        """
+        Hashes everything that determines a completion into a cache key.
+
+        Args:
+            model_name (str): The model resource name.
+            prompt (str): The prompt text.
+            generation_config (GenerationConfig): The generation settings.
+            safety_settings (Dict[Any, Any]): The safety settings.
+
+        Returns:
+            str: The hex SHA-256 digest identifying the completion.
+        """
+        settings = sorted((str(category), str(threshold)) for category, threshold in safety_settings.items())
+        material = json.dumps(
+            [model_name, generation_config.to_dict(), settings, prompt],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Looks up a completion, promoting disk hits into the memory tier.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[str]: The cached completion, or None on a miss.
+        """
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value, self.ttl)
+        return value
+
+    async def get_async(self, key: str) -> Optional[str]:
+        """
+        Looks up a completion like `get()`, reading the disk tier in a worker thread so a
+        SQLite lookup does not block the event loop.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[str]: The cached completion, or None on a miss.
+        """
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = await asyncio.to_thread(self.disk.get, key)
+            if value is not None:
+                self.memory.set(key, value, self.ttl)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Stores a completion in every tier.
+
+        Args:
+            key (str): The cache key.
+            value (str): The completion text.
+        """
+        self.memory.set(key, value, self.ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, self.ttl)
+
+    async def set_async(self, key: str, value: str) -> None:
+        """
+        Stores a completion like `set()`, writing the disk tier in a worker thread.
+
+        Args:
+            key (str): The cache key.
+            value (str): The completion text.
+        """
+        self.memory.set(key, value, self.ttl)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value, self.ttl)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns per-tier cache metrics.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Counters and sizes keyed by tier name.
+        """
+        tiers = {"memory": self.memory}
+        if self.disk is not None:
+            tiers["disk"] = self.disk
+        stats = {}
+        for name, tier in tiers.items():
+            stats[name] = tier.stats.snapshot()
+            stats[name]["bytes"] = tier.size
+        return stats
+
+
+def prompt_text(contents: List[Any]) -> str:
+    """
+    Extracts the text that identifies a request from its content parts.
+
+    Args:
+        contents (List[Any]): The content parts (or plain strings) sent to the model.
+
+    Returns:
+        str: The concatenated text of all parts.
+    """
+    return "\x00".join(part if isinstance(part, str) else getattr(part, "text", repr(part)) for part in contents)
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Returns the process-wide response cache configured under `cache.llm`, or None if caching is disabled.
+
+    Returns:
+        Optional[ResponseCache]: The shared response cache.
+    """
+    global _response_cache
+    settings = config.get('cache', {}).get('llm', {})
+    if not settings.get('enabled', False):
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                logger.info("Initializing LLM response cache")
+                disk = None
+                if settings.get('path'):
+                    disk = SQLiteCache(settings['path'], max_bytes=settings.get('disk_max_bytes', 512 * 1024 * 1024))
+                _response_cache = ResponseCache(
+                    MemoryCache(max_bytes=settings.get('memory_max_bytes', 64 * 1024 * 1024)),
+                    disk=disk,
+                    ttl=settings.get('ttl', DEFAULT_TTL)
+                )
+    return _response_cache
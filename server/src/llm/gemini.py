@@ -2,47 +2,490 @@ from vertexai.generative_models import HarmBlockThreshold
 from vertexai.generative_models import GenerationConfig
 from vertexai.generative_models import GenerativeModel
 from vertexai.generative_models import HarmCategory
+from vertexai.generative_models import Tool
 from vertexai.generative_models import Part
+from src.llm.cache import get_response_cache
+from src.utils.ratelimit import RateLimited
+from src.utils.ratelimit import get_limiter
+from src.utils.replay import RecordedFailure
+from src.utils.replay import get_replay
 from src.config.logging import logger
+from src.llm.cache import prompt_text
+from src.utils.replay import GEMINI
+from src.utils import metrics
+from src.utils import tracing
+from types import MappingProxyType
 from typing import Optional
+from typing import Iterator
+from typing import Tuple
+from typing import Union
 from typing import Dict
-from typing import List 
+from typing import List
+from typing import Any
+import threading
+import weakref
+import json
+import time
 
 
-def _create_generation_config() -> GenerationConfig:
+GENERATION_SETTINGS = MappingProxyType({
+    "temperature": 0.0,
+    "top_p": 1.0,
+    "candidate_count": 1,
+    "max_output_tokens": 8192,
+    "seed": 12345
+})
+
+SAFETY_SETTINGS = MappingProxyType({
+    HarmCategory.HARM_CATEGORY_UNSPECIFIED: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE
+})
+
+Contents = Union[str, List[Part]]
+
+
+class StreamInterrupted(Exception):
     """
-    Creates and returns a generation configuration.
+    Raised by `GeminiClient.stream()` when a streamed response fails or is blocked part way. The
+    chunks already yielded are not a complete response and must be discarded.
     """
-    try:
-        gen_config = GenerationConfig(
-            temperature=0.0,
-            top_p=1.0,
-            candidate_count=1,
-            max_output_tokens=8192,
-            seed=12345
-        )
-        return gen_config
-    except Exception as e:
-        logger.error(f"Error creating generation configuration: {e}")
-        raise
-
-
-def _create_safety_settings() -> Dict[HarmCategory, HarmBlockThreshold]:
+
+
+class GeminiClient:
     """
-    Creates safety settings for content generation.
+    Owns a Gemini model together with generation and safety settings that are built once,
+    and records latency and token usage for every call. Calls that reach the model are paced by
+    the process-wide `gemini` rate limiter, shared by every agent. With a replay log configured,
+    calls that miss the response cache are recorded to it or served from it instead of the model.
     """
-    try:
-        safety_settings = {
-            HarmCategory.HARM_CATEGORY_UNSPECIFIED: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE
+
+    def __init__(self, model: GenerativeModel) -> None:
+        """
+        Initializes the client.
+
+        Args:
+            model (GenerativeModel): The generative model instance.
+        """
+        self.model = model
+        self.model_name = getattr(model, "_model_name", type(model).__name__)
+        self.generation_config = GenerationConfig(**GENERATION_SETTINGS)
+        self.safety_settings = dict(SAFETY_SETTINGS)
+        self.cache = get_response_cache()
+        self.limiter = get_limiter("gemini")
+        self.replay = get_replay()
+        self._overrides: Dict[Tuple[Optional[int], Optional[Tuple[str, ...]]], GenerationConfig] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "errors": 0,
+            "cache_hits": 0,
+            "latency_seconds": 0.0,
+            "prompt_tokens": 0,
+            "response_tokens": 0
         }
-        return safety_settings
-    except Exception as e:
-        logger.error(f"Error creating safety settings: {e}")
-        raise
+
+    def config_for(self, max_output_tokens: Optional[int] = None,
+                   stop_sequences: Optional[List[str]] = None) -> GenerationConfig:
+        """
+        Returns the generation config for a set of per-call overrides, building each variant only once.
+
+        Args:
+            max_output_tokens (Optional[int]): Overrides the default output token limit.
+            stop_sequences (Optional[List[str]]): Sequences that end generation.
+
+        Returns:
+            GenerationConfig: The frozen default config, or a cached variant with the overrides applied.
+        """
+        if max_output_tokens is None and not stop_sequences:
+            return self.generation_config
+        key = (max_output_tokens, tuple(stop_sequences) if stop_sequences else None)
+        config = self._overrides.get(key)
+        if config is None:
+            settings = dict(GENERATION_SETTINGS)
+            if max_output_tokens is not None:
+                settings["max_output_tokens"] = max_output_tokens
+            if stop_sequences:
+                settings["stop_sequences"] = list(stop_sequences)
+            config = GenerationConfig(**settings)
+            with self._lock:
+                self._overrides[key] = config
+        return config
+
+    def _lookup(self, prompt: str, config: GenerationConfig) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Checks the response cache for a request.
+
+        Args:
+            prompt (str): The request text, as returned by `prompt_text()`.
+            config (GenerationConfig): The generation config of the request.
+
+        Returns:
+            Tuple[Optional[str], Optional[str]]: The cache key (None when caching is disabled) and the cached text, if any.
+        """
+        if self.cache is None:
+            return None, None
+        key = self.cache.key(self.model_name, prompt, config, self.safety_settings)
+        return key, self._served(self.cache.get(key))
+
+    async def _lookup_async(self, prompt: str, config: GenerationConfig) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Checks the response cache for a request like `_lookup()`, without blocking the event loop
+        on the disk tier.
+        """
+        if self.cache is None:
+            return None, None
+        key = self.cache.key(self.model_name, prompt, config, self.safety_settings)
+        return key, self._served(await self.cache.get_async(key))
+
+    def _served(self, cached: Optional[str]) -> Optional[str]:
+        """
+        Records a response served from the cache.
+        """
+        if cached is not None:
+            logger.info("Serving response from cache")
+            tracing.annotate(**{"gemini.cache_hit": True})
+            with self._lock:
+                self._stats["cache_hits"] += 1
+        return cached
+
+    def _record(self, response: Any, started: float, method: str, prompt: str, text: Optional[str]) -> None:
+        """
+        Records latency, sizes and token usage of a finished call.
+
+        Args:
+            response (Any): The model response (or the last chunk of a streamed response).
+            started (float): The call's start time.
+            method (str): The calling method, used as a metric label.
+            prompt (str): The request text.
+            text (Optional[str]): The full response text.
+        """
+        latency = time.perf_counter() - started
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+        response_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        metrics.GEMINI_SECONDS.labels(method).observe(latency)
+        metrics.GEMINI_PROMPT_CHARS.observe(len(prompt))
+        metrics.GEMINI_RESPONSE_CHARS.observe(len(text or ""))
+        metrics.GEMINI_TOKENS.labels("prompt").inc(prompt_tokens)
+        metrics.GEMINI_TOKENS.labels("response").inc(response_tokens)
+        tracing.annotate(**{"gemini.prompt_tokens": prompt_tokens, "gemini.response_tokens": response_tokens})
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["latency_seconds"] += latency
+            self._stats["prompt_tokens"] += prompt_tokens
+            self._stats["response_tokens"] += response_tokens
+        logger.info("Gemini call took %.3fs (%d prompt tokens, %d response tokens)", latency, prompt_tokens, response_tokens)
+
+    @staticmethod
+    def _request(contents: Contents, tools: Optional[List[Tool]] = None) -> str:
+        """
+        Renders a request as text for the response cache and the replay log. Declared functions
+        are part of the request, since they change what the model returns.
+
+        Args:
+            contents (Contents): The prompt text or a list of content parts.
+            tools (Optional[List[Tool]]): The functions declared to the model, if any.
+
+        Returns:
+            str: The request text.
+        """
+        prompt = prompt_text(contents)
+        if tools:
+            prompt += "\n\nFunctions: " + json.dumps([tool.to_dict() for tool in tools], sort_keys=True)
+        return prompt
+
+    @staticmethod
+    def _calls(response: Any) -> Optional[str]:
+        """
+        Extracts the text and the function calls of a response made with declared functions.
+        They are serialized as JSON, so they are cached and replayed like any other response text.
+
+        Returns:
+            Optional[str]: A JSON object with the response `text` and its `calls` (each a function
+            `name` and its `args`), or None if the response is empty.
+        """
+        parts = response.candidates[0].content.parts if response.candidates else []
+        texts = []
+        calls = []
+        for part in parts:
+            if part.function_call is not None:
+                calls.append({"name": part.function_call.name, "args": part.function_call.args or {}})
+            else:
+                texts.append(getattr(part, "text", None) or "")
+        if not calls and not any(texts):
+            logger.error("Empty response from the model")
+            return None
+        return json.dumps({"text": "".join(texts), "calls": calls}, ensure_ascii=False)
+
+    @staticmethod
+    def _text(response: Any) -> Optional[str]:
+        """
+        Extracts the text of a response.
+
+        Returns:
+            Optional[str]: The response text, or None if it is empty.
+        """
+        if not response.text:
+            logger.error("Empty response from the model")
+            return None
+        return response.text
+
+    @staticmethod
+    def _chunk_text(chunk: Any) -> str:
+        """
+        Extracts the text of a streamed chunk. A chunk without text is only accepted when it is the
+        empty end of a normally finished response.
+
+        Returns:
+            str: The chunk's text, possibly empty.
+
+        Raises:
+            ValueError: If the chunk was blocked or stopped for any other reason.
+        """
+        try:
+            return chunk.text or ""
+        except (ValueError, AttributeError, IndexError) as e:
+            candidates = getattr(chunk, "candidates", None)
+            reason = getattr(getattr(candidates[0], "finish_reason", None), "name", "") if candidates else ""
+            if reason == "STOP":
+                return ""
+            raise ValueError(f"Stream chunk has no text (finish reason: {reason or 'none'})") from e
+
+    def _failed(self, error: Exception, method: str) -> None:
+        """
+        Records a failed call.
+        """
+        logger.error("Error generating response: %s", error)
+        metrics.GEMINI_ERRORS.labels(method).inc()
+        with self._lock:
+            self._stats["errors"] += 1
+
+    def _recorded(self, prompt: str, text: Optional[str], started: float, error: Optional[Exception] = None) -> None:
+        """
+        Appends a call that reached the model to the replay log, when one is recording.
+        """
+        if self.replay is not None and not self.replay.replaying:
+            self.replay.record(GEMINI, GEMINI, prompt, text, time.perf_counter() - started,
+                               None if error is None else str(error))
+
+    def generate(self, contents: Contents, max_output_tokens: Optional[int] = None,
+                 stop_sequences: Optional[List[str]] = None, tools: Optional[List[Tool]] = None) -> Optional[str]:
+        """
+        Generates a response for a prompt.
+
+        Args:
+            contents (Contents): The prompt text or a list of content parts.
+            max_output_tokens (Optional[int]): Overrides the default output token limit.
+            stop_sequences (Optional[List[str]]): Sequences that end generation.
+            tools (Optional[List[Tool]]): Functions the model may call. With functions declared, the
+                response is returned as JSON holding its text and function calls (see `_calls()`).
+
+        Returns:
+            Optional[str]: The generated response text, or None if an error occurs.
+
+        Raises:
+            RateLimited: If the `gemini` rate limiter would make the call wait longer than its `max_wait`.
+        """
+        started = None
+        try:
+            config = self.config_for(max_output_tokens, stop_sequences)
+            prompt = self._request(contents, tools)
+            key, cached = self._lookup(prompt, config)
+            if cached is not None:
+                return cached
+
+            if self.replay is not None and self.replay.replaying:
+                text = self.replay.play(GEMINI, GEMINI, prompt)
+            else:
+                if self.limiter is not None:
+                    self.limiter.acquire()
+                logger.info("Generating response from Gemini")
+                started = time.perf_counter()
+                response = self.model.generate_content(
+                    contents,
+                    generation_config=config,
+                    safety_settings=self.safety_settings,
+                    tools=tools
+                )
+                text = self._calls(response) if tools else self._text(response)
+                self._record(response, started, "generate", prompt, text)
+                self._recorded(prompt, text, started)
+            if text is not None and key is not None:
+                self.cache.set(key, text)
+            return text
+        except RateLimited:
+            # Not a model error: the whole run has to back off, not just this iteration
+            raise
+        except Exception as e:
+            if started is not None:
+                self._recorded(prompt, None, started, e)
+            self._failed(e, "generate")
+            return None
+
+    async def generate_async(self, contents: Contents, max_output_tokens: Optional[int] = None,
+                             stop_sequences: Optional[List[str]] = None,
+                             tools: Optional[List[Tool]] = None) -> Optional[str]:
+        """
+        Asynchronously generates a response for a prompt.
+
+        Args:
+            contents (Contents): The prompt text or a list of content parts.
+            max_output_tokens (Optional[int]): Overrides the default output token limit.
+            stop_sequences (Optional[List[str]]): Sequences that end generation.
+            tools (Optional[List[Tool]]): Functions the model may call, as for `generate()`.
+
+        Returns:
+            Optional[str]: The generated response text, or None if an error occurs.
+
+        Raises:
+            RateLimited: If the `gemini` rate limiter would make the call wait longer than its `max_wait`.
+        """
+        started = None
+        try:
+            config = self.config_for(max_output_tokens, stop_sequences)
+            prompt = self._request(contents, tools)
+            key, cached = await self._lookup_async(prompt, config)
+            if cached is not None:
+                return cached
+
+            if self.replay is not None and self.replay.replaying:
+                text = await self.replay.play_async(GEMINI, GEMINI, prompt)
+            else:
+                if self.limiter is not None:
+                    await self.limiter.acquire_async()
+                logger.info("Generating response from Gemini (async)")
+                started = time.perf_counter()
+                response = await self.model.generate_content_async(
+                    contents,
+                    generation_config=config,
+                    safety_settings=self.safety_settings,
+                    tools=tools
+                )
+                text = self._calls(response) if tools else self._text(response)
+                self._record(response, started, "generate_async", prompt, text)
+                self._recorded(prompt, text, started)
+            if text is not None and key is not None:
+                await self.cache.set_async(key, text)
+            return text
+        except RateLimited:
+            # Not a model error: the whole run has to back off, not just this iteration
+            raise
+        except Exception as e:
+            if started is not None:
+                self._recorded(prompt, None, started, e)
+            self._failed(e, "generate_async")
+            return None
+
+    def stream(self, contents: Contents, max_output_tokens: Optional[int] = None,
+               stop_sequences: Optional[List[str]] = None) -> Iterator[str]:
+        """
+        Generates a response for a prompt, yielding text chunks as the model produces them.
+
+        A cached or replayed response is yielded as a single chunk. A call that fails before its
+        first chunk yields nothing; a failure or a blocked chunk after that raises `StreamInterrupted`,
+        so the partial text is never mistaken for a complete response.
+
+        Args:
+            contents (Contents): The prompt text or a list of content parts.
+            max_output_tokens (Optional[int]): Overrides the default output token limit.
+            stop_sequences (Optional[List[str]]): Sequences that end generation.
+
+        Yields:
+            str: Consecutive chunks of the response text.
+
+        Raises:
+            StreamInterrupted: If the response fails after some chunks were yielded.
+            RateLimited: If the `gemini` rate limiter would make the call wait longer than its `max_wait`.
+        """
+        chunks: List[str] = []
+        started = None
+        try:
+            config = self.config_for(max_output_tokens, stop_sequences)
+            prompt = prompt_text(contents)
+            key, cached = self._lookup(prompt, config)
+            if cached is not None:
+                yield cached
+                return
+
+            if self.replay is not None and self.replay.replaying:
+                # Recorded streams are served as a single chunk after their full duration
+                try:
+                    text = self.replay.play(GEMINI, GEMINI, prompt)
+                except RecordedFailure as e:
+                    # An interrupted stream is replayed up to where it broke off
+                    if e.response:
+                        chunks.append(e.response)
+                        yield e.response
+                    raise
+                if text:
+                    yield text
+            else:
+                if self.limiter is not None:
+                    self.limiter.acquire()
+                logger.info("Streaming response from Gemini")
+                started = time.perf_counter()
+                last = None
+                for last in self.model.generate_content(
+                    contents,
+                    generation_config=config,
+                    safety_settings=self.safety_settings,
+                    stream=True
+                ):
+                    text = self._chunk_text(last)
+                    if text:
+                        chunks.append(text)
+                        yield text
+                text = "".join(chunks)
+                if last is not None:
+                    self._record(last, started, "stream", prompt, text)
+                self._recorded(prompt, text or None, started)
+            if text and key is not None:
+                self.cache.set(key, text)
+        except RateLimited:
+            raise
+        except Exception as e:
+            if started is not None:
+                self._recorded(prompt, "".join(chunks) or None, started, e)
+            self._failed(e, "stream")
+            if chunks:
+                raise StreamInterrupted(str(e)) from e
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns call counts, cumulative latency and token usage.
+
+        Returns:
+            Dict[str, float]: Client metrics.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+
+_clients: "weakref.WeakKeyDictionary[GenerativeModel, GeminiClient]" = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def get_client(model: GenerativeModel) -> GeminiClient:
+    """
+    Returns the client wrapping a model, creating it on first use.
+
+    Args:
+        model (GenerativeModel): The generative model instance.
+
+    Returns:
+        GeminiClient: The client shared by every caller using this model.
+    """
+    client = _clients.get(model)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(model)
+            if client is None:
+                client = GeminiClient(model)
+                _clients[model] = client
+    return client
 
 
 def generate(model: GenerativeModel, contents: List[Part]) -> Optional[str]:
@@ -56,20 +499,18 @@ def generate(model: GenerativeModel, contents: List[Part]) -> Optional[str]:
     Returns:
         Optional[str]: The generated response text, or None if an error occurs.
     """
-    try:
-        logger.info("Generating response from Gemini")
-        response = model.generate_content(
-            contents,
-            generation_config=_create_generation_config(),
-            safety_settings=_create_safety_settings()
-        )
+    return get_client(model).generate(contents)
 
-        if not response.text:
-            logger.error("Empty response from the model")
-            return None
 
-        logger.info("Successfully generated response")
-        return response.text
-    except Exception as e:
-        logger.error(f"Error generating response: {e}")
-        return None
\ No newline at end of file
+async def generate_async(model: GenerativeModel, contents: List[Part]) -> Optional[str]:
+    """
+    Asynchronously generates a response using the provided model and contents.
+
+    Args:
+        model (GenerativeModel): The generative model instance.
+        contents (List[Part]): The list of content parts.
+
+    Returns:
+        Optional[str]: The generated response text, or None if an error occurs.
+    """
+    return await get_client(model).generate_async(contents)
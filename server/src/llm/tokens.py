@@ -0,0 +1,51 @@
+from src.config.logging import logger
+from src.config.setup import config
+from functools import lru_cache
+from typing import Callable
+import math
+import re
+
+
+# Words and individual punctuation marks; JSON-heavy text (tool outputs) is mostly the latter
+PIECES = re.compile(r"\w+|[^\w\s]")
+
+# SentencePiece vocabularies split long words into pieces of roughly this many characters
+CHARS_PER_WORD_PIECE = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens in a text without a tokenizer. Every punctuation mark counts
+    as one token and every word as one token per few characters, which errs on the high side
+    for Gemini's tokenizer so budgets computed with it are safe.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The estimated token count.
+    """
+    return sum(math.ceil(len(piece) / CHARS_PER_WORD_PIECE) for piece in PIECES.findall(text))
+
+
+@lru_cache(maxsize=1)
+def get_token_counter() -> Callable[[str], int]:
+    """
+    Returns the token counter configured under `history.tokenizer`.
+
+    `vertex` uses the SDK's local Gemini tokenizer (requires `sentencepiece` and a one-time
+    download of the vocabulary); anything else, or a tokenizer that cannot be loaded, falls
+    back to `estimate_tokens`.
+
+    Returns:
+        Callable[[str], int]: A function counting the tokens of a text.
+    """
+    if config.get('history', {}).get('tokenizer') == 'vertex':
+        try:
+            from vertexai.preview.tokenization import get_tokenizer_for_model
+            tokenizer = get_tokenizer_for_model(config.MODEL_NAME)
+            logger.info("Counting tokens with the local tokenizer for %s", config.MODEL_NAME)
+            return lambda text: tokenizer.count_tokens(text).total_tokens
+        except Exception as e:
+            logger.warning("Local tokenizer unavailable, estimating token counts instead: %s", e)
+    return estimate_tokens
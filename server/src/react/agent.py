@@ -1,30 +1,113 @@
 from vertexai.generative_models import GenerativeModel
 from src.tools.serp import search as google_search
 from src.tools.wiki import search as wiki_search
-from vertexai.generative_models import Part 
 from src.config.logging import logger
 from src.config.setup import config
-from src.llm.gemini import generate
+from src.react.observations import ObservationStore
+from src.react.prompt import get_history_budget
+from src.react.prompt import PromptBuilder
+from src.react.router import ROUTER_MAX_OUTPUT_TOKENS
+from src.react.router import RouteDecision
+from src.react.router import ROUTE_ANSWER
+from src.react.router import ROUTE_AGENT
+from src.react.router import ROUTE_TOOL
+from src.react.router import get_router
+from src.react.router import HEURISTIC
+from src.react.session import Exchange
+from src.react.session import Session
+from src.tools.cache import get_tool_cache
+from src.tools.cache import ToolCache
+from src.utils.replay import ReplayMiss
+from src.utils.replay import get_replay
+from src.llm.gemini import StreamInterrupted
+from src.llm.gemini import GeminiClient
+from src.llm.gemini import get_client
 from src.utils.io import read_file
+from src.utils.replay import TOOL
+from src.utils import metrics
+from src.utils import tracing
 from pydantic import BaseModel
 from typing import Callable
+from typing import Mapping
+from typing import Optional
+from typing import TypeVar
+from typing import Any
 from pydantic import Field 
 from typing import Union
+from typing import Tuple
 from typing import List 
 from typing import Dict 
 from enum import Enum
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures import ThreadPoolExecutor
+from src.react.stream_parser import IncrementalJSONScanner
+from src.react.output_parser import parse_json_output
+from concurrent.futures import Future
+from functools import lru_cache
 from enum import auto 
-import json
+import asyncio
+import time
 import os
 
 
 Observation = Union[str, Exception]
 
-PROMPT_TEMPLATE_PATHS = [
-    "./template/react.txt",
-    "./server/template/react.txt"
+T = TypeVar("T")
+
+PROMPT_TEMPLATE_DIRS = [
+    "./template",
+    "./server/template"
 ]
 
+REACT_TEMPLATE = "react.txt"
+
+# Tool calls a single step may run at once
+MAX_PARALLEL_ACTIONS = 4
+
+
+def tool_pool_size() -> int:
+    """
+    Returns the number of threads for model calls and concurrent and prefetched tool calls,
+    configured under `agent.tool_workers`. By default every request thread of the worker can run
+    a model call and a full step of parallel actions without queueing behind other requests.
+
+    Returns:
+        int: The pool size.
+    """
+    configured = config.get('agent', {}).get('tool_workers')
+    if configured:
+        return int(configured)
+    return int(os.environ.get("GUNICORN_THREADS", "16")) * (MAX_PARALLEL_ACTIONS + 1)
+
+
+# Shared pool for model and tool calls, which run here so a request can stop waiting for them when
+# its time budget runs out; threads are only started as calls need them
+TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=tool_pool_size(), thread_name_prefix="tool")
+
+@lru_cache(maxsize=4)
+def load_prompt_template(name: str = REACT_TEMPLATE) -> str:
+    """
+    Loads a prompt template from the first existing default location. Each file is read once per process.
+
+    Args:
+        name (str): The template's file name.
+
+    Returns:
+        str: The content of the prompt template file.
+
+    Raises:
+        FileNotFoundError: If the prompt template file cannot be found in any of the specified paths.
+    """
+    for directory in PROMPT_TEMPLATE_DIRS:
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            logger.info("Loading prompt template from: %s", path)
+            return read_file(path)
+
+    logger.error("Prompt template file not found in any default locations.")
+    raise FileNotFoundError("Prompt template file not found in expected locations.")
+
+
 class Name(Enum):
     """
     Enumeration for tool names available to the agent.
@@ -40,6 +123,15 @@ class Name(Enum):
         return self.name.lower()
 
 
+class State(Enum):
+    """
+    Enumeration for the states of the agent's reasoning loop.
+    """
+    THINK = auto()
+    ACT = auto()
+    DONE = auto()
+
+
 class Choice(BaseModel):
     """
     Represents a choice of tool with a reason for selection.
@@ -54,6 +146,17 @@ class Message(BaseModel):
     """
     role: str = Field(..., description="The role of the message sender.")
     content: str = Field(..., description="The content of the message.")
+    parsed: Optional[Dict[str, Any]] = Field(None, description="The structured model output of a thought, parsed once when it is recorded.")
+
+
+class StepTiming(BaseModel):
+    """
+    Records how long a single step of the reasoning loop took.
+    """
+    iteration: int = Field(..., description="The iteration the step belongs to.")
+    state: str = Field(..., description="The state the step executed.")
+    duration: float = Field(..., description="Wall-clock duration of the step in seconds.")
+    prompt_chars: Optional[int] = Field(None, description="Size of the prompt sent during the step, if any.")
 
 
 class Tool:
@@ -61,20 +164,26 @@ class Tool:
     A wrapper class for tools used by the agent, executing a function based on tool type.
     """
 
-    def __init__(self, name: Name, func: Callable[[str], str]):
+    __slots__ = ("name", "func", "cache", "replay")
+
+    def __init__(self, name: Name, func: Callable[[str], str], cache: Optional[ToolCache] = None):
         """
         Initializes a Tool with a name and an associated function.
         
         Args:
             name (Name): The name of the tool.
             func (Callable[[str], str]): The function associated with the tool.
+            cache (Optional[ToolCache]): Result cache consulted before calling the function.
         """
         self.name = name
         self.func = func
+        self.cache = cache
+        self.replay = get_replay()
 
     def use(self, query: str) -> Observation:
         """
-        Executes the tool's function with the provided query.
+        Executes the tool's function with the provided query, serving repeated queries from the cache.
+        With a replay log configured, calls that miss the cache are recorded to it or served from it instead.
 
         Args:
             query (str): The input query for the tool.
@@ -82,32 +191,178 @@ class Tool:
         Returns:
             Observation: Result of the tool's function or an error message if an exception occurs.
         """
-        try:
-            return self.func(query)
-        except Exception as e:
-            logger.error(f"Error executing tool {self.name}: {e}")
-            return str(e)
+        with tracing.tracer.start_as_current_span("tool.use", attributes={"tool.name": str(self.name)}):
+            return self.call(query)
+
+    def call(self, query: str) -> Observation:
+        """
+        Serves a query from the cache, or from the replay log, or calls the tool's function.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(str(self.name), query)
+            if cached is not None:
+                logger.info("Cache hit for tool %s: %s", self.name, query)
+                self.record_hit()
+                return cached
+        if self.replay is not None and self.replay.replaying:
+            try:
+                result = self.replay.play(TOOL, str(self.name), query)
+            except ReplayMiss as e:
+                logger.error("Error executing tool %s: %s", self.name, e)
+                return str(e)
+        else:
+            started = time.perf_counter()
+            try:
+                result = self.func(query)
+            except Exception as e:
+                logger.error("Error executing tool %s: %s", self.name, e)
+                self.record(started, e)
+                self.recorded(query, str(e), started)
+                return str(e)
+            self.record(started, result)
+            self.recorded(query, result, started)
+        if self.cache is not None:
+            self.cache.set(str(self.name), query, result)
+        return result
+
+    async def use_async(self, query: str) -> Observation:
+        """
+        Executes the tool's function without blocking the event loop.
+
+        Coroutine functions are awaited directly; blocking functions run in the default executor.
+
+        Args:
+            query (str): The input query for the tool.
+
+        Returns:
+            Observation: Result of the tool's function or an error message if an exception occurs.
+        """
+        with tracing.tracer.start_as_current_span("tool.use", attributes={"tool.name": str(self.name)}):
+            return await self.call_async(query)
+
+    async def call_async(self, query: str) -> Observation:
+        """
+        Serves a query from the cache, or from the replay log, or awaits the tool's function.
+        """
+        if self.cache is not None:
+            cached = await self.cache.get_async(str(self.name), query)
+            if cached is not None:
+                logger.info("Cache hit for tool %s: %s", self.name, query)
+                self.record_hit()
+                return cached
+        if self.replay is not None and self.replay.replaying:
+            try:
+                result = await self.replay.play_async(TOOL, str(self.name), query)
+            except ReplayMiss as e:
+                logger.error("Error executing tool %s: %s", self.name, e)
+                return str(e)
+        else:
+            started = time.perf_counter()
+            try:
+                if asyncio.iscoroutinefunction(self.func):
+                    result = await self.func(query)
+                else:
+                    result = await asyncio.to_thread(self.func, query)
+            except Exception as e:
+                logger.error("Error executing tool %s: %s", self.name, e)
+                self.record(started, e)
+                self.recorded(query, str(e), started)
+                return str(e)
+            self.record(started, result)
+            self.recorded(query, result, started)
+        if self.cache is not None:
+            await self.cache.set_async(str(self.name), query, result)
+        return result
+
+    def recorded(self, query: str, result: Observation, started: float) -> None:
+        """
+        Appends a call of the tool's function to the replay log, when one is recording.
+        """
+        if self.replay is not None and not self.replay.replaying:
+            self.replay.record(TOOL, str(self.name), query, result, time.perf_counter() - started)
+
+    def record_hit(self) -> None:
+        """
+        Records a call served from the tool cache.
+        """
+        metrics.TOOL_CALLS.labels(str(self.name), "cached").inc()
+        tracing.annotate(**{"tool.outcome": "cached"})
+
+    def record(self, started: float, result: Observation) -> None:
+        """
+        Records the latency and outcome of a call that reached the tool function.
+
+        Args:
+            started (float): The call's start time.
+            result (Observation): The value returned by the function, or the exception it raised.
+        """
+        tool = str(self.name)
+        outcome = metrics.tool_outcome(result)
+        metrics.TOOL_SECONDS.labels(tool).observe(time.perf_counter() - started)
+        metrics.TOOL_CALLS.labels(tool, outcome).inc()
+        tracing.annotate(**{"tool.outcome": outcome})
 
 
 class Agent:
     """
     Defines the agent responsible for executing queries and handling tool interactions.
+
+    The reasoning loop is an explicit state machine: each call to `step()` runs exactly one
+    THINK or ACT transition, and `run()` drives steps until the agent reaches DONE.
     """
 
-    def __init__(self, model: GenerativeModel) -> None:
+    __slots__ = (
+        "client", "model", "tools", "template", "messages", "query",
+        "max_iterations", "max_duration", "max_parallel_actions",
+        "current_iteration", "state", "pending_actions", "timings", "started_at",
+        "prompt", "observations", "listeners", "stream_tokens", "early_actions",
+        "prefetched", "last_prompt_chars", "record_timeline", "trace_id",
+        "history_budget", "session", "router", "routed"
+    )
+
+    # The prompt template used when none is passed in
+    template_name = REACT_TEMPLATE
+
+    def __init__(self, model: Union[GenerativeModel, GeminiClient], tools: Optional[Mapping[Name, Tool]] = None,
+                 template: Optional[str] = None) -> None:
         """
         Initializes the Agent with a generative model, tools dictionary, and a messages log.
 
+        An agent holds the state of a single run. Shared, immutable pieces (the tool registry and
+        the prompt template) can be passed in so that creating an agent per request costs almost nothing.
+
         Args:
-            model (GenerativeModel): The generative model used by the agent.
+            model (Union[GenerativeModel, GeminiClient]): The generative model, or a client wrapping it, used by the agent.
+            tools (Optional[Mapping[Name, Tool]]): A pre-built tool registry, shared without copying.
+            template (Optional[str]): The prompt template; loaded from disk (once per process) if omitted.
         """
-        self.model = model
-        self.tools: Dict[Name, Tool] = {}
+        self.client = model if isinstance(model, GeminiClient) else get_client(model)
+        self.model = self.client.model
+        self.tools: Mapping[Name, Tool] = tools if tools is not None else {}
+        self.template = template if template is not None else self.load_template()
         self.messages: List[Message] = []
         self.query = ""
         self.max_iterations = 10
+        self.max_duration = 120.0
+        self.max_parallel_actions = MAX_PARALLEL_ACTIONS
         self.current_iteration = 0
-        self.template = self.load_template()
+        self.state = State.THINK
+        self.pending_actions: List[Tuple[Name, str]] = []
+        self.timings: List[StepTiming] = []
+        self.started_at: Optional[float] = None
+        self.prompt: Optional[PromptBuilder] = None
+        self.observations = ObservationStore()
+        self.listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        self.stream_tokens = False
+        self.early_actions = True
+        self.prefetched: Dict[Tuple[Name, str], Future] = {}
+        self.last_prompt_chars: Optional[int] = None
+        self.record_timeline = False
+        self.trace_id: Optional[int] = None
+        self.history_budget = get_history_budget()
+        self.session: Optional[Session] = None
+        self.router = get_router()
+        self.routed: Optional[RouteDecision] = None
 
     def load_template(self) -> str:
         """
@@ -119,23 +374,18 @@ class Agent:
         Raises:
             FileNotFoundError: If the prompt template file cannot be found in any of the specified paths.
         """
-        for path in PROMPT_TEMPLATE_PATHS:
-            if os.path.exists(path):
-                logger.info(f"Loading prompt template from: {path}")
-                return read_file(path)
-        
-        logger.error("Prompt template file not found in any default locations.")
-        raise FileNotFoundError("Prompt template file not found in expected locations.")
+        return load_prompt_template(self.template_name)
 
     def register(self, name: Name, func: Callable[[str], str]) -> None:
         """
-        Registers a tool to the agent.
+        Registers a tool to the agent. The registry is copied on write, so a registry shared
+        between agents is never modified.
 
         Args:
             name (Name): The name of the tool.
             func (Callable[[str], str]): The function associated with the tool.
         """
-        self.tools[name] = Tool(name, func)
+        self.tools = {**self.tools, name: Tool(name, func, cache=get_tool_cache())}
 
     def trace(self, role: str, content: str) -> None:
         """
@@ -145,8 +395,45 @@ class Agent:
             role (str): The role of the message sender.
             content (str): The content of the message.
         """
-        if role != "system":
-            self.messages.append(Message(role=role, content=content))
+        self.add_message(Message(role=role, content=content))
+
+    def add_message(self, message: Message) -> None:
+        """
+        Appends a message to the log and to the incremental prompt history, and notifies listeners.
+
+        Args:
+            message (Message): The message to record.
+        """
+        self.messages.append(message)
+        if self.prompt is not None:
+            self.prompt.append(message.role, message.content)
+        self.emit("message", {"iteration": self.current_iteration, "message": message})
+
+    def subscribe(self, listener: Callable[[str, Dict[str, Any]], None]) -> None:
+        """
+        Registers a callback that receives run events as they happen.
+
+        Events are `message` (a new history entry), `token` (a chunk of model output, only when
+        the response is streamed) and `step` (the timing of a finished step).
+
+        Args:
+            listener (Callable[[str, Dict[str, Any]], None]): Called with the event name and its payload.
+        """
+        self.listeners.append(listener)
+
+    def emit(self, event: str, data: Dict[str, Any]) -> None:
+        """
+        Sends an event to every listener. Listener errors are logged and never interrupt the run.
+
+        Args:
+            event (str): The event name.
+            data (Dict[str, Any]): The event payload.
+        """
+        for listener in self.listeners:
+            try:
+                listener(event, data)
+            except Exception as e:
+                logger.error("Error in agent event listener: %s", e)
 
     def get_history(self) -> str:
         """
@@ -155,86 +442,376 @@ class Agent:
         Returns:
             str: Formatted history of messages.
         """
+        if self.prompt is not None:
+            return self.prompt.history
         return "\n".join([f"{message.role}: {message.content}" for message in self.messages])
 
-    def think(self) -> None:
+    def elapsed(self) -> float:
         """
-        Processes the current query, decides actions, and iterates until a solution or max iteration limit is reached.
+        Returns the wall-clock time spent on the current run.
+
+        Returns:
+            float: Seconds since `run()` started, or 0.0 if no run is in progress.
         """
-        self.current_iteration += 1
-        logger.info(f"Starting iteration {self.current_iteration}")
+        if self.started_at is None:
+            return 0.0
+        return time.perf_counter() - self.started_at
+
+    def remaining(self) -> float:
+        """
+        Returns the wall-clock time left in the run's budget.
+
+        Returns:
+            float: Seconds until `max_duration` is reached, never negative.
+        """
+        return max(0.0, self.max_duration - self.elapsed())
+
+    def budget_exhausted(self) -> Optional[str]:
+        """
+        Checks whether the iteration cap or the wall-clock budget has been used up.
 
+        Returns:
+            Optional[str]: The budget that ran out ("iterations" or "time"), or None if the agent may continue.
+        """
         if self.current_iteration > self.max_iterations:
             logger.warning("Reached maximum iterations. Stopping.")
-            self.trace("assistant", "I'm sorry, but I couldn't find a satisfactory answer within the allowed number of iterations. Here's what I know so far: " + self.get_history())
-            return
+            return "iterations"
+        if self.remaining() <= 0:
+            logger.warning("Exceeded time budget of %ss. Stopping.", self.max_duration)
+            return "time"
+        return None
+
+    def wait(self, future: "Future[T]") -> Optional[T]:
+        """
+        Waits for a call running on the shared pool, but no longer than the time left in the budget.
+        The call itself cannot be interrupted: if the budget runs out first it finishes in the
+        background and its result is discarded.
+
+        Args:
+            future (Future[T]): The running call.
 
-        prompt = self.template.format(
-            query=self.query, 
-            history=self.get_history(),
-            tools=', '.join([str(tool.name) for tool in self.tools.values()])
+        Returns:
+            Optional[T]: The call's result, or None if the budget ran out first.
+        """
+        try:
+            return future.result(timeout=self.remaining())
+        except FutureTimeout:
+            future.cancel()
+            logger.warning("Call abandoned: the time budget of %ss ran out", self.max_duration)
+            return None
+
+    def bounded(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> Optional[T]:
+        """
+        Runs a blocking model or tool call on the shared pool so the run can give up on it when the
+        time budget runs out. See `wait()`.
+
+        Args:
+            func (Callable[..., T]): The call to make.
+            *args (Any): Positional arguments for the call.
+            **kwargs (Any): Keyword arguments for the call.
+
+        Returns:
+            Optional[T]: The call's result, or None if the budget ran out first.
+        """
+        return self.wait(TOOL_EXECUTOR.submit(tracing.in_context(func), *args, **kwargs))
+
+    def begin_step(self) -> float:
+        """
+        Marks the start of a step, starting the run clock on the first one.
+
+        Returns:
+            float: The step's start time.
+        """
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+        self.last_prompt_chars = None
+        return time.perf_counter()
+
+    def begin_iteration(self) -> bool:
+        """
+        Advances the iteration counter and stops the run if the budget is used up.
+
+        Returns:
+            bool: True if the agent may think in this iteration.
+        """
+        self.current_iteration += 1
+        logger.info("Starting iteration %d", self.current_iteration)
+        exhausted = self.budget_exhausted()
+        if exhausted is not None:
+            limit = "the allowed number of iterations" if exhausted == "iterations" else f"the time budget of {self.max_duration:g}s"
+            self.trace("assistant", f"I'm sorry, but I couldn't find a satisfactory answer within {limit}. Here's what I know so far: " + self.get_history())
+            self.state = State.DONE
+            return False
+        return True
+
+    def take_pending_actions(self) -> List[Tuple[Name, str]]:
+        """
+        Pops the actions chosen by the last `decide()` call.
+
+        Returns:
+            List[Tuple[Name, str]]: The tools to use and their inputs, in the order the model listed them.
+        """
+        actions = self.pending_actions
+        self.pending_actions = []
+        return actions
+
+    def end_step(self, executed: State, start: float) -> None:
+        """
+        Records the timing of a finished step.
+
+        Args:
+            executed (State): The state the step executed.
+            start (float): The step's start time, as returned by `begin_step()`.
+        """
+        duration = time.perf_counter() - start
+        timing = StepTiming(
+            iteration=self.current_iteration,
+            state=executed.name.lower(),
+            duration=duration,
+            prompt_chars=self.last_prompt_chars
         )
+        self.timings.append(timing)
+        metrics.STEP_SECONDS.labels(timing.state).observe(duration)
+        self.emit("step", timing.model_dump())
+        logger.info("Step %s (iteration %d) took %.3fs", timing.state, self.current_iteration, duration)
 
-        response = self.ask_gemini(prompt)
-        logger.info(f"Thinking => {response}")
-        self.trace("assistant", f"Thought: {response}")
-        self.decide(response)
+    def step(self) -> State:
+        """
+        Executes a single transition of the reasoning loop and records its timing.
 
-    def decide(self, response: str) -> None:
+        Returns:
+            State: The state the agent is in after the step.
+        """
+        executed = self.state
+        start = self.begin_step()
+        if self.state == State.THINK:
+            if self.begin_iteration():
+                thought = self.think()
+                self.state = self.decide(thought)
+        elif self.state == State.ACT:
+            self.act(self.take_pending_actions())
+            self.state = State.THINK
+        self.end_step(executed, start)
+        return self.state
+
+    def run(self) -> None:
+        """
+        Drives the reasoning loop until a final answer is reached or the budget is exhausted.
+        """
+        while self.state != State.DONE:
+            self.step()
+
+    def think(self) -> Message:
+        """
+        Builds the prompt for the current iteration and asks the model for the next step.
+
+        Returns:
+            Message: The recorded thought, with the model's response parsed.
+        """
+        with tracing.tracer.start_as_current_span("agent.think", attributes={"agent.iteration": self.current_iteration}):
+            self.prefetched = {}
+            response = self.ask_gemini(self.build_prompt())
+            return self.record_thought(response)
+
+    def build_prompt(self) -> str:
+        """
+        Renders the prompt for the current iteration.
+
+        Returns:
+            str: The prompt text.
+        """
+        prompt = self.prompt.render()
+        self.last_prompt_chars = len(prompt)
+        return prompt
+
+    def record_thought(self, response: str) -> Message:
+        """
+        Logs the model's response, parses it and adds it to the history. The parsed output is kept
+        on the message, so deciding on it and building the trace do not parse it again.
+
+        Args:
+            response (str): The model's response.
+
+        Returns:
+            Message: The recorded thought.
+        """
+        logger.info("Thinking => %s", response)
+        message = Message(role="assistant", content=f"Thought: {response}", parsed=parse_json_output(response))
+        self.add_message(message)
+        return message
+
+    def decide(self, thought: Message) -> State:
         """
         Processes the agent's response, deciding actions or final answers.
 
         Args:
-            response (str): The response generated by the model.
+            thought (Message): The recorded thought holding the model's parsed response.
+
+        Returns:
+            State: The next state of the reasoning loop.
+        """
+        with tracing.tracer.start_as_current_span("agent.decide", attributes={"agent.iteration": self.current_iteration}) as span:
+            state = self.interpret(thought)
+            span.set_attribute("agent.next_state", state.name.lower())
+            return state
+
+    def interpret(self, thought: Message) -> State:
+        """
+        Records the actions or the final answer chosen in a thought.
+
+        Args:
+            thought (Message): The recorded thought holding the model's parsed response.
+
+        Returns:
+            State: The next state of the reasoning loop.
         """
+        parsed_response = thought.parsed
+        if parsed_response is None:
+            logger.error("Failed to parse response: %s", thought.content)
+            self.trace("assistant", "I encountered an error in processing. Let me try again.")
+            return State.THINK
         try:
-            cleaned_response = response.strip().strip('`').strip()
-            if cleaned_response.startswith('json'):
-                cleaned_response = cleaned_response[4:].strip()
-            
-            parsed_response = json.loads(cleaned_response)
-            
-            if "action" in parsed_response:
-                action = parsed_response["action"]
-                tool_name = Name[action["name"].upper()]
-                if tool_name == Name.NONE:
+            if "action" in parsed_response or "actions" in parsed_response:
+                actions = parsed_response["actions"] if "actions" in parsed_response else parsed_response["action"]
+                if not actions:
+                    # An empty list is a malformed step, not a decision that no tool is needed
+                    logger.warning("Response has an empty action list: %s", thought.content)
+                    self.trace("system", "Error: The response listed no actions. Give at least one action, or an answer.")
+                    return State.THINK
+                chosen = self.parse_actions(actions)
+                if not chosen:
                     logger.info("No action needed. Proceeding to final answer.")
-                    self.think()
-                else:
+                    return State.THINK
+                for tool_name, _ in chosen:
                     self.trace("assistant", f"Action: Using {tool_name} tool")
-                    self.act(tool_name, action.get("input", self.query))
+                self.pending_actions = chosen
+                return State.ACT
             elif "answer" in parsed_response:
                 self.trace("assistant", f"Final Answer: {parsed_response['answer']}")
+                return State.DONE
             else:
                 raise ValueError("Invalid response format")
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse response: {response}. Error: {str(e)}")
-            self.trace("assistant", "I encountered an error in processing. Let me try again.")
-            self.think()
         except Exception as e:
-            logger.error(f"Error processing response: {str(e)}")
+            logger.error("Error processing response: %s", e)
             self.trace("assistant", "I encountered an unexpected error. Let me try a different approach.")
-            self.think()
+            return State.THINK
 
-    def act(self, tool_name: Name, query: str) -> None:
+    def parse_actions(self, actions: Union[Dict[str, Any], List[Dict[str, Any]]]) -> List[Tuple[Name, str]]:
         """
-        Executes the specified tool's function on the query and logs the result.
+        Converts the `action` object or `actions` list of a response into tool calls.
 
         Args:
-            tool_name (Name): The tool to be used.
-            query (str): The query for the tool.
-        """
-        tool = self.tools.get(tool_name)
-        if tool:
-            result = tool.use(query)
-            observation = f"Observation from {tool_name}: {result}"
-            self.trace("system", observation)
-            self.messages.append(Message(role="system", content=observation))  # Add observation to message history
-            self.think()
-        else:
-            logger.error(f"No tool registered for choice: {tool_name}")
-            self.trace("system", f"Error: Tool {tool_name} not found")
-            self.think()
+            actions (Union[Dict[str, Any], List[Dict[str, Any]]]): The parsed action value(s).
+
+        Returns:
+            List[Tuple[Name, str]]: The tools to use and their inputs, capped at `max_parallel_actions`
+            and without `none` actions.
+
+        Raises:
+            KeyError: If an action names an unknown tool or has no name.
+        """
+        if isinstance(actions, dict):
+            actions = [actions]
+        if len(actions) > self.max_parallel_actions:
+            logger.warning("Dropping %d actions beyond the per-step limit", len(actions) - self.max_parallel_actions)
+        chosen = [
+            (Name[action["name"].upper()], action.get("input", self.query))
+            for action in actions[:self.max_parallel_actions]
+        ]
+        return [(tool_name, tool_input) for tool_name, tool_input in chosen if tool_name != Name.NONE]
+
+    def prefetch(self, actions: Any) -> None:
+        """
+        Starts the tool calls of a streamed response as soon as its action object is complete,
+        while the rest of the response is still being generated. `act()` picks up the results.
+
+        Args:
+            actions (Any): The action value extracted by the stream scanner.
+        """
+        try:
+            chosen = self.parse_actions(actions)
+        except Exception as e:
+            logger.info("Not prefetching unparseable action: %s", e)
+            return
+        for tool_name, query in chosen:
+            tool = self.tools.get(tool_name)
+            if tool and (tool_name, query) not in self.prefetched:
+                logger.info("Prefetching %s for: %s", tool_name, query)
+                self.prefetched[(tool_name, query)] = TOOL_EXECUTOR.submit(tracing.in_context(tool.use), query)
+
+    def act(self, actions: List[Tuple[Name, str]]) -> None:
+        """
+        Executes the requested tools and logs their results.
+
+        When the model asks for several tools in one step they run concurrently on the shared
+        tool pool; observations are recorded in the order the actions were requested. Calls already
+        started by `prefetch()` during streaming are reused instead of being issued again. A call
+        still running when the time budget runs out is recorded as an error.
+
+        Args:
+            actions (List[Tuple[Name, str]]): The tools to use and their inputs.
+        """
+        with tracing.tracer.start_as_current_span("agent.act", attributes=self.action_attributes(actions)):
+            prefetched, self.prefetched = self.prefetched, {}
+            futures = []
+            for tool_name, query in actions:
+                tool = self.tools.get(tool_name)
+                future = prefetched.get((tool_name, query))
+                if future is None and tool:
+                    future = TOOL_EXECUTOR.submit(tracing.in_context(tool.use), query)
+                futures.append(future)
+            results = [self.wait(future) if future else None for future in futures]
+
+            for (tool_name, query), result in zip(actions, results):
+                if tool_name not in self.tools:
+                    self.tool_missing(tool_name)
+                elif result is None:
+                    self.tool_timed_out(tool_name)
+                else:
+                    self.observe(tool_name, query, result)
+
+    def action_attributes(self, actions: List[Tuple[Name, str]]) -> Dict[str, Any]:
+        """
+        Returns the span attributes describing a tool step.
+
+        Args:
+            actions (List[Tuple[Name, str]]): The tools to use and their inputs.
+
+        Returns:
+            Dict[str, Any]: Iteration number and the requested tool names.
+        """
+        return {"agent.iteration": self.current_iteration, "agent.tools": [str(tool_name) for tool_name, _ in actions]}
+
+    def observe(self, tool_name: Name, query: str, result: Observation) -> None:
+        """
+        Stores a tool result and adds its compact form to the history.
+
+        Args:
+            tool_name (Name): The tool that produced the result.
+            query (str): The query passed to the tool.
+            result (Observation): The tool's output.
+        """
+        record = self.observations.add(str(tool_name), query, str(result))
+        self.trace("system", f"Observation [{record.ref}] from {tool_name}: {self.observations.summarize(record)}")
+
+    def tool_missing(self, tool_name: Name) -> None:
+        """
+        Records that the model asked for a tool that is not registered.
+
+        Args:
+            tool_name (Name): The requested tool.
+        """
+        logger.error("No tool registered for choice: %s", tool_name)
+        self.trace("system", f"Error: Tool {tool_name} not found")
+
+    def tool_timed_out(self, tool_name: Name) -> None:
+        """
+        Records that a tool did not answer before the time budget ran out.
+
+        Args:
+            tool_name (Name): The tool that was called.
+        """
+        self.trace("system", f"Error: Tool {tool_name} did not answer within the time budget")
 
     def execute(self, query: str) -> str:
         """
@@ -246,14 +823,142 @@ class Agent:
         Returns:
             str: The final answer or last recorded message content.
         """
+        with tracing.tracer.start_as_current_span("agent.execute"):
+            self.start(query)
+            self.route()
+            self.run()
+            return self.finish()
+
+    def start(self, query: str) -> None:
+        """
+        Prepares the run state for a new query.
+
+        Args:
+            query (str): The query to be processed.
+        """
         self.query = query
+        self.prompt = PromptBuilder(
+            self.template,
+            query=query,
+            tools=', '.join([str(tool.name) for tool in self.tools.values()]),
+            budget=self.history_budget
+        )
+        self.state = State.THINK
+        # The time budget covers routing as well as the reasoning loop
+        self.started_at = time.perf_counter()
+        self.trace_id = tracing.current_trace_id()
+        if self.client.replay is not None:
+            self.client.replay.record_query(query)
+        if self.record_timeline and self.trace_id is not None:
+            tracing.recorder.watch(self.trace_id)
+        if self.session is not None:
+            self.resume(self.session)
         self.trace(role="user", content=query)
-        self.think()
+
+    def route(self) -> None:
+        """
+        Lets the router look at the query before the reasoning loop starts. Small talk and
+        arithmetic are answered directly; a query that clearly needs one lookup starts with that
+        tool call instead of a model call. Anything else runs the full loop.
+        """
+        if self.router is None:
+            return
+        with tracing.tracer.start_as_current_span("agent.route") as span:
+            tools = [str(name) for name in self.tools]
+            follow_up = self.session is not None and bool(self.session.exchanges)
+            decision = self.router.classify(self.query, tools, follow_up)
+            if decision is None and self.router.use_model and not follow_up:
+                response = self.bounded(self.client.generate, self.router.prompt(self.query, tools), max_output_tokens=ROUTER_MAX_OUTPUT_TOKENS)
+                decision = self.router.parse(response, tools)
+            self.apply_route(decision, span)
+
+    def apply_route(self, decision: Optional[RouteDecision], span: Any) -> None:
+        """
+        Records a routing decision and sets up the run accordingly.
+
+        Args:
+            decision (Optional[RouteDecision]): The router's decision; None runs the full loop.
+            span (Any): The routing span, annotated with the decision.
+        """
+        decision = decision or RouteDecision(route=ROUTE_AGENT, source=HEURISTIC, reason="no match")
+        self.routed = decision
+        self.router.record(decision)
+        metrics.ROUTER_DECISIONS.labels(decision.route, decision.source).inc()
+        span.set_attributes({"router.route": decision.route, "router.source": decision.source, "router.reason": decision.reason})
+        logger.info("Routing query via %s (%s: %s)", decision.route, decision.source, decision.reason)
+        if decision.route == ROUTE_ANSWER:
+            self.trace("assistant", f"Final Answer: {decision.answer}")
+            self.state = State.DONE
+        elif decision.route == ROUTE_TOOL:
+            tool_name = Name[decision.tool.upper()]
+            self.trace("assistant", f"Action: Using {tool_name} tool")
+            self.pending_actions = [(tool_name, decision.input)]
+            self.state = State.ACT
+
+    def resume(self, session: Session) -> None:
+        """
+        Seeds the prompt history and the observation store with the earlier exchanges of a
+        conversation, so a follow-up can build on what was already fetched.
+
+        Args:
+            session (Session): The conversation this run continues.
+        """
+        for record in session.observations():
+            self.observations.restore(record)
+        self.prompt.seed(session.history())
+        if session.exchanges:
+            logger.info("Resuming session %s after %d exchanges", session.session_id, len(session.exchanges))
+
+    def exchange(self) -> Exchange:
+        """
+        Reduces the finished run to what a follow-up needs: the query, the observations and the
+        final answer, without the intermediate thoughts.
+
+        Returns:
+            Exchange: The run's entry for the session.
+        """
+        history = [
+            (message.role, message.content) for message in self.messages
+            if message.role == "user" or message.content.startswith(("Observation [", "Final Answer:"))
+        ]
+        known = {record.ref for record in self.session.observations()} if self.session is not None else set()
+        observations = [record for record in self.observations.all() if record.ref not in known]
+        return Exchange(query=self.query, history=history, observations=observations)
+
+    def finish(self) -> str:
+        """
+        Logs the run summary, adds the run to the session being continued (if any) and returns
+        the final message.
+
+        Returns:
+            str: The final answer or last recorded message content.
+        """
+        elapsed = self.elapsed()
+        metrics.RUN_SECONDS.observe(elapsed)
+        metrics.RUN_ITERATIONS.observe(self.current_iteration)
+        tracing.annotate(**{"agent.iterations": self.current_iteration, "agent.duration": elapsed})
+        logger.info("Run finished after %d iterations in %.3fs", self.current_iteration, elapsed)
+        if self.session is not None:
+            self.session.exchanges.append(self.exchange())
         return self.messages[-1].content
 
+    def timeline(self) -> List[Dict[str, Any]]:
+        """
+        Returns where the time of a finished run went, if `record_timeline` was set before it started.
+
+        Returns:
+            List[Dict[str, Any]]: The run's spans as a waterfall, or an empty list.
+        """
+        if not self.record_timeline or self.trace_id is None:
+            return []
+        return tracing.waterfall(tracing.recorder.collect(self.trace_id))
+
     def ask_gemini(self, prompt: str) -> str:
         """
-        Queries the generative model with a prompt.
+        Queries the generative model with a prompt. When `stream_tokens` or `early_actions` is set,
+        the response is streamed: each chunk is emitted as a `token` event and, with `early_actions`,
+        the tool calls start as soon as the action object is complete. The call is abandoned when
+        the time budget runs out.
 
         Args:
             prompt (str): The prompt text for the model.
@@ -261,9 +966,56 @@ class Agent:
         Returns:
             str: The model's response as a string.
         """
-        contents = [Part.from_text(prompt)]
-        response = generate(self.model, contents)
-        return str(response) if response is not None else "No response from Gemini"
+        with tracing.tracer.start_as_current_span("agent.ask_gemini", attributes=self.prompt_attributes(prompt)):
+            if self.stream_tokens or self.early_actions:
+                response = self.bounded(self.read_stream, prompt)
+            else:
+                response = self.bounded(self.client.generate, prompt)
+            return str(response) if response is not None else "No response from Gemini"
+
+    def read_stream(self, prompt: str) -> Optional[str]:
+        """
+        Streams a response, emitting its chunks and prefetching its tool calls.
+
+        Args:
+            prompt (str): The prompt text for the model.
+
+        Returns:
+            Optional[str]: The full response, or None if the stream failed or the time budget ran out.
+        """
+        scanner = IncrementalJSONScanner()
+        chunks = []
+        try:
+            for chunk in self.client.stream(prompt):
+                if self.remaining() <= 0:
+                    # The run has already given up on this call
+                    return None
+                chunks.append(chunk)
+                self.emit("token", {"iteration": self.current_iteration, "text": chunk})
+                if self.early_actions and scanner.actions is None:
+                    actions = scanner.feed(chunk)
+                    if actions is not None:
+                        self.prefetch(actions)
+        except StreamInterrupted:
+            # A partial response is discarded so the iteration is retried
+            return None
+        return "".join(chunks) or None
+
+    def prompt_attributes(self, prompt: str) -> Dict[str, Any]:
+        """
+        Returns the span attributes describing a model call.
+
+        Args:
+            prompt (str): The prompt text.
+
+        Returns:
+            Dict[str, Any]: Iteration number and prompt size in characters and estimated tokens.
+        """
+        return {
+            "agent.iteration": self.current_iteration,
+            "gemini.prompt_chars": len(prompt),
+            "gemini.prompt_tokens_estimate": self.prompt.tokens
+        }
 
 def run(query: str) -> str:
     """
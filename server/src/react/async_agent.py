@@ -0,0 +1,180 @@
+from vertexai.generative_models import GenerativeModel
+from src.tools.serp import search_async as google_search
+from src.tools.wiki import search_async as wiki_search
+from src.react.router import ROUTER_MAX_OUTPUT_TOKENS
+from src.config.logging import logger
+from src.config.setup import config
+from src.utils import tracing
+from src.react.agent import Message
+from src.react.agent import Agent
+from src.react.agent import State
+from src.react.agent import Name
+from typing import Awaitable
+from typing import Optional
+from typing import TypeVar
+from typing import Tuple
+from typing import List
+import asyncio
+
+
+T = TypeVar("T")
+
+
+class AsyncAgent(Agent):
+    """
+    An asyncio variant of the Agent. The reasoning loop, prompt building and parsing are shared
+    with `Agent`; only the model call and tool calls are awaited, so many runs can be in flight
+    in a single process.
+    """
+
+    __slots__ = ()
+
+    async def bounded_async(self, call: Awaitable[T]) -> Optional[T]:
+        """
+        Awaits a model or tool call, but no longer than the time left in the budget; a call still
+        running when it runs out is cancelled.
+
+        Args:
+            call (Awaitable[T]): The call to await.
+
+        Returns:
+            Optional[T]: The call's result, or None if the budget ran out first.
+        """
+        try:
+            return await asyncio.wait_for(call, timeout=self.remaining())
+        except asyncio.TimeoutError:
+            logger.warning("Call cancelled: the time budget of %ss ran out", self.max_duration)
+            return None
+
+    async def step(self) -> State:
+        """
+        Executes a single transition of the reasoning loop and records its timing.
+
+        Returns:
+            State: The state the agent is in after the step.
+        """
+        executed = self.state
+        start = self.begin_step()
+        if self.state == State.THINK:
+            if self.begin_iteration():
+                thought = await self.think()
+                self.state = self.decide(thought)
+        elif self.state == State.ACT:
+            await self.act(self.take_pending_actions())
+            self.state = State.THINK
+        self.end_step(executed, start)
+        return self.state
+
+    async def run(self) -> None:
+        """
+        Drives the reasoning loop until a final answer is reached or the budget is exhausted.
+        """
+        while self.state != State.DONE:
+            await self.step()
+
+    async def think(self) -> Message:
+        """
+        Builds the prompt for the current iteration and asks the model for the next step.
+
+        Returns:
+            Message: The recorded thought, with the model's response parsed.
+        """
+        with tracing.tracer.start_as_current_span("agent.think", attributes={"agent.iteration": self.current_iteration}):
+            response = await self.ask_gemini(self.build_prompt())
+            return self.record_thought(response)
+
+    async def act(self, actions: List[Tuple[Name, str]]) -> None:
+        """
+        Executes the requested tools concurrently and logs their results in request order. A call
+        still running when the time budget runs out is cancelled and recorded as an error.
+
+        Args:
+            actions (List[Tuple[Name, str]]): The tools to use and their inputs.
+        """
+        with tracing.tracer.start_as_current_span("agent.act", attributes=self.action_attributes(actions)):
+            results = await asyncio.gather(*[
+                self.bounded_async(self.tools[tool_name].use_async(query))
+                for tool_name, query in actions
+                if tool_name in self.tools
+            ])
+
+            results = iter(results)
+            for tool_name, query in actions:
+                if tool_name not in self.tools:
+                    self.tool_missing(tool_name)
+                    continue
+                result = next(results)
+                if result is None:
+                    self.tool_timed_out(tool_name)
+                else:
+                    self.observe(tool_name, query, result)
+
+    async def execute(self, query: str) -> str:
+        """
+        Executes the agent's query-processing workflow.
+
+        Args:
+            query (str): The query to be processed.
+
+        Returns:
+            str: The final answer or last recorded message content.
+        """
+        with tracing.tracer.start_as_current_span("agent.execute"):
+            self.start(query)
+            await self.route()
+            await self.run()
+            return self.finish()
+
+    async def route(self) -> None:
+        """
+        Lets the router look at the query before the reasoning loop starts.
+        """
+        if self.router is None:
+            return
+        with tracing.tracer.start_as_current_span("agent.route") as span:
+            tools = [str(name) for name in self.tools]
+            follow_up = self.session is not None and bool(self.session.exchanges)
+            decision = self.router.classify(self.query, tools, follow_up)
+            if decision is None and self.router.use_model and not follow_up:
+                response = await self.bounded_async(self.client.generate_async(self.router.prompt(self.query, tools), max_output_tokens=ROUTER_MAX_OUTPUT_TOKENS))
+                decision = self.router.parse(response, tools)
+            self.apply_route(decision, span)
+
+    async def ask_gemini(self, prompt: str) -> str:
+        """
+        Queries the generative model with a prompt, giving up when the time budget runs out.
+
+        Args:
+            prompt (str): The prompt text for the model.
+
+        Returns:
+            str: The model's response as a string.
+        """
+        with tracing.tracer.start_as_current_span("agent.ask_gemini", attributes=self.prompt_attributes(prompt)):
+            response = await self.bounded_async(self.client.generate_async(prompt))
+            return str(response) if response is not None else "No response from Gemini"
+
+
+async def run(query: str) -> str:
+    """
+    Sets up the async agent, registers the async tools, and executes a query.
+
+    Args:
+        query (str): The query to execute.
+
+    Returns:
+        str: The agent's final answer.
+    """
+    gemini = GenerativeModel(config.MODEL_NAME)
+
+    agent = AsyncAgent(model=gemini)
+    agent.register(Name.WIKIPEDIA, wiki_search)
+    agent.register(Name.GOOGLE, google_search)
+
+    return await agent.execute(query)
+
+
+if __name__ == "__main__":
+    query = "What is the age of the oldest tree in the country that has won the most FIFA World Cup titles?"
+    final_answer = asyncio.run(run(query))
+    logger.info(final_answer)
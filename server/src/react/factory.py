@@ -0,0 +1,88 @@
+from vertexai.generative_models import GenerativeModel
+from src.react.function_agent import AsyncFunctionCallingAgent
+from src.react.function_agent import FunctionCallingAgent
+from src.react.agent import load_prompt_template
+from src.tools.cache import get_tool_cache
+from src.react.prompt import split_template
+from src.react.prompt import render_static
+from src.llm.gemini import GeminiClient
+from src.react.async_agent import AsyncAgent
+from src.config.logging import logger
+from src.config.setup import config
+from src.llm.gemini import get_client
+from types import MappingProxyType
+from src.react.agent import Agent
+from src.react.agent import Name
+from src.react.agent import Tool
+from typing import Callable
+from typing import Optional
+from typing import Union
+from typing import Dict
+from typing import Type
+
+
+class AgentFactory:
+    """
+    Builds everything an agent needs once at startup (model client, prompt template and an
+    immutable tool registry) and hands out cheap per-request agents that share it.
+    """
+
+    def __init__(self, model: Union[GenerativeModel, GeminiClient], tools: Dict[Name, Callable[[str], str]],
+                 agent_class: Type[Agent] = Agent, template: Optional[str] = None) -> None:
+        """
+        Prepares the shared pieces.
+
+        Args:
+            model (Union[GenerativeModel, GeminiClient]): The generative model, or a client wrapping it.
+            tools (Dict[Name, Callable[[str], str]]): The tool functions to register, by name.
+            agent_class (Type[Agent]): The agent class to instantiate, e.g. `AsyncAgent`.
+            template (Optional[str]): The prompt template; the agent class's default is loaded from disk if omitted.
+        """
+        self.client = model if isinstance(model, GeminiClient) else get_client(model)
+        self.agent_class = agent_class
+        self.template = template if template is not None else load_prompt_template(agent_class.template_name)
+
+        cache = get_tool_cache()
+        self.tools = MappingProxyType({name: Tool(name, func, cache=cache) for name, func in tools.items()})
+
+        # Split the template and render its static suffix now so the first request does not pay for it
+        split_template(self.template)
+        render_static(self.template, ', '.join(str(name) for name in self.tools))
+        logger.info("Agent factory ready with tools: %s", ', '.join(str(name) for name in self.tools))
+
+    def create(self) -> Agent:
+        """
+        Creates a fresh agent for one request.
+
+        Returns:
+            Agent: An agent with empty run state that shares the factory's client, template and tools.
+        """
+        return self.agent_class(self.client, tools=self.tools, template=self.template)
+
+
+AGENT_CLASSES = {
+    ("json", False): Agent,
+    ("json", True): AsyncAgent,
+    ("functions", False): FunctionCallingAgent,
+    ("functions", True): AsyncFunctionCallingAgent
+}
+
+
+def get_agent_class(asynchronous: bool = False) -> Type[Agent]:
+    """
+    Returns the agent class for the tool selection mode configured under `agent.mode`: `json`
+    (the model describes its next step as JSON) or `functions` (Gemini's native function calling).
+
+    Args:
+        asynchronous (bool): Whether the agent runs on asyncio.
+
+    Returns:
+        Type[Agent]: The agent class to instantiate.
+
+    Raises:
+        ValueError: If the configured mode is unknown.
+    """
+    mode = config.get('agent', {}).get('mode', 'json')
+    if (mode, asynchronous) not in AGENT_CLASSES:
+        raise ValueError(f"Unknown agent mode: {mode}")
+    return AGENT_CLASSES[(mode, asynchronous)]
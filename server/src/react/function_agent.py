@@ -0,0 +1,167 @@
+from vertexai.generative_models import FunctionDeclaration
+from vertexai.generative_models import Tool
+from src.react.output_parser import parse_json_output
+from src.react.async_agent import AsyncAgent
+from src.config.logging import logger
+from src.react.agent import Message
+from src.react.agent import Agent
+from src.react.agent import Name
+from src.utils import tracing
+from functools import lru_cache
+from typing import Optional
+from typing import Tuple
+from typing import Dict
+from typing import List
+from typing import Any
+
+
+FUNCTIONS_TEMPLATE = "functions.txt"
+
+FUNCTION_DESCRIPTIONS = {
+    Name.WIKIPEDIA: "Looks a topic up on Wikipedia and returns the summary of the matching article. "
+                    "Best for established facts about people, places, organisations, events and concepts.",
+    Name.GOOGLE: "Searches the web with Google and returns the top results with their titles, links and snippets. "
+                 "Best for recent events, current figures and anything an encyclopedia would not cover."
+}
+
+QUERY_PARAMETERS = {
+    "type": "object",
+    "properties": {
+        "query": {"type": "string", "description": "The search input, e.g. an article title or a web search query."}
+    },
+    "required": ["query"]
+}
+
+
+@lru_cache(maxsize=8)
+def function_tool(names: Tuple[Name, ...]) -> Tool:
+    """
+    Declares tools to the model as functions taking a single `query`. Built once per set of tools.
+
+    Args:
+        names (Tuple[Name, ...]): The registered tools; tools without a description are not declared.
+
+    Returns:
+        Tool: The function declarations, in the form the Vertex AI SDK expects.
+    """
+    return Tool(function_declarations=[
+        FunctionDeclaration(name=str(name), description=FUNCTION_DESCRIPTIONS[name], parameters=QUERY_PARAMETERS)
+        for name in names
+        if name in FUNCTION_DESCRIPTIONS
+    ])
+
+
+class FunctionCallingAgent(Agent):
+    """
+    An agent that lets Gemini pick tools through native function calling. The tools are declared
+    as functions and the model's choices are read from the function calls in its response, so the
+    prompt does not describe a JSON format and a response cannot fail to parse. A response without
+    function calls is the final answer.
+    """
+
+    __slots__ = ()
+
+    template_name = FUNCTIONS_TEMPLATE
+
+    def functions(self) -> List[Tool]:
+        """
+        Returns the function declarations for the agent's tools.
+
+        Returns:
+            List[Tool]: The declarations sent with every model call.
+        """
+        return [function_tool(tuple(self.tools))]
+
+    def ask_gemini(self, prompt: str) -> str:
+        """
+        Queries the generative model with a prompt and the tools declared as functions. The response
+        is not streamed, since function calls arrive complete.
+
+        Args:
+            prompt (str): The prompt text for the model.
+
+        Returns:
+            str: The response text and function calls, as serialized by the client.
+        """
+        with tracing.tracer.start_as_current_span("agent.ask_gemini", attributes=self.prompt_attributes(prompt)):
+            response = self.bounded(self.client.generate, prompt, tools=self.functions())
+            return str(response) if response is not None else "No response from Gemini"
+
+    def record_thought(self, response: str) -> Message:
+        """
+        Converts the function calls of a response into the agent's usual step (an `actions` list,
+        or an `answer` when there are none) and adds it to the history.
+
+        Args:
+            response (str): The response as returned by `ask_gemini()`.
+
+        Returns:
+            Message: The recorded thought.
+        """
+        logger.info("Thinking => %s", response)
+        output = parse_json_output(response)
+        parsed = self.to_step(output) if output is not None else None
+        content = self.describe(parsed) if parsed is not None else response
+        message = Message(role="assistant", content=f"Thought: {content}", parsed=parsed)
+        self.add_message(message)
+        return message
+
+    def to_step(self, output: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Maps the text and function calls of a response to a step of the reasoning loop.
+
+        Args:
+            output (Dict[str, Any]): The response `text` and its `calls`.
+
+        Returns:
+            Optional[Dict[str, Any]]: The step, or None if the response has neither text nor calls.
+        """
+        text = str(output.get("text") or "").strip()
+        calls = output.get("calls") or []
+        if calls:
+            actions = [
+                {"name": call.get("name", ""), "input": str((call.get("args") or {}).get("query") or self.query)}
+                for call in calls
+            ]
+            return {"thought": text, "actions": actions}
+        if text:
+            return {"thought": text, "answer": text}
+        return None
+
+    @staticmethod
+    def describe(step: Dict[str, Any]) -> str:
+        """
+        Renders a step for the prompt history.
+
+        Args:
+            step (Dict[str, Any]): The step returned by `to_step()`.
+
+        Returns:
+            str: The reasoning, followed by the calls made.
+        """
+        if "actions" not in step:
+            return step["thought"]
+        calls = "; ".join(f"{action['name']}({action['input']!r})" for action in step["actions"])
+        return f"{step['thought']} Calling {calls}".lstrip()
+
+
+class AsyncFunctionCallingAgent(AsyncAgent, FunctionCallingAgent):
+    """
+    An asyncio variant of the FunctionCallingAgent.
+    """
+
+    __slots__ = ()
+
+    async def ask_gemini(self, prompt: str) -> str:
+        """
+        Queries the generative model with a prompt and the tools declared as functions.
+
+        Args:
+            prompt (str): The prompt text for the model.
+
+        Returns:
+            str: The response text and function calls, as serialized by the client.
+        """
+        with tracing.tracer.start_as_current_span("agent.ask_gemini", attributes=self.prompt_attributes(prompt)):
+            response = await self.bounded_async(self.client.generate_async(prompt, tools=self.functions()))
+            return str(response) if response is not None else "No response from Gemini"
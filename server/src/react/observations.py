@@ -0,0 +1,111 @@
+from src.config.logging import logger
+from pydantic import BaseModel
+from typing import Optional
+from pydantic import Field
+from typing import List
+from typing import Dict
+import json
+
+
+class ObservationRecord(BaseModel):
+    """
+    Represents the full output of a single tool call.
+    """
+    ref: str = Field(..., description="Stable reference used in the prompt history.")
+    tool: str = Field(..., description="The name of the tool that produced the observation.")
+    query: str = Field(..., description="The input passed to the tool.")
+    content: str = Field(..., description="The full, unabridged tool output.")
+
+
+class ObservationStore:
+    """
+    Keeps full tool outputs out-of-line and hands out compact summaries for the prompt history.
+    """
+
+    __slots__ = ("max_chars", "_records", "_count")
+
+    def __init__(self, max_chars: int = 4000) -> None:
+        """
+        Initializes an empty store.
+
+        Args:
+            max_chars (int): Maximum length of a summary placed in the prompt history.
+        """
+        self.max_chars = max_chars
+        self._records: Dict[str, ObservationRecord] = {}
+        self._count = 0
+
+    def add(self, tool: str, query: str, content: str) -> ObservationRecord:
+        """
+        Stores a tool output under a new reference.
+
+        Args:
+            tool (str): The name of the tool.
+            query (str): The input passed to the tool.
+            content (str): The full tool output.
+
+        Returns:
+            ObservationRecord: The stored record.
+        """
+        self._count += 1
+        ref = f"obs-{self._count}"
+        record = ObservationRecord(ref=ref, tool=tool, query=query, content=content)
+        self._records[ref] = record
+        return record
+
+    def restore(self, record: ObservationRecord) -> None:
+        """
+        Adds a record kept from an earlier run under its original reference, so references in
+        carried-over history still resolve and new records do not reuse them.
+
+        Args:
+            record (ObservationRecord): The record to restore.
+        """
+        self._records[record.ref] = record
+        self._count = max(self._count, int(record.ref.rsplit("-", 1)[-1]))
+
+    def get(self, ref: str) -> Optional[ObservationRecord]:
+        """
+        Looks up an observation by reference.
+
+        Args:
+            ref (str): The observation reference.
+
+        Returns:
+            Optional[ObservationRecord]: The record, or None if the reference is unknown.
+        """
+        return self._records.get(ref)
+
+    def all(self) -> List[ObservationRecord]:
+        """
+        Returns every stored observation in the order it was added.
+
+        Returns:
+            List[ObservationRecord]: The stored records.
+        """
+        return list(self._records.values())
+
+    def summarize(self, record: ObservationRecord) -> str:
+        """
+        Produces the compact form of an observation used in the prompt history.
+
+        JSON outputs are re-serialized without indentation, and anything longer than
+        `max_chars` is truncated with a marker pointing back to the full record.
+
+        Args:
+            record (ObservationRecord): The record to summarize.
+
+        Returns:
+            str: The compact observation text.
+        """
+        content = record.content
+        try:
+            content = json.dumps(json.loads(content), ensure_ascii=False, separators=(",", ":"))
+        except (TypeError, ValueError):
+            pass
+
+        if len(content) > self.max_chars:
+            omitted = len(content) - self.max_chars
+            logger.info("Truncating observation %s by %d chars", record.ref, omitted)
+            content = f"{content[:self.max_chars]}... [truncated {omitted} chars, see {record.ref}]"
+        return content
@@ -0,0 +1,119 @@
+from src.config.logging import logger
+from src.utils import metrics
+from typing import Optional
+from typing import Dict
+from typing import List
+from typing import Any
+import json
+import re
+
+
+FENCE = re.compile(r"```(?:json|JSON)?\s*")
+
+
+def extract_object(text: str) -> Optional[str]:
+    """
+    Locates the JSON object in a model output: the contents of a code fence if there is one,
+    otherwise everything from the first `{`. Prose before the object is skipped.
+
+    Args:
+        text (str): The raw model output.
+
+    Returns:
+        Optional[str]: The text starting at the object's opening brace, or None if there is none.
+    """
+    fence = FENCE.search(text)
+    if fence:
+        closing = text.find("```", fence.end())
+        text = text[fence.end():closing] if closing != -1 else text[fence.end():]
+    start = text.find("{")
+    return text[start:] if start != -1 else None
+
+
+def _strip_trailing_comma(out: List[str]) -> None:
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def repair(text: str) -> Optional[str]:
+    """
+    Rewrites a JSON object that a model got slightly wrong, in a single pass: trailing commas
+    are dropped and anything after the top-level object is cut off. An object that is not
+    complete (an unterminated string or unclosed brackets) is not repaired: a response cut off
+    part way, e.g. `{"answer": "The oldest tree is`, must cost a retry rather than become a
+    confident, truncated answer.
+
+    Args:
+        text (str): Text starting at the object's opening brace.
+
+    Returns:
+        Optional[str]: The repaired text, or None if the object is incomplete.
+    """
+    out: List[str] = []
+    depth = 0
+    in_string = False
+    escape = False
+    for char in text:
+        out.append(char)
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            out.pop()
+            _strip_trailing_comma(out)
+            out.append(char)
+            depth -= 1
+            if depth == 0:
+                return "".join(out)
+    return None
+
+
+def parse_json_output(text: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Parses the JSON object in a model output, repairing common defects locally instead of
+    asking the model again: code fences, leading prose, trailing commas and trailing text.
+    Output cut off before the end of the object is a failure. Well-formed output takes a
+    single `json.loads`.
+
+    Args:
+        text (Optional[str]): The raw model output.
+
+    Returns:
+        Optional[Dict[str, Any]]: The parsed object, or None if no object could be recovered.
+    """
+    if not text:
+        metrics.OUTPUT_PARSES.labels("failed").inc()
+        return None
+    candidate = text.strip()
+    try:
+        value = json.loads(candidate)
+        if isinstance(value, dict):
+            metrics.OUTPUT_PARSES.labels("clean").inc()
+            return value
+    except ValueError:
+        pass
+
+    candidate = extract_object(candidate)
+    repaired = repair(candidate) if candidate is not None else None
+    if repaired is not None:
+        try:
+            value = json.loads(repaired, strict=False)
+        except ValueError:
+            value = None
+        if isinstance(value, dict):
+            logger.info("Repaired model output locally")
+            metrics.OUTPUT_PARSES.labels("repaired").inc()
+            return value
+    logger.error("Could not recover a JSON object from model output: %s", text)
+    metrics.OUTPUT_PARSES.labels("failed").inc()
+    return None
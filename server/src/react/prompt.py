@@ -0,0 +1,302 @@
+from src.llm.tokens import get_token_counter
+from src.config.logging import logger
+from src.config.setup import config
+from functools import lru_cache
+from typing import Callable
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+from typing import List
+import io
+import re
+
+
+HISTORY_PLACEHOLDER = "{history}"
+
+OBSERVATION_PATTERN = re.compile(r"system: Observation \[(obs-\d+)\] from \w+: ")
+
+
+@lru_cache(maxsize=16)
+def split_template(template: str) -> Tuple[str, str]:
+    """
+    Splits a prompt template around its history placeholder.
+
+    Args:
+        template (str): The raw prompt template.
+
+    Returns:
+        Tuple[str, str]: The unformatted text before and after the history placeholder.
+
+    Raises:
+        ValueError: If the template does not contain exactly one history placeholder.
+    """
+    if template.count(HISTORY_PLACEHOLDER) != 1:
+        raise ValueError("Prompt template must contain exactly one {history} placeholder.")
+    head, tail = template.split(HISTORY_PLACEHOLDER)
+    return head, tail
+
+
+@lru_cache(maxsize=64)
+def render_static(template: str, tools: str) -> str:
+    """
+    Renders the static part of the template that follows the history (instructions and tool list).
+
+    Args:
+        template (str): The raw prompt template.
+        tools (str): Comma separated names of the available tools.
+
+    Returns:
+        str: The rendered template suffix.
+    """
+    _, tail = split_template(template)
+    return tail.format(tools=tools)
+
+
+class HistoryBudget:
+    """
+    Limits on the size of the history section of the prompt.
+    """
+
+    __slots__ = ("max_tokens", "keep_recent", "compacted_chars")
+
+    def __init__(self, max_tokens: int = 6000, keep_recent: int = 2, compacted_chars: int = 300) -> None:
+        """
+        Args:
+            max_tokens (int): Token budget for the rendered history.
+            keep_recent (int): Number of most recent observations that are never shortened.
+            compacted_chars (int): Length older observations are cut to when the budget is exceeded.
+        """
+        self.max_tokens = max_tokens
+        self.keep_recent = keep_recent
+        self.compacted_chars = compacted_chars
+
+
+@lru_cache(maxsize=1)
+def get_history_budget() -> Optional[HistoryBudget]:
+    """
+    Returns the history budget configured under `history`, or None if compaction is disabled.
+
+    Returns:
+        Optional[HistoryBudget]: The shared budget.
+    """
+    settings = dict(config.get('history', {}))
+    settings.pop('tokenizer', None)
+    if not settings.pop('enabled', True):
+        return None
+    return HistoryBudget(**settings)
+
+
+class Turn:
+    """
+    A single rendered line of the history.
+    """
+
+    __slots__ = ("text", "tokens", "compacted")
+
+    def __init__(self, text: str, tokens: int) -> None:
+        self.text = text
+        self.tokens = tokens
+        self.compacted = False
+
+
+class PromptBuilder:
+    """
+    Builds the agent prompt incrementally so each iteration only renders the newest turns.
+
+    When a `HistoryBudget` is given and the history outgrows it, older observations are cut
+    down to a short excerpt (the most recent ones are kept verbatim) and, as a last resort,
+    whole turns are dropped: first the turns of earlier exchanges seeded from a session, then
+    the oldest steps of the current run. The current query is never dropped. Full observations
+    stay available by reference in the agent's `ObservationStore`.
+    """
+
+    __slots__ = ("prefix", "suffix", "budget", "count_tokens", "fixed_tokens", "history_tokens",
+                 "pinned", "omitted", "omitted_earlier", "marker_tokens", "_history", "_turns")
+
+    def __init__(self, template: str, query: str, tools: str, budget: Optional[HistoryBudget] = None,
+                 count_tokens: Optional[Callable[[str], int]] = None) -> None:
+        """
+        Pre-renders the parts of the prompt that do not change during a run.
+
+        Args:
+            template (str): The raw prompt template.
+            query (str): The user query for this run.
+            tools (str): Comma separated names of the available tools.
+            budget (Optional[HistoryBudget]): Size limit for the history; unlimited if omitted.
+            count_tokens (Optional[Callable[[str], int]]): Token counter; the configured one if omitted.
+        """
+        head, _ = split_template(template)
+        self.prefix = head.format(query=query, tools=tools)
+        self.suffix = render_static(template, tools)
+        self.budget = budget
+        self.count_tokens = count_tokens or get_token_counter()
+        self.fixed_tokens = self.count_tokens(self.prefix) + self.count_tokens(self.suffix)
+        self.history_tokens = 0
+        self.pinned = 0
+        self.omitted = 0
+        self.omitted_earlier = 0
+        self.marker_tokens = 0
+        self._history = io.StringIO()
+        self._turns: List[Turn] = []
+
+    def append(self, role: str, content: str) -> None:
+        """
+        Renders a single turn and appends it to the history buffer, compacting the history if
+        it no longer fits the budget.
+
+        Args:
+            role (str): The role of the message sender.
+            content (str): The content of the message.
+        """
+        self._add(role, content)
+        self._fit()
+
+    def seed(self, turns: Iterable[Tuple[str, str]]) -> None:
+        """
+        Adds the turns of earlier exchanges of a conversation, ahead of the current query. They
+        are the first to be dropped when the history outgrows its budget; the query appended
+        next is never dropped.
+
+        Args:
+            turns (Iterable[Tuple[str, str]]): The roles and contents of the earlier turns.
+        """
+        for role, content in turns:
+            self._add(role, content)
+        self.pinned = len(self._turns)
+        self._fit()
+
+    def _add(self, role: str, content: str) -> None:
+        """
+        Renders a turn and appends it to the history buffer.
+        """
+        text = f"{role}: {content}"
+        turn = Turn(text, self.count_tokens(text))
+        if self._turns or self.omitted or self.omitted_earlier:
+            self._history.write("\n")
+        self._history.write(text)
+        self._turns.append(turn)
+        self.history_tokens += turn.tokens
+
+    def _fit(self) -> None:
+        """
+        Compacts the history if it no longer fits the budget.
+        """
+        if self.budget is not None and self.history_tokens > self.budget.max_tokens:
+            self.compact()
+
+    def compact(self) -> None:
+        """
+        Shrinks the history to the token budget. Observations older than the `keep_recent` most
+        recent ones are shortened first, oldest first. If that is not enough, the turns before
+        the query are dropped, oldest first, then the oldest turns after it; each group is
+        replaced by a marker that counts towards the budget.
+        """
+        budget = self.budget
+        observations = [turn for turn in self._turns if OBSERVATION_PATTERN.match(turn.text)]
+        older = observations[:-budget.keep_recent] if budget.keep_recent else observations
+        for turn in older:
+            if self.history_tokens <= budget.max_tokens:
+                break
+            if not turn.compacted:
+                self.shorten(turn)
+
+        while self.history_tokens > budget.max_tokens:
+            if self.pinned > 0:
+                dropped = self._turns.pop(0)
+                self.pinned -= 1
+                self.omitted_earlier += 1
+            elif len(self._turns) > self.pinned + 2:
+                dropped = self._turns.pop(self.pinned + 1)
+                self.omitted += 1
+            else:
+                break
+            self.history_tokens -= dropped.tokens
+            self._count_markers()
+
+        self._rebuild()
+        if self.history_tokens > budget.max_tokens:
+            logger.warning("History still exceeds its budget after compaction: ~%d of %d tokens",
+                           self.history_tokens, budget.max_tokens)
+        else:
+            logger.info("Compacted history to ~%d tokens (%d earlier turns and %d steps omitted)",
+                        self.history_tokens, self.omitted_earlier, self.omitted)
+
+    def shorten(self, turn: Turn) -> None:
+        """
+        Cuts an observation down to a short excerpt that points back to the full record.
+
+        Args:
+            turn (Turn): The observation turn.
+        """
+        match = OBSERVATION_PATTERN.match(turn.text)
+        body = turn.text[match.end():]
+        limit = self.budget.compacted_chars
+        if len(body) > limit:
+            turn.text = f"{turn.text[:match.end()]}{body[:limit]}... [compacted, see {match.group(1)}]"
+            self.history_tokens -= turn.tokens
+            turn.tokens = self.count_tokens(turn.text)
+            self.history_tokens += turn.tokens
+        turn.compacted = True
+
+    def _markers(self) -> List[Tuple[int, str]]:
+        """
+        Returns the lines standing in for dropped turns, with the position each goes to.
+
+        Returns:
+            List[Tuple[int, str]]: Line positions (in the current turns) and marker texts.
+        """
+        markers = []
+        if self.omitted_earlier:
+            markers.append((0, f"system: [{self.omitted_earlier} earlier conversation turns omitted to fit the context budget]"))
+        if self.omitted:
+            markers.append((self.pinned + 1, f"system: [{self.omitted} earlier steps omitted to fit the context budget]"))
+        return markers
+
+    def _count_markers(self) -> None:
+        """
+        Keeps the tokens of the marker lines in the history total.
+        """
+        tokens = sum(self.count_tokens(text) for _, text in self._markers())
+        self.history_tokens += tokens - self.marker_tokens
+        self.marker_tokens = tokens
+
+    def _rebuild(self) -> None:
+        """
+        Re-renders the history buffer after turns were changed or removed.
+        """
+        lines = [turn.text for turn in self._turns]
+        for position, text in reversed(self._markers()):
+            lines.insert(position, text)
+        self._history = io.StringIO()
+        self._history.write("\n".join(lines))
+
+    @property
+    def history(self) -> str:
+        """
+        Returns the rendered history.
+
+        Returns:
+            str: All turns appended so far, one per line.
+        """
+        return self._history.getvalue()
+
+    @property
+    def tokens(self) -> int:
+        """
+        Returns the estimated token count of the full prompt.
+
+        Returns:
+            int: Tokens of the static parts plus the current history.
+        """
+        return self.fixed_tokens + self.history_tokens
+
+    def render(self) -> str:
+        """
+        Assembles the full prompt from the cached prefix, the history buffer and the cached suffix.
+
+        Returns:
+            str: The prompt to send to the model.
+        """
+        prompt = self.prefix + self.history + self.suffix
+        logger.info("Prompt size: %d chars (~%d tokens) over %d turns", len(prompt), self.tokens, len(self._turns))
+        return prompt
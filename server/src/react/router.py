@@ -0,0 +1,282 @@
+from src.react.output_parser import parse_json_output
+from src.config.logging import logger
+from src.config.setup import config
+from pydantic import BaseModel
+from typing import Optional
+from pydantic import Field
+from typing import Iterable
+from typing import Dict
+import threading
+import operator
+import ast
+import re
+
+
+ROUTE_AGENT = "agent"
+ROUTE_ANSWER = "answer"
+ROUTE_TOOL = "tool"
+
+HEURISTIC = "heuristic"
+MODEL = "model"
+
+ROUTER_MAX_OUTPUT_TOKENS = 256
+
+# Small talk only matches when it is the whole query, so "hi, who is Ada Lovelace?" still runs the agent
+GREETINGS = [
+    (re.compile(r"^(hi|hello|hey|hiya|howdy|good (morning|afternoon|evening))( there| everyone| agent)?[\s!.,]*$"),
+     "Hello! Ask me anything and I will look it up for you."),
+    (re.compile(r"^(thanks|thank you|thx|cheers)( so much| a lot| again)?[\s!.,]*$"), "You're welcome!"),
+    (re.compile(r"^(bye|goodbye|see you)[\s!.,]*$"), "Goodbye!")
+]
+
+ARITHMETIC_PREFIX = re.compile(r"^(what is|what's|whats|calculate|compute|evaluate|how much is)\s+", re.IGNORECASE)
+ARITHMETIC_CHARS = re.compile(r"^[\d\s.+\-*/%()^x×÷]+$")
+ARITHMETIC_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos
+}
+MAX_EXPRESSION_CHARS = 120
+MAX_EXPONENT = 64
+MAX_RESULT_BITS = 1024
+
+DEFINITION = re.compile(r"^(who|what) (is|was|are|were) (?P<subject>[^?]{2,80}?)\s*\??$", re.IGNORECASE)
+TIME_SENSITIVE = re.compile(r"\b(today|now|current|currently|latest|recent|news|price|weather|score|this (week|month|year)|20\d\d)\b", re.IGNORECASE)
+
+ROUTER_PROMPT = """Classify the query below for a research assistant that can use these tools: {tools}.
+
+Query: {query}
+
+Reply with JSON only, in one of these forms:
+{{"route": "answer", "answer": "..."}} if the query is small talk or can be answered correctly without looking anything up.
+{{"route": "tool", "tool": "<tool name>", "input": "..."}} if a single lookup with that tool is likely to be enough.
+{{"route": "agent"}} for anything else."""
+
+
+class RouteDecision(BaseModel):
+    """
+    Represents how a query is handled before the reasoning loop starts.
+    """
+    route: str = Field(..., description="`answer` (answered directly), `tool` (one tool call up front) or `agent` (full loop).")
+    source: str = Field(..., description="`heuristic` or `model`.")
+    reason: str = Field(..., description="Why the route was chosen.")
+    answer: Optional[str] = Field(None, description="The direct answer, for the `answer` route.")
+    tool: Optional[str] = Field(None, description="The tool to call first, for the `tool` route.")
+    input: Optional[str] = Field(None, description="The input for that tool.")
+
+
+class UnsupportedExpression(ValueError):
+    """
+    Raised when an expression is not plain, bounded arithmetic.
+    """
+
+
+def evaluate(node: ast.AST) -> float:
+    """
+    Evaluates an arithmetic expression tree of numbers and operators only.
+
+    Args:
+        node (ast.AST): The parsed expression.
+
+    Returns:
+        float: The value of the expression.
+
+    Raises:
+        UnsupportedExpression: If the tree contains anything but numbers and arithmetic operators, or an
+            exponent or intermediate result large enough to be expensive.
+    """
+    if isinstance(node, ast.Expression):
+        return evaluate(node.body)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and type(node.op) in ARITHMETIC_OPERATORS:
+        return ARITHMETIC_OPERATORS[type(node.op)](evaluate(node.operand))
+    if isinstance(node, ast.BinOp) and type(node.op) in ARITHMETIC_OPERATORS:
+        left, right = evaluate(node.left), evaluate(node.right)
+        if isinstance(node.op, ast.Pow) and abs(right) > MAX_EXPONENT:
+            raise UnsupportedExpression("Exponent too large")
+        # Integers grow without bound, so the size of a product or power is estimated before computing it
+        if isinstance(left, int) and isinstance(right, int):
+            if isinstance(node.op, ast.Pow) and right > 0 and left.bit_length() * right > MAX_RESULT_BITS:
+                raise UnsupportedExpression("Result too large")
+            if isinstance(node.op, ast.Mult) and left.bit_length() + right.bit_length() > MAX_RESULT_BITS:
+                raise UnsupportedExpression("Result too large")
+        value = ARITHMETIC_OPERATORS[type(node.op)](left, right)
+        if isinstance(value, int) and value.bit_length() > MAX_RESULT_BITS:
+            raise UnsupportedExpression("Result too large")
+        return value
+    raise UnsupportedExpression(f"Unsupported expression: {type(node).__name__}")
+
+
+def calculate(query: str) -> Optional[str]:
+    """
+    Answers a query that is a plain arithmetic expression, e.g. "what is (3 + 4) * 12?".
+
+    Args:
+        query (str): The user query.
+
+    Returns:
+        Optional[str]: The expression and its value, or None if the query is not arithmetic.
+    """
+    expression = ARITHMETIC_PREFIX.sub("", query.strip()).rstrip("?=. ")
+    if not expression or len(expression) > MAX_EXPRESSION_CHARS or not ARITHMETIC_CHARS.match(expression):
+        return None
+    source = expression.replace("^", "**").replace("×", "*").replace("x", "*").replace("÷", "/")
+    try:
+        tree = ast.parse(source, mode="eval")
+        # A bare number is not a calculation
+        if not any(isinstance(node, ast.BinOp) for node in ast.walk(tree)):
+            return None
+        value = evaluate(tree)
+    except (SyntaxError, UnsupportedExpression, ZeroDivisionError, OverflowError) as e:
+        logger.info("Not routing arithmetic query %r: %s", query, e)
+        return None
+    if isinstance(value, int) and value.bit_length() > MAX_RESULT_BITS:
+        return None
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        value = int(value)
+    result = f"{value:.10g}" if isinstance(value, float) else str(value)
+    return f"{expression} = {result}"
+
+
+class Router:
+    """
+    Decides before the reasoning loop whether a query needs it at all. Cheap local heuristics
+    answer small talk and arithmetic directly and pick a single first tool for simple "who/what
+    is" questions; optionally, one short model call classifies whatever the heuristics cannot place.
+    Every decision is counted so hit rates can be monitored.
+    """
+
+    def __init__(self, heuristics: bool = True, tool_hints: bool = True, model: bool = False) -> None:
+        """
+        Args:
+            heuristics (bool): Whether to answer small talk and arithmetic locally.
+            tool_hints (bool): Whether to pick a first tool for definitional questions.
+            model (bool): Whether to ask the model about queries the heuristics cannot place.
+        """
+        self.heuristics = heuristics
+        self.tool_hints = tool_hints
+        self.use_model = model
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+
+    def classify(self, query: str, tools: Iterable[str], follow_up: bool = False) -> Optional[RouteDecision]:
+        """
+        Applies the local heuristics to a query.
+
+        Args:
+            query (str): The user query.
+            tools (Iterable[str]): Names of the tools the agent has.
+            follow_up (bool): Whether the query continues a conversation; follow-ups are never
+                sent to a tool, since they usually refer to earlier answers.
+
+        Returns:
+            Optional[RouteDecision]: The decision, or None if the heuristics cannot place the query.
+        """
+        text = " ".join(query.lower().split())
+        if self.heuristics:
+            for pattern, answer in GREETINGS:
+                if pattern.match(text):
+                    return RouteDecision(route=ROUTE_ANSWER, source=HEURISTIC, reason="small talk", answer=answer)
+            result = calculate(query)
+            if result is not None:
+                return RouteDecision(route=ROUTE_ANSWER, source=HEURISTIC, reason="arithmetic", answer=result)
+        if self.tool_hints and not follow_up:
+            match = DEFINITION.match(query.strip())
+            if match:
+                subject = match.group("subject")
+                tool = "google" if TIME_SENSITIVE.search(subject) else "wikipedia"
+                if tool in tools:
+                    return RouteDecision(route=ROUTE_TOOL, source=HEURISTIC, reason="definition", tool=tool, input=subject)
+        return None
+
+    def prompt(self, query: str, tools: Iterable[str]) -> str:
+        """
+        Renders the classification prompt for the optional model call.
+
+        Args:
+            query (str): The user query.
+            tools (Iterable[str]): Names of the tools the agent has.
+
+        Returns:
+            str: The prompt text.
+        """
+        return ROUTER_PROMPT.format(query=query, tools=", ".join(tools))
+
+    def parse(self, response: Optional[str], tools: Iterable[str]) -> RouteDecision:
+        """
+        Turns the model's classification into a decision, falling back to the full loop when the
+        response is missing, malformed or names an unknown tool.
+
+        Args:
+            response (Optional[str]): The model's response.
+            tools (Iterable[str]): Names of the tools the agent has.
+
+        Returns:
+            RouteDecision: The decision.
+        """
+        parsed = parse_json_output(response) or {}
+        route = parsed.get("route")
+        if route == ROUTE_ANSWER and parsed.get("answer"):
+            return RouteDecision(route=ROUTE_ANSWER, source=MODEL, reason="classified", answer=str(parsed["answer"]))
+        if route == ROUTE_TOOL and parsed.get("tool") in set(tools) and parsed.get("input"):
+            return RouteDecision(route=ROUTE_TOOL, source=MODEL, reason="classified", tool=parsed["tool"], input=str(parsed["input"]))
+        return RouteDecision(route=ROUTE_AGENT, source=MODEL, reason="classified")
+
+    def record(self, decision: RouteDecision) -> None:
+        """
+        Counts a decision.
+
+        Args:
+            decision (RouteDecision): The decision taken for a query.
+        """
+        key = f"{decision.route}_{decision.source}"
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns decision counts by route and source, and the share of queries that skipped the
+        full loop (`hit_rate`) or at least its first model call (`tool_rate`).
+
+        Returns:
+            Dict[str, float]: Router metrics.
+        """
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts.values())
+        answered = sum(count for key, count in counts.items() if key.startswith(ROUTE_ANSWER))
+        tools = sum(count for key, count in counts.items() if key.startswith(ROUTE_TOOL))
+        stats: Dict[str, float] = dict(counts)
+        stats["total"] = total
+        stats["hit_rate"] = answered / total if total else 0.0
+        stats["tool_rate"] = tools / total if total else 0.0
+        return stats
+
+
+_router: Optional[Router] = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> Optional[Router]:
+    """
+    Returns the process-wide router configured under `router`, or None if routing is disabled.
+
+    Returns:
+        Optional[Router]: The shared router.
+    """
+    global _router
+    settings = dict(config.get('router', {}))
+    if not settings.pop('enabled', False):
+        return None
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = Router(**settings)
+    return _router
@@ -0,0 +1,262 @@
+from src.react.observations import ObservationRecord
+from src.utils.cache import create_cache
+from src.utils.cache import SQLiteCache
+from src.utils.cache import MemoryCache
+from src.config.logging import logger
+from src.config.setup import config
+from pydantic import PrivateAttr
+from pydantic import BaseModel
+from typing import Optional
+from pydantic import Field
+from typing import Iterator
+from typing import Union
+from typing import Tuple
+from typing import List
+from typing import Dict
+from typing import Any
+import threading
+import secrets
+import hashlib
+import hmac
+import os
+
+
+DEFAULT_TTL = 3600.0
+
+MAX_SESSION_ID_LENGTH = 128
+
+# Session ids are issued by the server and signed with this key, so a client can only continue a
+# conversation whose id it was given. Set SESSION_SECRET so every worker and restart accepts the
+# same ids; otherwise a key is generated per process (shared by gunicorn workers with preload_app)
+SESSION_SECRET = os.environ.get("SESSION_SECRET") or secrets.token_hex(32)
+
+# Requests for the same session are serialized on one of these locks while it is saved
+LOCK_STRIPES = 64
+
+
+class Exchange(BaseModel):
+    """
+    One finished query of a conversation, reduced to what a follow-up needs.
+    """
+    query: str = Field(..., description="The user query.")
+    history: List[Tuple[str, str]] = Field(default_factory=list, description="The query, observation and answer turns as (role, content).")
+    observations: List[ObservationRecord] = Field(default_factory=list, description="Full outputs of the tool calls made for the query.")
+
+
+class Session(BaseModel):
+    """
+    The state a conversation carries from one request to the next.
+    """
+    session_id: str = Field(..., description="The server-issued conversation id.")
+    exchanges: List[Exchange] = Field(default_factory=list, description="Earlier exchanges, oldest first.")
+    version: int = Field(0, description="Number of times the session was saved.")
+    _loaded: int = PrivateAttr(0)
+
+    def history(self) -> Iterator[Tuple[str, str]]:
+        """
+        Returns the turns of every earlier exchange in order.
+
+        Returns:
+            Iterator[Tuple[str, str]]: (role, content) pairs to seed the next prompt with.
+        """
+        for exchange in self.exchanges:
+            yield from exchange.history
+
+    def observations(self) -> List[ObservationRecord]:
+        """
+        Returns the tool outputs of every earlier exchange in order.
+
+        Returns:
+            List[ObservationRecord]: The stored records.
+        """
+        return [record for exchange in self.exchanges for record in exchange.observations]
+
+    def seed(self, conversation: List[Dict[str, Any]]) -> None:
+        """
+        Starts an empty session from a client-side transcript of `{"role", "content"}` messages,
+        keeping each user message that was followed by an assistant answer.
+
+        Args:
+            conversation (List[Dict[str, Any]]): The transcript, oldest message first.
+        """
+        query = None
+        for message in conversation:
+            role, content = message.get('role'), message.get('content')
+            if not isinstance(content, str):
+                continue
+            if role == 'user':
+                query = content
+            elif role == 'assistant' and query is not None:
+                history = [("user", query), ("assistant", f"Final Answer: {content}")]
+                self.exchanges.append(Exchange(query=query, history=history))
+                query = None
+
+
+def valid_session_id(session_id: Any) -> bool:
+    """
+    Checks that a client-supplied session id is a non-empty string of reasonable length.
+    """
+    return isinstance(session_id, str) and 0 < len(session_id) <= MAX_SESSION_ID_LENGTH
+
+
+def sign(token: str) -> str:
+    """
+    Returns the signature that binds a session token to this server's key.
+    """
+    return hmac.new(SESSION_SECRET.encode("utf-8"), token.encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+
+
+def new_session_id() -> str:
+    """
+    Issues an unguessable, signed session id.
+
+    Returns:
+        str: A random token and its signature.
+    """
+    token = secrets.token_urlsafe(24)
+    return f"{token}.{sign(token)}"
+
+
+def issued_session_id(session_id: str) -> bool:
+    """
+    Checks that a session id was issued by this server rather than chosen by the client.
+
+    Args:
+        session_id (str): The id sent with a request.
+
+    Returns:
+        bool: True if the signature matches.
+    """
+    token, _, signature = session_id.rpartition(".")
+    return bool(token) and hmac.compare_digest(signature, sign(token))
+
+
+class SessionStore:
+    """
+    Keeps conversation sessions on top of a memory (LRU) or SQLite cache backend. Sessions expire
+    `ttl` seconds after their last update and keep at most `max_exchanges` exchanges, dropping the
+    oldest ones together with their observations.
+
+    The session id is the only key to a conversation's history and observations, so ids are
+    issued by the server (see `new_session_id()`) and an id the server did not sign starts a new
+    session instead of reading a stored one. Two requests may continue the same session at once:
+    each saves only the exchanges it added on top of whatever the other one stored, so neither
+    overwrites the other.
+    """
+
+    def __init__(self, backend: Union[MemoryCache, SQLiteCache], ttl: float = DEFAULT_TTL, max_exchanges: int = 5) -> None:
+        """
+        Initializes the store.
+
+        Args:
+            backend (Union[MemoryCache, SQLiteCache]): Storage for the serialized sessions.
+            ttl (float): Idle time in seconds after which a session is forgotten.
+            max_exchanges (int): Number of most recent exchanges kept per session.
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.max_exchanges = max_exchanges
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def _lock(self, session_id: str) -> threading.Lock:
+        """
+        Returns the lock serializing saves of a session in this process.
+        """
+        return self._locks[hash(session_id) % LOCK_STRIPES]
+
+    def load(self, session_id: str) -> Session:
+        """
+        Returns a session, or a new empty one if it is unknown or has expired.
+
+        Args:
+            session_id (str): The conversation id.
+
+        Returns:
+            Session: The stored session.
+        """
+        value = self.backend.get(session_id)
+        if value is not None:
+            try:
+                return Session.model_validate_json(value)
+            except ValueError as e:
+                logger.error("Discarding unreadable session %s: %s", session_id, e)
+        return Session(session_id=session_id)
+
+    def open(self, session_id: Optional[str], conversation: Optional[List[Dict[str, Any]]] = None) -> Session:
+        """
+        Loads a session for a request. Without an id, or with one this server did not issue, a new
+        session is started under a fresh id. A session the store does not know yet is seeded from
+        the client's transcript, if one was sent.
+
+        Args:
+            session_id (Optional[str]): The conversation id returned by an earlier response.
+            conversation (Optional[List[Dict[str, Any]]]): The client-side transcript.
+
+        Returns:
+            Session: The session the request continues; its `session_id` goes back to the client.
+        """
+        if session_id is not None and not issued_session_id(session_id):
+            logger.warning("Ignoring a session id this server did not issue; starting a new session")
+            session_id = None
+        session = self.load(session_id) if session_id is not None else Session(session_id=new_session_id())
+        if not session.exchanges and isinstance(conversation, list):
+            session.seed([message for message in conversation if isinstance(message, dict)])
+        session._loaded = len(session.exchanges)
+        return session
+
+    def save(self, session: Session) -> None:
+        """
+        Stores a session, trimming it to `max_exchanges` and restarting its TTL. If another request
+        saved the session since this one opened it, the exchanges this request added are appended
+        to the stored ones instead of replacing them.
+
+        Args:
+            session (Session): The session to store.
+        """
+        with self._lock(session.session_id):
+            stored = self.load(session.session_id)
+            if stored.version != session.version:
+                logger.info("Session %s was updated by another request; merging", session.session_id)
+                session.exchanges = stored.exchanges + session.exchanges[session._loaded:]
+            session.version = stored.version + 1
+            session.exchanges = session.exchanges[-self.max_exchanges:] if self.max_exchanges else []
+            self.backend.set(session.session_id, session.model_dump_json(), self.ttl)
+            session._loaded = len(session.exchanges)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the backend's hit/miss/eviction counters and its current size.
+
+        Returns:
+            Dict[str, float]: Store metrics.
+        """
+        stats = self.backend.stats.snapshot()
+        stats["bytes"] = self.backend.size
+        return stats
+
+
+_session_store: Optional[SessionStore] = None
+_session_store_lock = threading.Lock()
+
+
+def get_session_store() -> Optional[SessionStore]:
+    """
+    Returns the process-wide session store configured under `sessions`, or None if sessions are disabled.
+
+    Returns:
+        Optional[SessionStore]: The shared session store.
+    """
+    global _session_store
+    settings = config.get('sessions', {})
+    if not settings.get('enabled', False):
+        return None
+    if _session_store is None:
+        with _session_store_lock:
+            if _session_store is None:
+                logger.info("Initializing session store with backend: %s", settings.get('backend', 'memory'))
+                _session_store = SessionStore(
+                    create_cache(settings),
+                    ttl=settings.get('ttl', DEFAULT_TTL),
+                    max_exchanges=settings.get('max_exchanges', 5)
+                )
+    return _session_store
@@ -0,0 +1,101 @@
+from typing import Optional
+from typing import Dict
+from typing import Any
+import json
+
+
+ACTION_KEYS = ("action", "actions")
+
+
+class IncrementalJSONScanner:
+    """
+    Scans a streamed model response character by character and extracts the value of the
+    top-level `action` / `actions` key as soon as its closing bracket arrives, without waiting
+    for the rest of the response. Text before the first `{` (prose, code fences) is ignored.
+    """
+
+    def __init__(self) -> None:
+        self.buffer = ""
+        self.completed: Dict[str, Any] = {}
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> Optional[Any]:
+        """
+        Consumes the next chunk of the response.
+
+        Args:
+            chunk (str): Newly received text.
+
+        Returns:
+            Optional[Any]: The parsed action value if it completed within this chunk, otherwise None.
+        """
+        self.buffer += chunk
+        found = None
+        while self._pos < len(self.buffer):
+            char = self.buffer[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect_key:
+                        self._key = self.buffer[self._string_start + 1:self._pos]
+            elif char == '"':
+                if self._depth > 0:
+                    self._in_string = True
+                    self._string_start = self._pos
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._expect_key = char == "{"
+                elif self._depth == 2 and self._key in ACTION_KEYS and self._value_start is None:
+                    self._value_start = self._pos
+            elif char in "}]" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 1 and self._value_start is not None:
+                    found = self._complete(self.buffer[self._value_start:self._pos + 1])
+                    self._value_start = None
+            elif self._depth == 1:
+                if char == ":":
+                    self._expect_key = False
+                elif char == ",":
+                    self._expect_key = True
+                    self._key = None
+            self._pos += 1
+        return found
+
+    def _complete(self, text: str) -> Optional[Any]:
+        """
+        Parses a completed action value and remembers it.
+
+        Args:
+            text (str): The raw JSON text of the value.
+
+        Returns:
+            Optional[Any]: The parsed value, or None if it is not valid JSON.
+        """
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        self.completed[self._key] = value
+        return value
+
+    @property
+    def actions(self) -> Optional[Any]:
+        """
+        Returns the first completed action value, if any.
+        """
+        for key in ACTION_KEYS:
+            if key in self.completed:
+                return self.completed[key]
+        return None
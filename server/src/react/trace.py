@@ -0,0 +1,80 @@
+from src.react.agent import Message
+from src.react.agent import Agent
+from typing import Union
+from typing import Tuple
+from typing import Any
+from typing import Dict
+
+
+def thought_content(message: Message) -> Union[Dict[str, Any], str]:
+    """
+    Returns the structured content of a thought, parsed when the agent recorded it, or the raw
+    text if the model output could not be parsed.
+
+    Args:
+        message (Message): A thought recorded by the agent.
+
+    Returns:
+        Union[Dict[str, Any], str]: The parsed thought, or the message content.
+    """
+    return message.parsed if message.parsed is not None else message.content
+
+
+def build_response(agent: Agent, final_answer: str, include_observations: bool = False) -> Dict[str, Any]:
+    """
+    Builds the `/api/agent` response body from a finished agent run.
+
+    Args:
+        agent (Agent): The agent after `execute()` has returned.
+        final_answer (str): The value returned by `execute()`.
+        include_observations (bool): Whether to attach the full tool outputs.
+
+    Returns:
+        Dict[str, Any]: The response payload, with the session id, the router's decision (`route`)
+        and the span waterfall (`timeline`) when the run has them.
+    """
+    # Process the trace
+    trace = []
+    for message in agent.messages:
+        if message.content.startswith('Thought:'):
+            trace.append(thought_content(message))
+
+    # Prepare the response
+    response = {
+        'final_answer': final_answer,
+        'trace': trace
+    }
+    if include_observations:
+        response['observations'] = [record.model_dump() for record in agent.observations.all()]
+    if agent.session is not None:
+        response['session_id'] = agent.session.session_id
+    if agent.routed is not None:
+        response['route'] = agent.routed.model_dump(exclude_none=True)
+    if agent.record_timeline:
+        response['timeline'] = agent.timeline()
+    return response
+
+
+def message_event(message: Message) -> Tuple[str, Dict[str, Any]]:
+    """
+    Classifies a history message into a streaming event.
+
+    Args:
+        message (Message): A message recorded by the agent.
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: The event name (`query`, `thought`, `action`, `observation`,
+        `final_answer` or `message`) and its payload.
+    """
+    content = message.content
+    if message.role == "user":
+        return "query", {"content": content}
+    if content.startswith("Thought:"):
+        return "thought", {"content": thought_content(message)}
+    if content.startswith("Action:"):
+        return "action", {"content": content}
+    if content.startswith("Final Answer:"):
+        return "final_answer", {"content": content}
+    if message.role == "system":
+        return "observation", {"content": content}
+    return "message", {"content": content}
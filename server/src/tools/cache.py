@@ -0,0 +1,167 @@
+from src.utils.cache import create_cache
+from src.utils.cache import SQLiteCache
+from src.utils.cache import MemoryCache
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Optional
+from typing import Union
+from typing import Dict
+from typing import Any
+import threading
+import asyncio
+
+
+DEFAULT_TTL = 3600.0
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a tool query so trivially different spellings share a cache entry.
+
+    Args:
+        query (str): The raw tool input.
+
+    Returns:
+        str: The lower-cased query with collapsed whitespace.
+    """
+    return " ".join(query.lower().split())
+
+
+def is_cacheable(result: Any) -> bool:
+    """
+    Decides whether a tool result may be cached. Empty results and error payloads are not.
+
+    Args:
+        result (Any): The value returned by the tool function.
+
+    Returns:
+        bool: True if the result should be stored.
+    """
+    return isinstance(result, str) and bool(result) and not result.startswith('{"error"')
+
+
+class ToolCache:
+    """
+    A result cache for tool calls with per-tool TTLs on top of a memory or SQLite backend.
+    """
+
+    def __init__(self, backend: Union[MemoryCache, SQLiteCache], ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = DEFAULT_TTL) -> None:
+        """
+        Initializes the tool cache.
+
+        Args:
+            backend (Union[MemoryCache, SQLiteCache]): Storage for the cached results.
+            ttls (Optional[Dict[str, float]]): Time to live in seconds per tool name.
+            default_ttl (float): Time to live for tools without an explicit TTL.
+        """
+        self.backend = backend
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+
+    @staticmethod
+    def key(tool: str, query: str) -> str:
+        """
+        Builds the cache key for a tool call.
+
+        Args:
+            tool (str): The tool name.
+            query (str): The tool input.
+
+        Returns:
+            str: The cache key.
+        """
+        return f"{tool}:{normalize_query(query)}"
+
+    def get(self, tool: str, query: str) -> Optional[str]:
+        """
+        Returns the cached result of a tool call, if any.
+
+        Args:
+            tool (str): The tool name.
+            query (str): The tool input.
+
+        Returns:
+            Optional[str]: The cached result, or None on a miss.
+        """
+        return self.backend.get(self.key(tool, query))
+
+    async def get_async(self, tool: str, query: str) -> Optional[str]:
+        """
+        Returns the cached result of a tool call like `get()`; a SQLite backend is read in a
+        worker thread so it does not block the event loop.
+
+        Args:
+            tool (str): The tool name.
+            query (str): The tool input.
+
+        Returns:
+            Optional[str]: The cached result, or None on a miss.
+        """
+        if isinstance(self.backend, SQLiteCache):
+            return await asyncio.to_thread(self.get, tool, query)
+        return self.get(tool, query)
+
+    def set(self, tool: str, query: str, result: Any) -> None:
+        """
+        Caches the result of a tool call if it is cacheable.
+
+        Args:
+            tool (str): The tool name.
+            query (str): The tool input.
+            result (Any): The tool result.
+        """
+        if is_cacheable(result):
+            self.backend.set(self.key(tool, query), result, self.ttls.get(tool, self.default_ttl))
+
+    async def set_async(self, tool: str, query: str, result: Any) -> None:
+        """
+        Caches the result of a tool call like `set()`; a SQLite backend is written in a worker thread.
+
+        Args:
+            tool (str): The tool name.
+            query (str): The tool input.
+            result (Any): The tool result.
+        """
+        if isinstance(self.backend, SQLiteCache) and is_cacheable(result):
+            await asyncio.to_thread(self.set, tool, query, result)
+        else:
+            self.set(tool, query, result)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns hit/miss/eviction counters and the current size of the backend.
+
+        Returns:
+            Dict[str, float]: Cache metrics.
+        """
+        stats = self.backend.stats.snapshot()
+        stats["bytes"] = self.backend.size
+        return stats
+
+
+_tool_cache: Optional[ToolCache] = None
+_tool_cache_lock = threading.Lock()
+
+
+def get_tool_cache() -> Optional[ToolCache]:
+    """
+    Returns the process-wide tool cache configured under `cache.tools`, or None if caching is disabled.
+
+    Returns:
+        Optional[ToolCache]: The shared tool cache.
+    """
+    global _tool_cache
+    settings = config.get('cache', {}).get('tools', {})
+    if not settings.get('enabled', False):
+        return None
+    if _tool_cache is None:
+        with _tool_cache_lock:
+            if _tool_cache is None:
+                logger.info("Initializing tool cache with backend: %s", settings.get('backend', 'memory'))
+                _tool_cache = ToolCache(
+                    create_cache(settings),
+                    ttls=settings.get('ttl', {}),
+                    default_ttl=settings.get('default_ttl', DEFAULT_TTL)
+                )
+    return _tool_cache
@@ -1,7 +1,15 @@
+from requests.adapters import HTTPAdapter
+from src.utils.ratelimit import RateLimited
+from src.utils.ratelimit import get_limiter
 from src.config.logging import logger
+from src.config.setup import config
 from src.utils.io import load_yaml
-from typing import Tuple, Union, Dict, List, Any
+from typing import Tuple, Union, Dict, List, Any, Optional
+from urllib3.util.retry import Retry
+from functools import lru_cache
+import threading
 import requests
+import httpx
 import json
 import os
 
@@ -10,17 +18,41 @@ class SerpAPIClient:
     A client for interacting with the SERP API for performing search queries.
     """
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, pool_size: int = 10, max_retries: int = 3, backoff_factor: float = 0.5,
+                 connect_timeout: float = 3.05, read_timeout: float = 20.0):
         """
-        Initialize the SerpAPIClient with the provided API key.
+        Initialize the SerpAPIClient with the provided API key and a pooled, keep-alive session.
 
         Parameters:
         -----------
         api_key : str
             The API key for authenticating with the SERP API.
+        pool_size : int, optional
+            Maximum number of connections kept alive to the SERP API (default is 10).
+        max_retries : int, optional
+            Number of retries for connection errors and 429/5xx responses (default is 3).
+        backoff_factor : float, optional
+            Exponential backoff factor between retries, in seconds (default is 0.5).
+        connect_timeout : float, optional
+            Timeout for establishing a connection, in seconds (default is 3.05).
+        read_timeout : float, optional
+            Timeout for reading the response, in seconds (default is 20.0).
         """
         self.api_key = api_key
         self.base_url = "https://serpapi.com/search.json"
+        self.timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False
+        )
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.limiter = get_limiter("serp")
 
     def __call__(self, query: str, engine: str = "google", location: str = "") -> Union[Dict[str, Any], Tuple[int, str]]:
         """
@@ -49,16 +81,187 @@ class SerpAPIClient:
         }
 
         try:
-            response = requests.get(self.base_url, params=params)
+            if self.limiter is not None:
+                self.limiter.acquire()
+            response = self.session.get(self.base_url, params=params, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
+        except RateLimited as e:
+            logger.error("Request to SERP API throttled: %s", e)
+            return 429, str(e)
         except requests.exceptions.RequestException as e:
-            logger.error(f"Request to SERP API failed: {e}")
-            return response.status_code, str(e)
+            logger.error("Request to SERP API failed: %s", e)
+            status_code = e.response.status_code if e.response is not None else 0
+            return status_code, str(e)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report connection reuse across the session's connection pools.
 
+        Returns:
+        --------
+        Dict[str, int]
+            Number of HTTP requests sent, connections opened, and requests served on a reused connection.
+        """
+        pools = self.adapter.poolmanager.pools
+        requests_sent = 0
+        connections_opened = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                requests_sent += pool.num_requests
+                connections_opened += pool.num_connections
+        return {
+            "requests": requests_sent,
+            "connections": connections_opened,
+            "reused": requests_sent - connections_opened
+        }
+
+_client: Optional[SerpAPIClient] = None
+_client_lock = threading.Lock()
+
+def get_client() -> SerpAPIClient:
+    """
+    Return the process-wide SERP client, creating it on first use from the `serp` section of the config.
+
+    Returns:
+    --------
+    SerpAPIClient
+        The shared client.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                settings = config.get('serp', {})
+                _client = SerpAPIClient(load_api_key(), **settings)
+    return _client
+
+def client_stats() -> Dict[str, int]:
+    """
+    Report connection reuse of the process-wide SERP client without creating it.
+
+    Returns:
+    --------
+    Dict[str, int]
+        The client's `stats()`, or zeros before the first search.
+    """
+    if _client is None:
+        return {"requests": 0, "connections": 0, "reused": 0}
+    return _client.stats()
+
+class AsyncSerpAPIClient:
+    """
+    An asyncio client for the SERP API, sharing one connection pool across concurrent searches.
+    """
+
+    def __init__(self, api_key: str, pool_size: int = 10, max_retries: int = 3, backoff_factor: float = 0.5,
+                 connect_timeout: float = 3.05, read_timeout: float = 20.0):
+        """
+        Initialize the AsyncSerpAPIClient with the provided API key and a pooled connection limit.
+
+        Parameters:
+        -----------
+        api_key : str
+            The API key for authenticating with the SERP API.
+        pool_size : int, optional
+            Maximum number of connections kept alive to the SERP API (default is 10).
+        max_retries : int, optional
+            Number of retries for failed connection attempts (default is 3).
+        backoff_factor : float, optional
+            Accepted for parity with `SerpAPIClient`; httpx retries connection errors without backoff.
+        connect_timeout : float, optional
+            Timeout for establishing a connection, in seconds (default is 3.05).
+        read_timeout : float, optional
+            Timeout for reading the response, in seconds (default is 20.0).
+        """
+        self.api_key = api_key
+        self.base_url = "https://serpapi.com/search.json"
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            transport=httpx.AsyncHTTPTransport(retries=max_retries)
+        )
+        self.limiter = get_limiter("serp")
+
+    async def __call__(self, query: str, engine: str = "google", location: str = "") -> Union[Dict[str, Any], Tuple[int, str]]:
+        """
+        Perform Google search using the SERP API without blocking the event loop.
+
+        Parameters:
+        -----------
+        query : str
+            The search query string.
+        engine : str, optional
+            The search engine to use (default is "google").
+        location : str, optional
+            The location for the search query (default is an empty string).
+
+        Returns:
+        --------
+        Union[Dict[str, Any], Tuple[int, str]]
+            The search results as a JSON dictionary if successful, or a tuple containing the HTTP status code
+            and error message if the request fails.
+        """
+        params = {
+            "engine": engine,
+            "q": query,
+            "api_key": self.api_key,
+            "location": location
+        }
+
+        try:
+            if self.limiter is not None:
+                await self.limiter.acquire_async()
+            response = await self.client.get(self.base_url, params=params)
+            response.raise_for_status()
+            return response.json()
+        except RateLimited as e:
+            logger.error("Request to SERP API throttled: %s", e)
+            return 429, str(e)
+        except httpx.HTTPStatusError as e:
+            logger.error("Request to SERP API failed: %s", e)
+            return e.response.status_code, str(e)
+        except httpx.HTTPError as e:
+            logger.error("Request to SERP API failed: %s", e)
+            return 0, str(e)
+
+    async def aclose(self) -> None:
+        """
+        Close the underlying connection pool.
+        """
+        await self.client.aclose()
+
+_async_client: Optional[AsyncSerpAPIClient] = None
+
+def get_async_client() -> AsyncSerpAPIClient:
+    """
+    Return the process-wide asynchronous SERP client, creating it on first use.
+
+    Returns:
+    --------
+    AsyncSerpAPIClient
+        The shared client.
+    """
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncSerpAPIClient(load_api_key(), **config.get('serp', {}))
+    return _async_client
+
+async def close_async_client() -> None:
+    """
+    Close the process-wide asynchronous SERP client, if one was created.
+    """
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+@lru_cache(maxsize=1)
 def load_api_key() -> str:
     """
     Load the API key from the credentials file. Dynamically checks possible locations.
+    The key is read once per process and cached.
 
     Returns:
     --------
@@ -78,7 +281,7 @@ def load_api_key() -> str:
     ]
     for path in possible_paths:
         if os.path.exists(path):
-            logger.info(f"Loading API key from credentials file at: {path}")
+            logger.info("Loading API key from credentials file at: %s", path)
             config = load_yaml(path)
             return config['serp']['key']
     logger.error("API credentials file not found in any default locations.")
@@ -126,15 +329,43 @@ def search(search_query: str, location: str = "") -> str:
     str
         A JSON string containing the top search results or an error message, with updated key names.
     """
-    # Load the API key
-    api_key = load_api_key()
+    # Perform the search with the shared, pooled client
+    results = get_client()(search_query, location=location)
+    return _format_response(results)
+
+async def search_async(search_query: str, location: str = "") -> str:
+    """
+    Asynchronous variant of `search`, using the shared `AsyncSerpAPIClient`.
+
+    Parameters:
+    -----------
+    search_query : str
+        The search query to be executed using the SERP API.
+    location : str, optional
+        The location to include in the search query (default is an empty string).
+
+    Returns:
+    --------
+    str
+        A JSON string containing the top search results or an error message, with updated key names.
+    """
+    results = await get_async_client()(search_query, location=location)
+    return _format_response(results)
 
-    # Initialize the SERP API client
-    serp_client = SerpAPIClient(api_key)
+def _format_response(results: Union[Dict[str, Any], Tuple[int, str]]) -> str:
+    """
+    Turn a raw SERP API result into the JSON string returned to the agent.
 
-    # Perform the search
-    results = serp_client(search_query, location=location)
+    Parameters:
+    -----------
+    results : Union[Dict[str, Any], Tuple[int, str]]
+        The search results, or a (status code, error message) tuple.
 
+    Returns:
+    --------
+    str
+        A JSON string containing the top search results or an error message.
+    """
     # Check if the search was successful
     if isinstance(results, dict):
         # Format and return the top search results as JSON with updated key names
@@ -1,9 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from src.utils.ratelimit import RateLimited
+from src.utils.ratelimit import get_limiter
 from src.config.logging import logger
+from src.config.setup import config
 from typing import Optional
+from typing import List
 import wikipediaapi
+import threading
+import asyncio
 import json
 
 
+class WikipediaClient:
+    """
+    A long-lived Wikipedia client sharing one pooled HTTP session across threads.
+    """
+
+    def __init__(self, user_agent: str = 'ReAct Agents (shankar.arunp@gmail.com)', language: str = 'en',
+                 pool_size: int = 10, max_workers: int = 8, timeout: float = 10.0):
+        """
+        Initializes the Wikipedia API wrapper and mounts a pooled adapter on its session.
+
+        Args:
+            user_agent (str): User agent sent with every request, as required by Wikipedia.
+            language (str): Wikipedia language edition.
+            pool_size (int): Maximum number of keep-alive connections to Wikipedia.
+            max_workers (int): Maximum number of pages fetched concurrently by `search_many`.
+            timeout (float): Request timeout in seconds.
+        """
+        self.wiki = wikipediaapi.Wikipedia(user_agent=user_agent, language=language, timeout=timeout)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.wiki._session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wiki")
+        self.limiter = get_limiter("wikipedia")
+
+    def search(self, query: str) -> Optional[str]:
+        """
+        Fetch Wikipedia information for a given search query and return it as JSON.
+
+        Args:
+            query (str): The search query string.
+
+        Returns:
+            Optional[str]: A JSON string containing the query, title, and summary, or None if no result is found.
+        """
+        try:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            logger.info("Searching Wikipedia for: %s", query)
+            page = self.wiki.page(query)
+
+            if page.exists():
+                # Create a dictionary with query, title, and summary
+                result = {
+                    "query": query,
+                    "title": page.title,
+                    "summary": page.summary
+                }
+                logger.info("Successfully retrieved summary for: %s", query)
+                return json.dumps(result, ensure_ascii=False, indent=2)
+            else:
+                logger.info("No results found for query: %s", query)
+                return None
+
+        except RateLimited as e:
+            logger.error("Wikipedia query throttled: %s", e)
+            return None
+
+        except Exception as e:
+            logger.exception("An error occurred while processing the Wikipedia query: %s", e)
+            return None
+
+    def search_many(self, queries: List[str]) -> List[Optional[str]]:
+        """
+        Fetch several pages concurrently.
+
+        Args:
+            queries (List[str]): The search query strings.
+
+        Returns:
+            List[Optional[str]]: One result per query, in the same order as `queries`.
+        """
+        return list(self.executor.map(self.search, queries))
+
+
+_client: Optional[WikipediaClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> WikipediaClient:
+    """
+    Returns the process-wide Wikipedia client, creating it on first use from the `wikipedia` section of the config.
+
+    Returns:
+        WikipediaClient: The shared client.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = WikipediaClient(**config.get('wikipedia', {}))
+    return _client
+
+
 def search(query: str) -> Optional[str]:
     """
     Fetch Wikipedia information for a given search query using Wikipedia-API and return as JSON.
@@ -14,38 +114,41 @@ def search(query: str) -> Optional[str]:
     Returns:
         Optional[str]: A JSON string containing the query, title, and summary, or None if no result is found.
     """
-    # Initialize Wikipedia API with a user agent
-    wiki = wikipediaapi.Wikipedia(user_agent='ReAct Agents (shankar.arunp@gmail.com)',
-                                  language='en')
-
-    try:
-        logger.info(f"Searching Wikipedia for: {query}")
-        page = wiki.page(query)
-
-        if page.exists():
-            # Create a dictionary with query, title, and summary
-            result = {
-                "query": query,
-                "title": page.title,
-                "summary": page.summary
-            }
-            logger.info(f"Successfully retrieved summary for: {query}")
-            return json.dumps(result, ensure_ascii=False, indent=2)
-        else:
-            logger.info(f"No results found for query: {query}")
-            return None
+    return get_client().search(query)
+
+
+def search_many(queries: List[str]) -> List[Optional[str]]:
+    """
+    Fetch Wikipedia information for several queries concurrently.
+
+    Args:
+        queries (List[str]): The search query strings.
+
+    Returns:
+        List[Optional[str]]: One JSON string (or None) per query, in the same order as `queries`.
+    """
+    return get_client().search_many(queries)
+
 
-    except Exception as e:
-        logger.exception(f"An error occurred while processing the Wikipedia query: {e}")
-        return None
+async def search_async(query: str) -> Optional[str]:
+    """
+    Asynchronous variant of `search`. Wikipedia-API only offers a blocking client, so the
+    lookup runs in the default executor to keep the event loop free.
+
+    Args:
+        query (str): The search query string.
+
+    Returns:
+        Optional[str]: A JSON string containing the query, title, and summary, or None if no result is found.
+    """
+    return await asyncio.to_thread(search, query)
 
 
 if __name__ == '__main__':
     queries = ["Geoffrey Hinton", "Demis Hassabis"]
 
-    for query in queries:
-        result = search(query)
+    for query, result in zip(queries, search_many(queries)):
         if result:
             print(f"JSON result for '{query}':\n{result}\n")
         else:
-            print(f"No result found for '{query}'\n")
\ No newline at end of file
+            print(f"No result found for '{query}'\n")
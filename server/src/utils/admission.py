@@ -0,0 +1,139 @@
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Optional
+from typing import Dict
+import threading
+import math
+import time
+
+
+class Rejected(Exception):
+    """
+    Raised when a request is not admitted.
+    """
+
+    def __init__(self, status: int, message: str, retry_after: int) -> None:
+        """
+        Args:
+            status (int): HTTP status to return (429 when the queue is full, 503 when the wait timed out).
+            message (str): Human readable reason.
+            retry_after (int): Suggested seconds before retrying.
+        """
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounds the number of agent runs in flight. Up to `max_concurrent` runs execute at once; up to
+    `max_queue` more wait for a slot for at most `queue_timeout` seconds. Anything beyond that is
+    rejected immediately so that bursts fail fast instead of slowing every run down together.
+    """
+
+    def __init__(self, max_concurrent: int = 32, max_queue: int = 64, queue_timeout: float = 10.0) -> None:
+        """
+        Initializes the controller.
+
+        Args:
+            max_concurrent (int): Maximum number of runs executing at once.
+            max_queue (int): Maximum number of requests waiting for a slot.
+            queue_timeout (float): Longest a request may wait for a slot, in seconds.
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiting = 0
+        self._average_duration = 10.0
+        self._stats = {"admitted": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+
+    def retry_after(self) -> int:
+        """
+        Estimates how long a rejected client should wait, from the average run duration and the queue depth.
+
+        Returns:
+            int: Seconds, at least 1.
+        """
+        return max(1, math.ceil(self._average_duration * (self._waiting + 1) / self.max_concurrent))
+
+    def acquire(self) -> float:
+        """
+        Waits for a run slot.
+
+        Returns:
+            float: The time the slot was granted, to be passed to `release()`.
+
+        Raises:
+            Rejected: If the queue is full (429) or no slot became free in time (503).
+        """
+        with self._lock:
+            if self._active >= self.max_concurrent and self._waiting >= self.max_queue:
+                self._stats["rejected_queue_full"] += 1
+                raise Rejected(429, "Too many requests queued", self.retry_after())
+            self._waiting += 1
+
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        with self._lock:
+            self._waiting -= 1
+            if not acquired:
+                self._stats["rejected_timeout"] += 1
+                raise Rejected(503, "Timed out waiting for capacity", self.retry_after())
+            self._active += 1
+            self._stats["admitted"] += 1
+        return time.perf_counter()
+
+    def release(self, started: float) -> None:
+        """
+        Frees a run slot and folds the run's duration into the Retry-After estimate.
+
+        Args:
+            started (float): The value returned by `acquire()`.
+        """
+        duration = time.perf_counter() - started
+        with self._lock:
+            self._active -= 1
+            self._average_duration = 0.9 * self._average_duration + 0.1 * duration
+        self._slots.release()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns queue depth, active runs and admission counters.
+
+        Returns:
+            Dict[str, float]: Admission metrics.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "active": self._active,
+                "queued": self._waiting,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "average_run_seconds": self._average_duration
+            })
+        return stats
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """
+    Returns the process-wide admission controller configured under `admission`.
+
+    Returns:
+        AdmissionController: The shared controller.
+    """
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                settings = config.get('admission', {})
+                logger.info("Initializing admission control: %s", settings)
+                _controller = AdmissionController(**settings)
+    return _controller
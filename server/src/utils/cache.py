@@ -0,0 +1,301 @@
+from src.config.logging import logger
+from collections import OrderedDict
+from typing import Optional
+from typing import Union
+from typing import Tuple
+from typing import Dict
+import threading
+import sqlite3
+import time
+import os
+
+
+class CacheStats:
+    """
+    Thread-safe hit/miss/eviction counters shared by the cache backends.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        """
+        Increments a counter.
+
+        Args:
+            name (str): The counter to increment.
+            amount (int): The increment.
+        """
+        with self._lock:
+            self._counts[name] += amount
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Returns a copy of the counters together with the hit rate.
+
+        Returns:
+            Dict[str, float]: Counter values and `hit_rate`.
+        """
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = counts["hits"] / lookups if lookups else 0.0
+        return counts
+
+
+class MemoryCache:
+    """
+    An in-process LRU cache bounded by the total size of its values in bytes, with per-entry TTLs.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024) -> None:
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_bytes (int): Upper bound on the summed UTF-8 size of cached values.
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, str, int]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Looks up a key, refreshing its LRU position on a hit.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[str]: The cached value, or None on a miss or an expired entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.incr("misses")
+                return None
+            expires_at, value, size = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                self.size -= size
+                self.stats.incr("expirations")
+                self.stats.incr("misses")
+                return None
+            self._entries.move_to_end(key)
+            self.stats.incr("hits")
+            return value
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        """
+        Stores a value, evicting least recently used entries until the size bound holds.
+
+        Args:
+            key (str): The cache key.
+            value (str): The value to cache.
+            ttl (float): Time to live in seconds.
+        """
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[2]
+            self._entries[key] = (time.time() + ttl, value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.stats.incr("evictions")
+
+
+class SQLiteCache:
+    """
+    An on-disk cache in a single SQLite file, bounded by total value size with LRU eviction and per-entry TTLs.
+
+    The database is opened on first use in each process. SQLite connections must not be used across
+    `fork()`, so a connection inherited from a parent process (e.g. a gunicorn master that imported
+    the app before forking its workers) is never reused: the child opens its own.
+
+    Neither lookups nor inserts scan the table on the hot path. The summed value size is kept as a
+    running total, re-read from the database every `RESYNC_SECONDS` since other processes may write
+    to the same file, and the access times that drive LRU eviction are buffered on hits and written
+    in one batch every `TOUCH_SECONDS` or `TOUCH_BATCH` hits, and before every eviction.
+    """
+
+    RESYNC_SECONDS = 60.0
+    TOUCH_SECONDS = 5.0
+    TOUCH_BATCH = 256
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024) -> None:
+        """
+        Initializes the cache without opening the database.
+
+        Args:
+            path (str): Path to the SQLite file.
+            max_bytes (int): Upper bound on the summed UTF-8 size of cached values.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._bytes = 0
+        self._synced_at = 0.0
+        self._touched: Dict[str, float] = {}
+        self._flushed_at = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Returns this process's connection, opening (or creating) the database on first use.
+        Must be called with the lock held.
+
+        Returns:
+            sqlite3.Connection: The connection, shared by the threads of this process.
+        """
+        pid = os.getpid()
+        if self._conn is not None and self._pid == pid:
+            return self._conn
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # An inherited connection is dropped without closing it, since closing it could touch
+        # state the parent process still uses
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+        conn.commit()
+        self._conn = conn
+        self._pid = pid
+        self._touched = {}
+        self._resync(conn, time.time())
+        logger.info("Opened SQLite cache at %s in process %d", self.path, pid)
+        return conn
+
+    def _resync(self, conn: sqlite3.Connection, now: float) -> None:
+        """
+        Re-reads the summed value size, which other processes sharing the file may have changed.
+        """
+        self._bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self._synced_at = now
+
+    def _flush(self, conn: sqlite3.Connection, now: float) -> None:
+        """
+        Writes the buffered access times. Must be called with the lock held; the caller commits.
+        """
+        if self._touched:
+            conn.executemany("UPDATE entries SET accessed_at = ? WHERE key = ?",
+                             [(accessed_at, key) for key, accessed_at in self._touched.items()])
+            self._touched = {}
+        self._flushed_at = now
+
+    @property
+    def size(self) -> int:
+        """
+        Returns the summed size of all stored values in bytes, as of the last resync.
+        """
+        with self._lock:
+            self._connection()
+            return self._bytes
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Looks up a key, refreshing its LRU position on a hit.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[str]: The cached value, or None on a miss or an expired entry.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT value, size, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats.incr("misses")
+                return None
+            value, size, expires_at = row
+            if expires_at < now:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                conn.commit()
+                self._touched.pop(key, None)
+                self._bytes -= size
+                self.stats.incr("expirations")
+                self.stats.incr("misses")
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= self.TOUCH_BATCH or now - self._flushed_at >= self.TOUCH_SECONDS:
+                self._flush(conn, now)
+                conn.commit()
+            self.stats.incr("hits")
+            return value
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        """
+        Stores a value, evicting least recently used entries until the size bound holds.
+
+        Args:
+            key (str): The cache key.
+            value (str): The value to cache.
+            ttl (float): Time to live in seconds.
+        """
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            if now - self._synced_at >= self.RESYNC_SECONDS:
+                self._resync(conn, now)
+            previous = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now + ttl, now)
+            )
+            self._touched.pop(key, None)
+            self._bytes += size - (previous[0] if previous is not None else 0)
+            if self._bytes > self.max_bytes:
+                # Evict by up-to-date access times
+                self._flush(conn, now)
+            while self._bytes > self.max_bytes:
+                victim = conn.execute(
+                    "SELECT key, size FROM entries WHERE key != ? ORDER BY accessed_at LIMIT 1", (key,)
+                ).fetchone()
+                if victim is None:
+                    break
+                conn.execute("DELETE FROM entries WHERE key = ?", (victim[0],))
+                self._bytes -= victim[1]
+                self.stats.incr("evictions")
+            conn.commit()
+
+
+def create_cache(settings: Dict) -> Union[MemoryCache, SQLiteCache]:
+    """
+    Builds a cache backend from a config section.
+
+    Args:
+        settings (Dict): Section with `backend` ("memory" or "sqlite"), `max_bytes` and, for SQLite, `path`.
+
+    Returns:
+        Union[MemoryCache, SQLiteCache]: The configured backend.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    backend = settings.get("backend", "memory")
+    if backend == "memory":
+        return MemoryCache(max_bytes=settings.get("max_bytes", 64 * 1024 * 1024))
+    if backend == "sqlite":
+        return SQLiteCache(settings["path"], max_bytes=settings.get("max_bytes", 512 * 1024 * 1024))
+    raise ValueError(f"Unknown cache backend: {backend}")
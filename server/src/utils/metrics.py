@@ -0,0 +1,252 @@
+from prometheus_client.core import CounterMetricFamily
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import CollectorRegistry
+from prometheus_client import generate_latest
+from prometheus_client import multiprocess
+from prometheus_client import Histogram
+from prometheus_client import Counter
+from prometheus_client import REGISTRY
+from prometheus_client import Gauge
+from src.config.logging import logger
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+from typing import Dict
+from typing import Any
+import threading
+import os
+
+
+# With several gunicorn workers each process writes its samples to files in this directory, and a
+# scrape of any worker aggregates all of them. It must be set before prometheus_client is imported,
+# which gunicorn.conf.py does.
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# How often each worker copies the stats of its caches and admission controller into the shared files
+SYNC_SECONDS = 5.0
+
+
+# Agent runs take seconds to minutes; model and tool calls take tens of milliseconds to tens of seconds
+RUN_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 90, 120, 180)
+CALL_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30)
+SIZE_BUCKETS = (256, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072, 262144)
+
+REQUEST_SECONDS = Histogram(
+    "agent_request_seconds", "End-to-end latency of HTTP requests.",
+    ["endpoint", "status"], buckets=RUN_BUCKETS
+)
+RUN_SECONDS = Histogram(
+    "agent_run_seconds", "Duration of a full agent run.", buckets=RUN_BUCKETS
+)
+RUN_ITERATIONS = Histogram(
+    "agent_run_iterations", "Reasoning iterations per query.", buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+)
+STEP_SECONDS = Histogram(
+    "agent_step_seconds", "Duration of a single reasoning step.", ["state"], buckets=CALL_BUCKETS
+)
+GEMINI_SECONDS = Histogram(
+    "gemini_call_seconds", "Latency of Gemini calls that reached the model.", ["method"], buckets=CALL_BUCKETS
+)
+GEMINI_ERRORS = Counter(
+    "gemini_errors", "Failed Gemini calls.", ["method"]
+)
+GEMINI_PROMPT_CHARS = Histogram(
+    "gemini_prompt_chars", "Size of prompts sent to Gemini, in characters.", buckets=SIZE_BUCKETS
+)
+GEMINI_RESPONSE_CHARS = Histogram(
+    "gemini_response_chars", "Size of Gemini responses, in characters.", buckets=SIZE_BUCKETS
+)
+GEMINI_TOKENS = Counter(
+    "gemini_tokens", "Tokens reported by Gemini usage metadata.", ["kind"]
+)
+TOOL_SECONDS = Histogram(
+    "tool_call_seconds", "Latency of tool calls that missed the cache.", ["tool"], buckets=CALL_BUCKETS
+)
+TOOL_CALLS = Counter(
+    "tool_calls", "Tool calls by outcome (ok, error or cached).", ["tool", "outcome"]
+)
+OUTPUT_PARSES = Counter(
+    "agent_output_parses", "Structured model outputs by parse outcome (clean, repaired or failed).", ["outcome"]
+)
+ROUTER_DECISIONS = Counter(
+    "agent_router_decisions", "Pre-loop routing decisions by route (answer, tool or agent) and source.", ["route", "source"]
+)
+
+
+def tool_outcome(result: Any) -> str:
+    """
+    Classifies a tool result for the `tool_calls` counter.
+
+    Args:
+        result (Any): The value returned by the tool, or the exception it raised.
+
+    Returns:
+        str: `error` for exceptions and error payloads, otherwise `ok`.
+    """
+    if isinstance(result, Exception) or (isinstance(result, str) and result.startswith('{"error"')):
+        return "error"
+    return "ok"
+
+
+CACHE_COUNTERS = ("hits", "misses", "evictions", "expirations")
+
+
+class StatsCollector:
+    """
+    Exposes the counters that components already keep in their `stats()` dicts (cache tiers,
+    admission control) as Prometheus metrics, read at scrape time instead of on the hot path.
+
+    In multiprocess mode a scrape only reaches one worker, so each worker instead copies its
+    stats into multiprocess metrics every `SYNC_SECONDS` (and the scraped worker right before
+    rendering): cache counters become counters summed over all workers, including exited ones,
+    and gauges are summed over live workers, except for per-process values such as averages and
+    cache sizes, which are reported per `pid`.
+    """
+
+    def __init__(self) -> None:
+        self._caches: Dict[str, Callable[[], Dict[str, Dict[str, float]]]] = {}
+        self._gauges: Dict[str, Callable[[], Dict[str, float]]] = {}
+        self._per_process: Dict[str, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Any] = {}
+        self._synced: Dict[Tuple[str, ...], float] = {}
+        self._sync_pid: Optional[int] = None
+
+    def add_cache(self, name: str, stats: Callable[[], Dict[str, Dict[str, float]]]) -> None:
+        """
+        Registers a cache.
+
+        Args:
+            name (str): Value of the `cache` label.
+            stats (Callable[[], Dict[str, Dict[str, float]]]): Returns counters keyed by tier name.
+        """
+        self._caches[name] = stats
+
+    def add_gauges(self, prefix: str, stats: Callable[[], Dict[str, float]], per_process: Iterable[str] = ()) -> None:
+        """
+        Registers a flat stats dict whose numeric values are exported as gauges named `<prefix>_<key>`.
+
+        Args:
+            prefix (str): Metric name prefix.
+            stats (Callable[[], Dict[str, float]]): Returns the current values.
+            per_process (Iterable[str]): Keys that are meaningless when summed over workers
+                (averages, ratios); in multiprocess mode they are reported per `pid`.
+        """
+        self._gauges[prefix] = stats
+        self._per_process[prefix] = tuple(per_process)
+
+    def collect(self) -> Iterator[Any]:
+        """
+        Builds the metric families for the current scrape.
+        """
+        counters = {
+            name: CounterMetricFamily(f"agent_cache_{name}", f"Cache {name} by cache and tier.", labels=["cache", "tier"])
+            for name in ("hits", "misses", "evictions", "expirations")
+        }
+        hit_rate = GaugeMetricFamily("agent_cache_hit_ratio", "Cache hit ratio since start.", labels=["cache", "tier"])
+        size = GaugeMetricFamily("agent_cache_bytes", "Bytes held by the cache.", labels=["cache", "tier"])
+        for cache, stats in self._caches.items():
+            for tier, values in stats().items():
+                labels = [cache, tier]
+                for name, family in counters.items():
+                    family.add_metric(labels, values.get(name, 0))
+                hit_rate.add_metric(labels, values.get("hit_rate", 0.0))
+                size.add_metric(labels, values.get("bytes", 0))
+        yield from counters.values()
+        yield hit_rate
+        yield size
+
+        for prefix, stats in self._gauges.items():
+            for key, value in stats().items():
+                if isinstance(value, (int, float)):
+                    yield GaugeMetricFamily(f"{prefix}_{key}", f"{prefix} {key}.", value=value)
+
+    def _metric(self, kind: type, name: str, documentation: str, labels: Iterable[str] = (), mode: str = "livesum") -> Any:
+        """
+        Returns the multiprocess metric with a name, creating it on first use.
+        """
+        metric = self._metrics.get(name)
+        if metric is None:
+            if kind is Gauge:
+                metric = Gauge(name, documentation, list(labels), multiprocess_mode=mode)
+            else:
+                metric = kind(name, documentation, list(labels))
+            self._metrics[name] = metric
+        return metric
+
+    def sync(self) -> None:
+        """
+        Copies the current stats of this process into the multiprocess metrics.
+        """
+        with self._lock:
+            for cache, stats in list(self._caches.items()):
+                for tier, values in stats().items():
+                    labels = (cache, tier)
+                    for name in CACHE_COUNTERS:
+                        counter = self._metric(Counter, f"agent_cache_{name}", f"Cache {name} by cache and tier.", ["cache", "tier"])
+                        # Counters only move forward, by what this process added since the last sync
+                        key = (name, *labels)
+                        value = values.get(name, 0)
+                        if value > self._synced.get(key, 0):
+                            counter.labels(*labels).inc(value - self._synced.get(key, 0))
+                            self._synced[key] = value
+                    self._metric(Gauge, "agent_cache_hit_ratio", "Cache hit ratio since start.", ["cache", "tier"], "liveall") \
+                        .labels(*labels).set(values.get("hit_rate", 0.0))
+                    # Per pid: memory tiers add up across workers, but SQLite tiers share one file
+                    self._metric(Gauge, "agent_cache_bytes", "Bytes held by the cache.", ["cache", "tier"], "liveall") \
+                        .labels(*labels).set(values.get("bytes", 0))
+            for prefix, stats in list(self._gauges.items()):
+                for key, value in stats().items():
+                    if isinstance(value, (int, float)):
+                        mode = "liveall" if key in self._per_process[prefix] else "livesum"
+                        self._metric(Gauge, f"{prefix}_{key}", f"{prefix} {key}.", mode=mode).set(value)
+
+    def start(self) -> None:
+        """
+        Starts syncing this process's stats in the background, once per process. Does nothing
+        outside multiprocess mode, where stats are read at scrape time.
+        """
+        if not MULTIPROCESS:
+            return
+        with self._lock:
+            if self._sync_pid == os.getpid():
+                return
+            # A forked worker starts from its own, empty stats
+            self._sync_pid = os.getpid()
+            self._synced = {}
+        threading.Thread(target=self._run, name="metrics-sync", daemon=True).start()
+
+    def _run(self) -> None:
+        pid = os.getpid()
+        event = threading.Event()
+        while self._sync_pid == pid:
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error("Error syncing metrics: %s", e)
+            event.wait(SYNC_SECONDS)
+
+
+collector = StatsCollector()
+if not MULTIPROCESS:
+    REGISTRY.register(collector)
+
+
+def render() -> Tuple[bytes, str]:
+    """
+    Renders every registered metric in the Prometheus text format. In multiprocess mode the
+    samples of all workers are aggregated.
+
+    Returns:
+        Tuple[bytes, str]: The response body and its content type.
+    """
+    if not MULTIPROCESS:
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+    collector.start()
+    collector.sync()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
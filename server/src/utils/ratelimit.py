@@ -0,0 +1,144 @@
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Optional
+from typing import Dict
+import threading
+import asyncio
+import time
+
+
+class RateLimited(Exception):
+    """
+    Raised when a call would have to wait longer than the limiter's `max_wait` for a token.
+    """
+
+    def __init__(self, message: str, retry_after: float = 1.0) -> None:
+        """
+        Args:
+            message (str): Human readable reason.
+            retry_after (float): Seconds until the limiter would have a token again.
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket shared by every agent that calls the same upstream.
+
+    Callers reserve a token and then wait out the returned delay, so concurrent callers are
+    spaced evenly instead of all retrying at once. The reservation works the same way for
+    threads (`acquire`) and coroutines (`acquire_async`).
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, max_wait: float = 30.0) -> None:
+        """
+        Initializes a full bucket.
+
+        Args:
+            name (str): The upstream the bucket protects, used in logs and stats.
+            rate (float): Tokens added per second.
+            burst (int): Bucket capacity.
+            max_wait (float): Longest a caller may wait for a token before being rejected.
+        """
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {"granted": 0, "delayed": 0, "rejected": 0, "wait_seconds": 0.0}
+
+    def reserve(self) -> float:
+        """
+        Takes a token, possibly borrowing against future refills.
+
+        Returns:
+            float: Seconds the caller must wait before using the token.
+
+        Raises:
+            RateLimited: If the wait would exceed `max_wait`; no token is taken in that case.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            delay = max(0.0, (1.0 - self._tokens) / self.rate)
+            if delay > self.max_wait:
+                self._stats["rejected"] += 1
+                raise RateLimited(f"Rate limit for {self.name} exceeded; next slot in {delay:.1f}s", retry_after=delay)
+            self._tokens -= 1.0
+            self._stats["granted"] += 1
+            if delay > 0:
+                self._stats["delayed"] += 1
+                self._stats["wait_seconds"] += delay
+            return delay
+
+    def acquire(self) -> None:
+        """
+        Blocks the calling thread until a token is available.
+
+        Raises:
+            RateLimited: If the wait would exceed `max_wait`.
+        """
+        delay = self.reserve()
+        if delay > 0:
+            logger.info("Rate limiting %s: waiting %.2fs", self.name, delay)
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """
+        Waits for a token without blocking the event loop.
+
+        Raises:
+            RateLimited: If the wait would exceed `max_wait`.
+        """
+        delay = self.reserve()
+        if delay > 0:
+            logger.info("Rate limiting %s: waiting %.2fs", self.name, delay)
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns grant, delay and rejection counters and the current token level.
+
+        Returns:
+            Dict[str, float]: Limiter metrics.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["tokens"] = self._tokens
+        return stats
+
+
+_limiters: Dict[str, Optional[TokenBucket]] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str) -> Optional[TokenBucket]:
+    """
+    Returns the process-wide limiter for an upstream, configured under `limits.<name>`.
+
+    Args:
+        name (str): The upstream name (`gemini`, `serp` or `wikipedia`).
+
+    Returns:
+        Optional[TokenBucket]: The shared limiter, or None if the upstream is not limited.
+    """
+    if name not in _limiters:
+        with _limiters_lock:
+            if name not in _limiters:
+                settings = config.get('limits', {}).get(name)
+                _limiters[name] = TokenBucket(name, **settings) if settings else None
+    return _limiters[name]
+
+
+def limiter_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Returns the stats of every limiter created so far.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Limiter metrics keyed by upstream name.
+    """
+    return {name: limiter.stats() for name, limiter in list(_limiters.items()) if limiter is not None}
@@ -0,0 +1,256 @@
+from src.config.logging import logger
+from src.config.setup import config
+from collections import defaultdict
+from collections import deque
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Any
+import threading
+import hashlib
+import asyncio
+import json
+import time
+import os
+
+
+RECORD = "record"
+REPLAY = "replay"
+
+# Entry kinds: a query arriving at the agent, a Gemini call and a tool call
+QUERY = "query"
+GEMINI = "gemini"
+TOOL = "tool"
+
+
+class ReplayMiss(Exception):
+    """
+    Raised when a replayed run makes a call that was never recorded.
+    """
+
+
+class RecordedFailure(Exception):
+    """
+    Raised when a replayed call failed when it was recorded. `response` holds whatever the call
+    returned before it failed, e.g. the chunks of an interrupted stream.
+    """
+
+    def __init__(self, message: str, response: Optional[str] = None) -> None:
+        super().__init__(message)
+        self.response = response
+
+
+def request_key(kind: str, name: str, request: str) -> str:
+    """
+    Identifies a call by what was asked, so replayed runs find the response their prompt received.
+
+    Args:
+        kind (str): The entry kind, e.g. `gemini` or `tool`.
+        name (str): The model or tool name.
+        request (str): The prompt text or tool input.
+
+    Returns:
+        str: A short hex digest.
+    """
+    return hashlib.sha256(f"{kind}\x00{name}\x00{request}".encode("utf-8")).hexdigest()[:32]
+
+
+class ReplayLog:
+    """
+    Records the upstream calls of real agent runs to an append-only JSON lines file, or serves
+    them back in place of the upstreams.
+
+    Each line holds one call that reached an upstream (cache hits are not recorded): its kind, a
+    digest of the request, the response, how long the call took and, if it failed, why. Prompts
+    are stored only as a digest and a size, which keeps the log compact; tool inputs and queries
+    are small and are stored as is. Responses are matched by request, so a replayed run gets the
+    same answers as long as its prompts are built the same way. Repeated requests are served in
+    recorded order, the last one repeating once they are used up.
+    """
+
+    def __init__(self, path: str, mode: str, time_scale: float = 1.0) -> None:
+        """
+        Opens the log.
+
+        Args:
+            path (str): Location of the JSON lines file.
+            mode (str): `record` to append calls to the log, `replay` to serve calls from it.
+            time_scale (float): Multiplier applied to recorded durations when replaying; 0 serves
+                responses immediately, 1 reproduces the original timings.
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown replay mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.time_scale = time_scale
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._entries: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._queries: List[Dict[str, Any]] = []
+        self._stats = {"recorded": 0, "served": 0, "misses": 0}
+        self._file = None
+        if mode == RECORD:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8")
+        else:
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8") as log:
+            for line in log:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry["kind"] == QUERY:
+                    self._queries.append(entry)
+                else:
+                    self._entries[entry["key"]].append(entry)
+        logger.info("Loaded %d queries and %d calls from %s", len(self._queries), sum(map(len, self._entries.values())), self.path)
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._stats["recorded"] += 1
+
+    def record_query(self, query: str) -> None:
+        """
+        Records a query arriving at the agent, with its offset from the start of the recording.
+
+        Args:
+            query (str): The user query.
+        """
+        if self.mode != RECORD:
+            return
+        self._append({"kind": QUERY, "at": round(time.time() - self._started, 4), "request": query})
+
+    def record(self, kind: str, name: str, request: str, response: Optional[str], seconds: float,
+               error: Optional[str] = None) -> None:
+        """
+        Records one upstream call.
+
+        Args:
+            kind (str): `gemini` or `tool`.
+            name (str): The model or tool name.
+            request (str): The prompt text or tool input.
+            response (Optional[str]): What the call returned; for a failed call, None or the part
+                returned before it failed.
+            seconds (float): How long the call took.
+            error (Optional[str]): Why the call failed, if it did.
+        """
+        entry = {"kind": kind, "name": name, "key": request_key(kind, name, request), "seconds": round(seconds, 4)}
+        # Prompts are large and fully determined by the query and earlier responses, so only their size is kept
+        if kind == GEMINI:
+            entry["request_chars"] = len(request)
+        else:
+            entry["request"] = request
+        entry["response"] = response
+        if error is not None:
+            entry["error"] = error
+        self._append(entry)
+
+    def _take(self, kind: str, name: str, request: str) -> Dict[str, Any]:
+        key = request_key(kind, name, request)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self._stats["misses"] += 1
+                raise ReplayMiss(f"No recorded {kind} call for {name}")
+            entry = entries.popleft() if len(entries) > 1 else entries[0]
+            self._stats["served"] += 1
+        return entry
+
+    @staticmethod
+    def _response(entry: Dict[str, Any]) -> Optional[str]:
+        if "error" in entry:
+            raise RecordedFailure(entry["error"], entry["response"])
+        return entry["response"]
+
+    def play(self, kind: str, name: str, request: str) -> Optional[str]:
+        """
+        Serves a recorded call, waiting for its scaled duration first.
+
+        Args:
+            kind (str): `gemini` or `tool`.
+            name (str): The model or tool name.
+            request (str): The prompt text or tool input.
+
+        Returns:
+            Optional[str]: The recorded response.
+
+        Raises:
+            ReplayMiss: If the call was never recorded.
+            RecordedFailure: If the call failed when it was recorded.
+        """
+        entry = self._take(kind, name, request)
+        if self.time_scale:
+            time.sleep(entry["seconds"] * self.time_scale)
+        return self._response(entry)
+
+    async def play_async(self, kind: str, name: str, request: str) -> Optional[str]:
+        """
+        Serves a recorded call without blocking the event loop.
+        """
+        entry = self._take(kind, name, request)
+        if self.time_scale:
+            await asyncio.sleep(entry["seconds"] * self.time_scale)
+        return self._response(entry)
+
+    def queries(self) -> Iterator[Tuple[float, str]]:
+        """
+        Returns the recorded queries with their arrival offsets, scaled like call durations.
+
+        Returns:
+            Iterator[Tuple[float, str]]: Offset in seconds from the first query, and the query.
+        """
+        if not self._queries:
+            return iter(())
+        origin = self._queries[0]["at"]
+        return iter([((entry["at"] - origin) * self.time_scale, entry["request"]) for entry in self._queries])
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns how many calls were recorded, served and missed.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self) -> None:
+        if self._file is not None:
+            with self._lock:
+                self._file.close()
+                self._file = None
+
+
+_replay: Optional[ReplayLog] = None
+_replay_lock = threading.Lock()
+
+
+def get_replay() -> Optional[ReplayLog]:
+    """
+    Returns the process-wide replay log configured under `replay`, or None if it is off.
+
+    Returns:
+        Optional[ReplayLog]: The shared replay log.
+    """
+    global _replay
+    settings = config.get('replay', {})
+    mode = settings.get('mode') or 'off'
+    if mode == 'off':
+        return None
+    if _replay is None:
+        with _replay_lock:
+            if _replay is None:
+                logger.info("Replay log in %s mode at %s", mode, settings.get('path'))
+                _replay = ReplayLog(settings.get('path', 'logs/replay.jsonl'), mode, settings.get('time_scale', 1.0))
+    return _replay
@@ -0,0 +1,252 @@
+from opentelemetry.sdk.trace.export import SpanExportResult
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.trace.export import SpanExporter
+from opentelemetry.sdk.trace import SpanProcessor
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.resources import Resource
+from opentelemetry import context as otel_context
+from src.config.logging import logger
+from src.config.setup import config
+from opentelemetry import trace
+from typing import Sequence
+from typing import Callable
+from typing import Optional
+from typing import TypeVar
+from typing import Dict
+from typing import List
+from typing import Any
+import threading
+import os
+
+
+T = TypeVar("T")
+
+
+class JSONFileSpanExporter(SpanExporter):
+    """
+    Appends finished spans to a local file, one OTLP-style JSON object per line, so traces can be
+    inspected or loaded into a viewer without running a collector.
+
+    The file is rotated once it reaches `max_bytes`, keeping `backup_count` old files, so the
+    exporter's disk usage is bounded. It is opened on first export in each process; a `{pid}` in
+    the path gives every process (e.g. each gunicorn worker) a file of its own to rotate.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, backup_count: int = 3) -> None:
+        """
+        Initializes the exporter without opening the file.
+
+        Args:
+            path (str): Location of the JSON lines file, optionally containing `{pid}`.
+            max_bytes (int): Size at which the file is rotated.
+            backup_count (int): Number of rotated files kept (`<path>.1` is the newest).
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _open(self) -> None:
+        """
+        Opens this process's output file for appending. Must be called with the lock held.
+        """
+        pid = os.getpid()
+        if self._file is not None and self._pid == pid:
+            return
+        path = self.path.replace("{pid}", str(pid))
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._pid = pid
+
+    def _rotate(self) -> None:
+        """
+        Moves the current file to `<path>.1`, shifting older files up and dropping the oldest.
+        """
+        path = self._file.name
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{path}.{index}"):
+                os.replace(f"{path}.{index}", f"{path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(span.to_json(indent=None) + "\n" for span in spans)
+        with self._lock:
+            self._open()
+            if self._file.tell() and self._file.tell() + len(lines) > self.max_bytes:
+                self._rotate()
+            self._file.write(lines)
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class TimelineRecorder(SpanProcessor):
+    """
+    Keeps the spans of watched traces in memory so a finished run can report where its time went.
+    Traces that are not watched are ignored, so runs that do not ask for a timeline cost nothing here.
+    """
+
+    def __init__(self, max_traces: int = 256) -> None:
+        """
+        Args:
+            max_traces (int): Maximum number of traces watched at once; the oldest is dropped beyond that,
+                so runs that fail before collecting their timeline cannot leak memory.
+        """
+        self.max_traces = max_traces
+        self._spans: Dict[int, List[ReadableSpan]] = {}
+        self._lock = threading.Lock()
+
+    def watch(self, trace_id: int) -> None:
+        """
+        Starts collecting the spans of a trace.
+
+        Args:
+            trace_id (int): The trace to collect.
+        """
+        with self._lock:
+            self._spans.setdefault(trace_id, [])
+            if len(self._spans) > self.max_traces:
+                self._spans.pop(next(iter(self._spans)))
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        with self._lock:
+            spans = self._spans.get(trace_id)
+            if spans is not None:
+                spans.append(span)
+
+    def collect(self, trace_id: int) -> List[ReadableSpan]:
+        """
+        Stops collecting a trace and returns its finished spans.
+
+        Args:
+            trace_id (int): The trace to collect.
+
+        Returns:
+            List[ReadableSpan]: The spans that ended while the trace was watched.
+        """
+        with self._lock:
+            return self._spans.pop(trace_id, [])
+
+
+def setup_tracing() -> trace.Tracer:
+    """
+    Builds the tracer configured under `tracing`. Spans are kept for per-request timelines and, when
+    `tracing.path` is set, exported in the background to a rotated JSON lines file; with tracing
+    disabled a no-op tracer is returned.
+
+    Returns:
+        trace.Tracer: The tracer used by the agent, model client and tools.
+    """
+    settings = config.get('tracing', {})
+    if not settings.get('enabled', False):
+        return trace.NoOpTracer()
+
+    provider = TracerProvider(resource=Resource.create({"service.name": "react-agent"}))
+    provider.add_span_processor(recorder)
+    path = settings.get('path')
+    if path:
+        logger.info("Exporting spans to %s", path)
+        exporter = JSONFileSpanExporter(
+            path,
+            max_bytes=settings.get('max_bytes', 50 * 1024 * 1024),
+            backup_count=settings.get('backup_count', 3)
+        )
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+    return provider.get_tracer("src.react")
+
+
+recorder = TimelineRecorder()
+tracer = setup_tracing()
+
+
+def annotate(**attributes: Any) -> None:
+    """
+    Sets attributes on the current span, if one is recording.
+    """
+    span = trace.get_current_span()
+    if span.is_recording():
+        span.set_attributes(attributes)
+
+
+def current_trace_id() -> Optional[int]:
+    """
+    Returns the id of the trace the caller is running in.
+
+    Returns:
+        Optional[int]: The trace id, or None when no span is recording.
+    """
+    span = trace.get_current_span()
+    return span.get_span_context().trace_id if span.is_recording() else None
+
+
+def in_context(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Binds a function to the current trace context so spans it starts on a worker thread are
+    parented to the caller's span rather than starting a new trace.
+
+    Args:
+        func (Callable[..., T]): The function to run on another thread.
+
+    Returns:
+        Callable[..., T]: A wrapper that runs `func` inside the captured context.
+    """
+    ctx = otel_context.get_current()
+
+    def run(*args: Any, **kwargs: Any) -> T:
+        token = otel_context.attach(ctx)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            otel_context.detach(token)
+    return run
+
+
+def waterfall(spans: List[ReadableSpan]) -> List[Dict[str, Any]]:
+    """
+    Turns the spans of one run into a timeline ordered by start time.
+
+    Args:
+        spans (List[ReadableSpan]): The finished spans of a trace.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per span with its nesting depth, its offset from the start
+        of the run and its duration in milliseconds, and its attributes.
+    """
+    if not spans:
+        return []
+    parents = {span.context.span_id: span.parent.span_id if span.parent else None for span in spans}
+
+    def depth(span_id: int) -> int:
+        level = 0
+        while parents.get(span_id) in parents:
+            span_id = parents[span_id]
+            level += 1
+        return level
+
+    origin = min(span.start_time for span in spans)
+    return [
+        {
+            "name": span.name,
+            "depth": depth(span.context.span_id),
+            "start_ms": round((span.start_time - origin) / 1e6, 3),
+            "duration_ms": round((span.end_time - span.start_time) / 1e6, 3),
+            "attributes": dict(span.attributes or {})
+        }
+        for span in sorted(spans, key=lambda span: span.start_time)
+    ]
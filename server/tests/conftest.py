@@ -0,0 +1,6 @@
+import os
+import sys
+
+
+# Tests import the service the way the app does, relative to the server directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,42 @@
+from src.utils.cache import SQLiteCache
+import sqlite3
+
+
+def cache(tmp_path, max_bytes: int = 100) -> SQLiteCache:
+    return SQLiteCache(str(tmp_path / "cache.db"), max_bytes=max_bytes)
+
+
+def test_size_is_kept_as_a_running_total(tmp_path):
+    disk = cache(tmp_path)
+    disk.set("a", "x" * 10, ttl=60)
+    disk.set("b", "x" * 20, ttl=60)
+    disk.set("a", "x" * 5, ttl=60)
+    assert disk.size == 25
+    with sqlite3.connect(disk.path) as conn:
+        assert conn.execute("SELECT SUM(size) FROM entries").fetchone()[0] == 25
+
+
+def test_hits_are_written_in_batches(tmp_path):
+    disk = cache(tmp_path)
+    disk.set("a", "x", ttl=60)
+    disk.get("a")
+    disk.get("a")
+    assert list(disk._touched) == ["a"]
+
+
+def test_eviction_uses_buffered_access_times(tmp_path):
+    disk = cache(tmp_path, max_bytes=30)
+    disk.set("a", "x" * 10, ttl=60)
+    disk.set("b", "x" * 10, ttl=60)
+    disk.get("a")
+    disk.set("c", "x" * 15, ttl=60)
+    assert disk.get("a") is not None
+    assert disk.get("b") is None
+    assert disk.size == 25
+
+
+def test_expired_entries_are_removed_from_the_total(tmp_path):
+    disk = cache(tmp_path)
+    disk.set("a", "x" * 10, ttl=-1)
+    assert disk.get("a") is None
+    assert disk.size == 0
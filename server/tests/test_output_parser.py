@@ -0,0 +1,60 @@
+from src.react.output_parser import parse_json_output
+from src.react.output_parser import extract_object
+from src.react.output_parser import repair
+import pytest
+
+
+def test_clean_output_is_parsed_directly():
+    assert parse_json_output('{"thought": "t", "answer": "a"}') == {"thought": "t", "answer": "a"}
+
+
+@pytest.mark.parametrize("text", [
+    '```json\n{"thought": "t", "answer": "a"}\n```',
+    '```\n{"thought": "t", "answer": "a"}\n```',
+    'Here is my reply:\n{"thought": "t", "answer": "a"}',
+    '{"thought": "t", "answer": "a"}\nLet me know if you need more.',
+    '{"thought": "t", "answer": "a",}',
+    '{"thought": "t",\n "answer": "a" , \n}'
+])
+def test_common_defects_are_repaired(text):
+    assert parse_json_output(text) == {"thought": "t", "answer": "a"}
+
+
+def test_trailing_commas_in_nested_values_are_dropped():
+    text = '{"thought": "t", "actions": [{"name": "google", "input": "x",},],}'
+    assert parse_json_output(text) == {"thought": "t", "actions": [{"name": "google", "input": "x"}]}
+
+
+def test_commas_and_brackets_inside_strings_are_kept():
+    text = '{"thought": "a, b}", "answer": "see [1], {2},"} trailing'
+    assert parse_json_output(text) == {"thought": "a, b}", "answer": "see [1], {2},"}
+
+
+def test_escaped_quotes_do_not_end_a_string():
+    text = 'prose {"answer": "he said \\"hi,\\" and left",}'
+    assert parse_json_output(text) == {"answer": 'he said "hi," and left'}
+
+
+@pytest.mark.parametrize("text", [
+    '{"answer": "The oldest tree is',
+    '{"thought": "done", "answer": "The oldest tree is"',
+    '```json\n{"answer": "The oldest tree is',
+    '{"thought": "look", "action": {"name": "google", "input": "x"',
+    '{"answer": "ends with an escape \\'
+])
+def test_truncated_output_is_rejected(text):
+    assert parse_json_output(text) is None
+
+
+@pytest.mark.parametrize("text", [None, "", "No response from Gemini", "[1, 2]", "{not json}"])
+def test_unrecoverable_output_is_rejected(text):
+    assert parse_json_output(text) is None
+
+
+def test_extract_object_prefers_the_fenced_block():
+    assert extract_object('see {x}\n```json\n{"a": 1}\n```') == '{"a": 1}\n'
+
+
+def test_repair_stops_at_the_end_of_the_top_level_object():
+    assert repair('{"a": [1, 2,], "b": {"c": 3,},} {"d": 4}') == '{"a": [1, 2], "b": {"c": 3}}'
+    assert repair('{"a": "unterminated') is None
@@ -0,0 +1,53 @@
+from src.react.prompt import HistoryBudget
+from src.react.prompt import PromptBuilder
+
+
+TEMPLATE = "Query: {query}\nHistory: {history}\nTools: {tools}"
+
+
+def words(text: str) -> int:
+    return len(text.split())
+
+
+def builder(max_tokens: int) -> PromptBuilder:
+    budget = HistoryBudget(max_tokens=max_tokens, keep_recent=1, compacted_chars=10)
+    return PromptBuilder(TEMPLATE, query="q", tools="google", budget=budget, count_tokens=words)
+
+
+def test_oldest_steps_after_the_query_are_dropped_first():
+    prompt = builder(max_tokens=25)
+    prompt.append("user", "current query")
+    for step in range(8):
+        prompt.append("assistant", f"step {step} thinking")
+    lines = prompt.history.splitlines()
+    assert lines[0] == "user: current query"
+    assert lines[1].startswith("system: [")
+    assert lines[-1] == "assistant: step 7 thinking"
+    assert prompt.history_tokens == words(prompt.history) <= 25
+
+
+def test_resumed_session_history_is_dropped_before_the_current_query():
+    prompt = builder(max_tokens=25)
+    earlier = []
+    for exchange in range(3):
+        earlier.append(("user", f"earlier question {exchange}"))
+        earlier.append(("assistant", f"Final Answer: earlier answer {exchange}"))
+    prompt.seed(earlier)
+    prompt.append("user", "current query")
+    prompt.append("assistant", "step thinking")
+    lines = prompt.history.splitlines()
+    assert "user: current query" in lines
+    assert lines[-1] == "assistant: step thinking"
+    assert lines[0].startswith("system: [") and "conversation turns omitted" in lines[0]
+    assert "user: earlier question 0" not in lines
+    assert prompt.omitted == 0
+    assert prompt.history_tokens == words(prompt.history) <= 25
+
+
+def test_the_query_and_latest_step_are_kept_even_over_budget():
+    prompt = builder(max_tokens=3)
+    prompt.seed([("user", "earlier question")])
+    prompt.append("user", "current query")
+    prompt.append("assistant", "a long step that does not fit the budget at all")
+    lines = prompt.history.splitlines()
+    assert lines[1:] == ["user: current query", "assistant: a long step that does not fit the budget at all"]
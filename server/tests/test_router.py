@@ -0,0 +1,75 @@
+from src.react.router import UnsupportedExpression
+from src.react.router import ROUTE_ANSWER
+from src.react.router import ROUTE_AGENT
+from src.react.router import ROUTE_TOOL
+from src.react.router import calculate
+from src.react.router import evaluate
+from src.react.router import Router
+from src.react.router import MODEL
+import pytest
+import ast
+
+
+TOOLS = ["wikipedia", "google"]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("what is (17 * 3) + 1?", "(17 * 3) + 1 = 52"),
+    ("calculate 2^8", "2^8 = 256"),
+    ("7 / 2", "7 / 2 = 3.5"),
+    ("how much is 6 x 7", "6 x 7 = 42"),
+    ("what is 10 % 4 =", "10 % 4 = 2")
+])
+def test_arithmetic_is_calculated(query, expected):
+    assert calculate(query) == expected
+
+
+@pytest.mark.parametrize("query", [
+    "what is 42",
+    "what is 1 / 0",
+    "what is 9 ** 9 ** 9",
+    "what is (((9^64)^64)^64)^64",
+    "what is (9^64)^64",
+    "what is (13^64) * (13^64) * (13^64) * (13^64) * (13^64)",
+    "what is __import__('os')",
+    "what is the capital of France",
+    "what is " + "1 + " * 100 + "1"
+])
+def test_non_arithmetic_or_unbounded_queries_are_not_calculated(query):
+    assert calculate(query) is None
+
+
+@pytest.mark.parametrize("source", ["a + 1", "f(1)", "[1, 2]", "'a' * 3", "2 ** 100", "(9 ** 64) ** 64"])
+def test_evaluator_rejects_anything_but_bounded_arithmetic(source):
+    with pytest.raises(UnsupportedExpression):
+        evaluate(ast.parse(source, mode="eval"))
+
+
+@pytest.mark.parametrize("query", ["hi", "Hello there!", "thanks so much", "bye."])
+def test_small_talk_is_answered_directly(query):
+    decision = Router().classify(query, TOOLS)
+    assert decision.route == ROUTE_ANSWER and decision.answer
+
+
+def test_small_talk_only_matches_the_whole_query():
+    assert Router().classify("hello who is Ada Lovelace", TOOLS) is None
+
+
+def test_definitions_start_with_a_lookup():
+    decision = Router().classify("Who was Alan Turing?", TOOLS)
+    assert (decision.route, decision.tool, decision.input) == (ROUTE_TOOL, "wikipedia", "Alan Turing")
+    decision = Router().classify("What is the current price of gold?", TOOLS)
+    assert decision.tool == "google"
+
+
+def test_follow_ups_and_missing_tools_are_not_routed_to_a_tool():
+    assert Router().classify("Who was Alan Turing?", TOOLS, follow_up=True) is None
+    assert Router().classify("Who was Alan Turing?", ["google"]) is None
+
+
+def test_model_classification_falls_back_to_the_agent():
+    router = Router(model=True)
+    assert router.parse('{"route": "tool", "tool": "google", "input": "x"}', TOOLS).route == ROUTE_TOOL
+    assert router.parse('{"route": "tool", "tool": "bing", "input": "x"}', TOOLS).route == ROUTE_AGENT
+    assert router.parse(None, TOOLS).route == ROUTE_AGENT
+    assert router.parse("garbage", TOOLS).source == MODEL
@@ -0,0 +1,49 @@
+from src.react.session import issued_session_id
+from src.react.session import new_session_id
+from src.react.session import SessionStore
+from src.react.session import Exchange
+from src.utils.cache import MemoryCache
+
+
+def store() -> SessionStore:
+    return SessionStore(MemoryCache(), max_exchanges=5)
+
+
+def exchange(query: str) -> Exchange:
+    return Exchange(query=query, history=[("user", query), ("assistant", f"Final Answer: {query}")])
+
+
+def test_a_new_session_gets_a_signed_id():
+    session = store().open(None)
+    assert issued_session_id(session.session_id)
+    assert not issued_session_id(session.session_id[:-1] + "0")
+
+
+def test_ids_the_server_did_not_issue_cannot_read_a_session():
+    sessions = store()
+    session = sessions.open(None)
+    session.exchanges.append(exchange("secret"))
+    sessions.save(session)
+    token, _, _ = session.session_id.rpartition(".")
+    for forged in (token, f"{token}.{'0' * 32}", "chosen-by-client"):
+        other = sessions.open(forged)
+        assert other.session_id != session.session_id
+        assert other.exchanges == []
+    assert [e.query for e in sessions.open(session.session_id).exchanges] == ["secret"]
+
+
+def test_concurrent_requests_do_not_overwrite_each_other():
+    sessions = store()
+    session = sessions.open(None)
+    first, second = sessions.open(session.session_id), sessions.open(session.session_id)
+    first.exchanges.append(exchange("one"))
+    second.exchanges.append(exchange("two"))
+    sessions.save(first)
+    sessions.save(second)
+    stored = sessions.open(session.session_id)
+    assert [e.query for e in stored.exchanges] == ["one", "two"]
+    assert stored.version == 2
+
+
+def test_new_session_ids_are_unique():
+    assert len({new_session_id() for _ in range(100)}) == 100
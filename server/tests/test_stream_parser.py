@@ -0,0 +1,40 @@
+from src.react.stream_parser import IncrementalJSONScanner
+import pytest
+
+
+RESPONSE = '```json\n{"thought": "look {it} up, \\"now\\"", "action": {"name": "google", "input": "a [b]"}, "answer": "x"}\n```'
+
+
+def feed_all(scanner, chunks):
+    return [scanner.feed(chunk) for chunk in chunks]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, len(RESPONSE)])
+def test_action_is_found_as_soon_as_it_closes(size):
+    scanner = IncrementalJSONScanner()
+    chunks = [RESPONSE[i:i + size] for i in range(0, len(RESPONSE), size)]
+    results = feed_all(scanner, chunks)
+    found = [index for index, result in enumerate(results) if result is not None]
+    assert len(found) == 1
+    assert results[found[0]] == {"name": "google", "input": "a [b]"}
+    closing = RESPONSE.index("]\"}") + 2
+    assert found[0] == closing // size
+    assert scanner.actions == {"name": "google", "input": "a [b]"}
+
+
+def test_actions_list_is_extracted():
+    scanner = IncrementalJSONScanner()
+    scanner.feed('{"thought": "t", "actions": [{"name": "google", "input": "x"}, {"name": "wikipedia", "input": "y"}]')
+    assert scanner.actions == [{"name": "google", "input": "x"}, {"name": "wikipedia", "input": "y"}]
+
+
+def test_nested_or_quoted_action_keys_are_ignored():
+    scanner = IncrementalJSONScanner()
+    scanner.feed('{"thought": "\\"action\\": {\\"name\\": 1}", "meta": {"action": {"name": "google"}}, "answer": "a"}')
+    assert scanner.actions is None
+
+
+def test_incomplete_action_is_not_reported():
+    scanner = IncrementalJSONScanner()
+    assert scanner.feed('{"thought": "t", "action": {"name": "google", "input": "x"') is None
+    assert scanner.actions is None